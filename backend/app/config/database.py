@@ -1,28 +1,36 @@
+import logging
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from fastapi import HTTPException
 from app.config.settings import settings
+from app.utils.db_metrics import QueuePoolMedido, instrumentar_pool
+
+logger = logging.getLogger(__name__)
 
 # Resolver ruta SQLite relativa a absoluta basada en la carpeta backend
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-db_url = settings.database_url
-if db_url.startswith("sqlite:///"):
-    raw_path = db_url.replace("sqlite:///", "", 1)
-    if raw_path.startswith("./") or not raw_path.startswith("/"):
-        abs_path = os.path.abspath(os.path.join(BASE_DIR, raw_path))
-        db_url = f"sqlite:///{abs_path}"
-        # Mensaje útil en desarrollo; no usar logging para mantener simple.
-        print(f"[DB] Usando SQLite absoluto: {db_url}")
-
-# Configurar argumentos de conexión según el tipo de base de datos
-if "sqlite" in db_url:
-    connect_args = {"check_same_thread": False}
-else:
+
+
+def resolver_url(url: str) -> str:
+    if url.startswith("sqlite:///"):
+        raw_path = url.replace("sqlite:///", "", 1)
+        if raw_path.startswith("./") or not raw_path.startswith("/"):
+            abs_path = os.path.abspath(os.path.join(BASE_DIR, raw_path))
+            url = f"sqlite:///{abs_path}"
+            logger.info("Usando SQLite absoluto: %s", url)
+    return url
+
+
+def connect_args_para(url: str) -> dict:
+    """Argumentos de conexión según el tipo de base de datos"""
+    if "sqlite" in url:
+        return {"check_same_thread": False}
     # PostgreSQL - Configuración para Render y producción
-    connect_args = {
+    return {
         "connect_timeout": 30,  # Aumentado para dar más tiempo en free tier
         "keepalives": 1,
         "keepalives_idle": 30,
@@ -32,19 +40,49 @@ else:
         "sslmode": "require",
     }
 
+
+db_url = resolver_url(settings.database_url)
+connect_args = connect_args_para(db_url)
+
+def engine_kwargs(url: str, medido: bool = True) -> dict:
+    """Argumentos del pool según settings (preset por entorno o modo PgBouncer)"""
+    if settings.db_pgbouncer and "sqlite" not in url:
+        # PgBouncer mantiene el pool del lado del servidor: cada sesión abre/cierra su conexión
+        return {"poolclass": NullPool}
+    config = settings.db_pool_config
+    return {
+        "poolclass": QueuePoolMedido if medido else QueuePool,
+        "pool_pre_ping": True,      # Verifica la conexión antes de usarla
+        "pool_size": config["pool_size"],
+        "max_overflow": config["max_overflow"],
+        "pool_timeout": config["pool_timeout"],  # Espera máxima por una conexión libre
+        "pool_recycle": config["pool_recycle"],
+    }
+
+
 engine = create_engine(
     db_url,
     connect_args=connect_args,
-    pool_pre_ping=True,      # Verifica la conexión antes de usarla
-    pool_recycle=300,        # Recicla conexiones cada 5 min
-    pool_size=3,             # Muy reducido para free tier de Render (máximo 5 conexiones totales)
-    max_overflow=2,          # Solo 2 adicionales para evitar saturar
-    pool_timeout=60,         # Timeout más largo para esperar conexión disponible
-    echo=False               # No mostrar SQL en logs (cambiar a True para debug)
+    echo=False,               # No mostrar SQL en logs (cambiar a True para debug)
+    **engine_kwargs(db_url)
 )
+instrumentar_pool(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Réplica de lectura opcional (READ_DATABASE_URL); ver get_read_db
+read_engine = None
+ReadSessionLocal = None
+if settings.read_database_url:
+    read_db_url = resolver_url(settings.read_database_url)
+    read_engine = create_engine(
+        read_db_url,
+        connect_args=connect_args_para(read_db_url),
+        echo=False,
+        **engine_kwargs(read_db_url, medido=False)
+    )
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -58,4 +96,21 @@ def get_db():
             db.close()
         except (OperationalError, SQLAlchemyError):
             # Conexión ya cerrada/rota; ignorar en teardown
-            pass
\ No newline at end of file
+            pass
+
+
+def get_read_db():
+    """
+    Sesión para endpoints de solo lectura: la réplica si está configurada y al día
+    (ver app.utils.replica), si no la BD principal.
+    """
+    from app.utils.replica import estado_replica
+
+    db = ReadSessionLocal() if estado_replica.usar_replica() else SessionLocal()
+    try:
+        yield db
+    finally:
+        try:
+            db.close()
+        except (OperationalError, SQLAlchemyError):
+            pass
@@ -1,10 +1,34 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List, Optional
+
+# Tamaño del pool de conexiones (DB_POOL_PRESET). No se deriva de ENVIRONMENT: un plan chico
+# de Postgres se quedaría sin conexiones. Por defecto "free", los valores de siempre para el
+# free tier de Render (máximo 5 conexiones totales).
+POOL_PRESETS: Dict[str, Dict[str, Any]] = {
+    "free": {"pool_size": 3, "max_overflow": 2, "pool_timeout": 30, "pool_recycle": 300},
+    "development": {"pool_size": 3, "max_overflow": 2, "pool_timeout": 30, "pool_recycle": 300},
+    "staging": {"pool_size": 5, "max_overflow": 5, "pool_timeout": 10, "pool_recycle": 900},
+    "production": {"pool_size": 10, "max_overflow": 10, "pool_timeout": 5, "pool_recycle": 1800},
+}
 
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./pqrs_alcaldia.db"
+
+    # Pool de conexiones: preset por entorno, cada valor se puede sobreescribir por separado
+    db_pool_preset: str = "free"  # free | development | staging | production
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_timeout: Optional[float] = None  # Segundos máximos esperando una conexión libre
+    db_pool_recycle: Optional[int] = None
+    db_pgbouncer: bool = False  # True = NullPool; el pooling lo hace PgBouncer (modo transaction)
+
+    # Réplica de lectura (vacío = todo va a la principal)
+    read_database_url: str = ""
+    read_replica_max_lag_seconds: float = 10.0  # Con más retraso, las lecturas van a la principal
+    read_replica_check_interval_seconds: float = 5.0  # Cada cuánto se vuelve a medir el retraso
+    read_replica_lag_query: str = ""  # Consulta propia que devuelve el retraso en segundos (vacío = automática)
     
     # JWT
     secret_key: str = "tu-clave-secreta-super-segura-cambiar-en-produccion"
@@ -13,6 +37,50 @@ class Settings(BaseSettings):
     
     # OpenAI
     openai_api_key: str = ""
+    openai_base_url: str = ""  # Vacío = API oficial; permite apuntar a un endpoint compatible (p. ej. LLM local)
+    openai_model: str = "gpt-4o-mini"
+    openai_max_concurrency: int = 4  # Llamadas simultáneas máximas al LLM
+    openai_timeout_seconds: float = 60.0
+    ai_summary_cache_ttl_seconds: int = 86400  # Vigencia de los resúmenes cacheados (0 = sin caché)
+    
+    # SECOP II / datos.gov.co (proxy de contratación)
+    datos_gov_base_url: str = "https://www.datos.gov.co/resource/jbjy-vk9h.json"
+    datos_gov_timeout_seconds: float = 30.0
+    datos_gov_cache_ttl_seconds: int = 300
+    datos_gov_cache_max_entries: int = 256
+
+    # Espejo local de contratos SECOP (tabla secop_contratos)
+    secop_sync_interval_minutes: int = 0  # 0 = sin sincronización programada (solo manual)
+    secop_sync_page_size: int = 1000
+    secop_sync_desde: str = "2025-01-01"  # Fecha de firma inicial para la primera carga de cada NIT
+
+    # Caché de entidades (directorio público y resolución por slug)
+    entity_cache_ttl_seconds: int = 300  # 0 = sin caché en proceso
+    entity_http_max_age_seconds: int = 60  # Cache-Control max-age de los endpoints públicos de entidades
+
+    # Alta masiva de usuarios
+    password_hash_workers: int = 0  # Procesos para hashear contraseñas (0 = min(4, CPUs))
+    bulk_users_max_rows: int = 500
+
+    # Esquema: si la huella no coincide al arrancar, aplicarlo (False = solo avisar)
+    schema_auto_apply: bool = True
+
+    # Backfills de migraciones por lotes de PK (sin bloqueos largos en tablas grandes)
+    migration_backfill_batch_size: int = 5000
+    migration_backfill_sleep_ms: int = 50  # Pausa entre lotes para no saturar la BD
+    migration_lock_timeout_ms: int = 3000  # Solo PostgreSQL: máximo a esperar por un lock
+    migration_backfill_max_retries: int = 5  # Reintentos de un lote tras lock timeout
+    
+    # Detector de consultas lentas / N+1 (solo development o staging; agrega costo por consulta)
+    query_profiler_enabled: bool = False
+    query_profiler_slow_ms: float = 200.0
+    query_profiler_n_plus_one_threshold: int = 10  # Misma sentencia más de N veces en un request
+    
+    # Logging estructurado
+    log_level: str = "INFO"
+    log_format: str = "json"  # json | text
+    log_access_sample_rate: float = 1.0  # Fracción de requests exitosos que se registran (errores siempre)
+    log_slow_request_ms: float = 1000.0  # Requests más lentos que esto se registran siempre
     
     # Environment
     environment: str = "development"
@@ -47,6 +115,23 @@ class Settings(BaseSettings):
                     production_origins.append(origin.replace("https://", "https://www."))
         return list(set(origins + production_origins))  # Eliminar duplicados
     
+    @property
+    def db_pool_preset_efectivo(self) -> str:
+        return (self.db_pool_preset or "free").lower()
+
+    @property
+    def db_pool_config(self) -> Dict[str, Any]:
+        """Parámetros del pool: preset del entorno + sobreescrituras explícitas"""
+        config = dict(POOL_PRESETS.get(self.db_pool_preset_efectivo, POOL_PRESETS["free"]))
+        overrides = {
+            "pool_size": self.db_pool_size,
+            "max_overflow": self.db_max_overflow,
+            "pool_timeout": self.db_pool_timeout,
+            "pool_recycle": self.db_pool_recycle,
+        }
+        config.update({k: v for k, v in overrides.items() if v is not None})
+        return config
+    
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignorar campos extra
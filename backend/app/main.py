@@ -2,74 +2,23 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, text
-from app.config.database import engine, get_db, Base
+import logging
 from app.config.settings import settings
-from app.routes import auth, pqrs, users, planes, entities, contratacion, alerts, secretarias, migrations
-from app.models import user, pqrs as pqrs_model, plan, entity, pdm as pdm_model, secretaria as secretaria_model
+from app.utils.logging_config import configurar_logging, RequestContextMiddleware, request_id_var
+from app.utils.respuestas import RespuestaJSON
+
+# Antes de importar el resto de la app, para que sus logs de arranque ya salgan estructurados
+configurar_logging()
+logger = logging.getLogger("app.main")
+
+from app.config.database import get_db
+from app.routes import auth, pqrs, users, planes, entities, contratacion, alerts, secretarias, migrations, metrics
+from app.models import user, pqrs as pqrs_model, plan, entity, pdm as pdm_model, secretaria as secretaria_model, contratacion as contratacion_model
 from app.models.user import User, UserRole
 from app.utils.auth import get_password_hash
 
-# Asegurar que el ENUM userrole existe en Postgres con todos los valores antes de crear tablas
-def ensure_postgres_enums():
-    """Crea o actualiza el ENUM userrole en Postgres si es necesario."""
-    try:
-        if 'postgresql' not in str(engine.url):
-            return  # Solo para PostgreSQL
-        
-        with engine.connect() as conn:
-            # Verificar si el tipo userrole existe
-            check_type = text("""
-                SELECT EXISTS (
-                    SELECT 1 FROM pg_type WHERE typname = 'userrole'
-                ) as exists;
-            """)
-            type_exists = conn.execute(check_type).scalar()
-            
-            if not type_exists:
-                # Crear el ENUM con valores en MAYÚSCULAS (coinciden con Enum.name)
-                conn.execute(text(
-                    "CREATE TYPE userrole AS ENUM ('SUPERADMIN', 'ADMIN', 'SECRETARIO', 'CIUDADANO')"
-                ))
-                conn.commit()
-            else:
-                # Verificar que tenga todos los valores necesarios
-                check_values = text("""
-                    SELECT enumlabel FROM pg_enum 
-                    WHERE enumtypid = (SELECT oid FROM pg_type WHERE typname = 'userrole')
-                    ORDER BY enumsortorder;
-                """)
-                existing_values = [row[0] for row in conn.execute(check_values).fetchall()]
-                
-                # Agregar valores faltantes
-                required_values = ['SUPERADMIN', 'ADMIN', 'SECRETARIO', 'CIUDADANO']
-                for value in required_values:
-                    if value not in existing_values:
-                        try:
-                            conn.execute(text("COMMIT"))
-                            conn.execute(text(f"ALTER TYPE userrole ADD VALUE '{value}'"))
-                        except Exception:
-                            pass  # El valor ya existe o hay error
-    except Exception as e:
-        print(f"⚠️  Error asegurando ENUMs: {e}")
-
-# Ejecutar antes de crear tablas
-ensure_postgres_enums()
-
-# Crear las tablas en la base de datos (solo si no existen)
-Base.metadata.create_all(bind=engine)
-
-# Compatibilidad: añadir columna `is_active` a la tabla users en SQLite si no existe
-inspector = inspect(engine)
-if inspector.has_table("users"):
-    cols = [c.get("name") for c in inspector.get_columns("users")]
-    if "is_active" not in cols:
-        try:
-            with engine.connect() as conn:
-                conn.execute(text('ALTER TABLE users ADD COLUMN is_active BOOLEAN NOT NULL DEFAULT 1'))
-                conn.commit()
-        except Exception:
-            pass  # Columna ya existe o error ignorado
+# El esquema ya no se crea al importar: se aplica con `python -m app.utils.schema`
+# (build.sh) y al arrancar solo se verifica su huella con una consulta (ver startup).
 
 # Nota: se removieron migraciones automáticas específicas de SQLite
 
@@ -79,7 +28,8 @@ if inspector.has_table("users"):
 app = FastAPI(
     title="Sistema PQRS Alcaldía",
     description="API para gestión de Peticiones, Quejas, Reclamos y Sugerencias",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=RespuestaJSON,  # orjson si está instalado
 )
 
 # Nota: se removieron prints de CORS para un arranque limpio
@@ -97,11 +47,16 @@ app.add_middleware(
 # Comprimir respuestas grandes para optimizar ancho de banda
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
+# Métricas por ruta (latencia, status, consultas SQL); se agrega al final para ser el más externo
+from app.config.database import engine, read_engine
+from app.utils.http_metrics import MetricsMiddleware, instrumentar_consultas, render_prometheus
+instrumentar_consultas(engine)
+if read_engine is not None:
+    instrumentar_consultas(read_engine)
+
 # Middleware para manejar excepciones y asegurar CORS headers
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-import traceback
-
 @app.middleware("http")
 async def catch_exceptions_middleware(request: Request, call_next):
     """Middleware para capturar todas las excepciones y enviar headers CORS"""
@@ -109,11 +64,8 @@ async def catch_exceptions_middleware(request: Request, call_next):
         response = await call_next(request)
         return response
     except Exception as e:
-        # Log detallado del error
-        print(f"\n❌ Error no manejado:")
-        print(f"   Path: {request.method} {request.url.path}")
-        print(f"   Error: {str(e)}")
-        print(f"   Traceback:\n{traceback.format_exc()}")
+        # Log detallado del error (con traceback y request id)
+        logger.exception("Error no manejado", extra={"method": request.method, "path": request.url.path})
         
         # Crear respuesta con CORS headers
         origin = request.headers.get("origin")
@@ -122,7 +74,8 @@ async def catch_exceptions_middleware(request: Request, call_next):
                 status_code=500,
                 content={
                     "detail": "Error interno del servidor",
-                    "error": str(e) if settings.debug else "Internal server error"
+                    "error": str(e) if settings.debug else "Internal server error",
+                    "request_id": request_id_var.get()
                 },
                 headers={
                     "Access-Control-Allow-Origin": origin or "*",
@@ -133,9 +86,21 @@ async def catch_exceptions_middleware(request: Request, call_next):
             )
         return JSONResponse(
             status_code=500,
-            content={"detail": "Error interno del servidor"}
+            content={"detail": "Error interno del servidor", "request_id": request_id_var.get()}
         )
 
+if settings.query_profiler_enabled:
+    from app.utils.query_profiler import QueryProfilerMiddleware, instrumentar_perfilador
+    instrumentar_perfilador(engine)
+    if read_engine is not None:
+        instrumentar_perfilador(read_engine)
+    app.add_middleware(QueryProfilerMiddleware)
+
+app.add_middleware(MetricsMiddleware)
+
+# Request id + log de acceso: el más externo, para cubrir también a los demás middlewares
+app.add_middleware(RequestContextMiddleware)
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(pqrs.router, prefix="/api")
@@ -148,6 +113,43 @@ app.include_router(pdm_routes.router, prefix="/api", tags=["PDM"])
 app.include_router(alerts.router, prefix="/api", tags=["Alerts"])
 app.include_router(secretarias.router, prefix="/api", tags=["Secretarías"])
 app.include_router(migrations.router, prefix="/api", tags=["Migrations"])
+app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
+
+_secop_sync_task = None
+
+@app.on_event("startup")
+def verificar_esquema():
+    """Una sola consulta: compara la huella del esquema en la BD con la de los modelos"""
+    from app.utils.schema import esquema_al_dia, aplicar_esquema
+    try:
+        if esquema_al_dia():
+            return
+        if settings.schema_auto_apply:
+            logger.info("Esquema desactualizado, aplicando (python -m app.utils.schema)")
+            aplicar_esquema()
+        else:
+            logger.warning("Esquema desactualizado: ejecuta `python -m app.utils.schema` antes de servir")
+    except Exception as e:
+        logger.exception("Error verificando el esquema")
+
+@app.on_event("startup")
+async def start_secop_sync():
+    """Sincronización programada del espejo SECOP (solo si SECOP_SYNC_INTERVAL_MINUTES > 0)"""
+    global _secop_sync_task
+    if settings.secop_sync_interval_minutes > 0:
+        import asyncio
+        from app.utils.secop_sync import ciclo_sincronizacion_programada
+        _secop_sync_task = asyncio.create_task(ciclo_sincronizacion_programada())
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Cerrar el pool de conexiones hacia datos.gov.co y el pool de hashing de contraseñas"""
+    from app.utils.datos_gov import datos_gov_client
+    if _secop_sync_task is not None:
+        _secop_sync_task.cancel()
+    await datos_gov_client.aclose()
+    from app.utils.auth import shutdown_hash_pool
+    shutdown_hash_pool()
 
 @app.get("/")
 async def root():
@@ -157,4 +159,9 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Seed en startup eliminado; usar endpoint /api/auth/init-superadmin si se necesita
\ No newline at end of file
@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Text, Float, Integer, JSON, Index
+from app.config.database import Base
+
+
+class ContratacionResumenIA(Base):
+    """
+    Caché persistente de resúmenes de contratación generados con IA.
+    La clave es el hash SHA-256 del payload de KPIs (más el modelo usado).
+    """
+    __tablename__ = "contratacion_resumenes_ia"
+
+    clave = Column(String(64), primary_key=True)
+    modelo = Column(String(100), nullable=True)
+    resumen = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class SecopContrato(Base):
+    """
+    Espejo local de contratos SECOP II (dataset jbjy-vk9h de datos.gov.co).
+    Se alimenta con la sincronización incremental de app.utils.secop_sync.
+    """
+    __tablename__ = "secop_contratos"
+
+    id_contrato = Column(String(100), primary_key=True)
+    nit_entidad = Column(String(50), nullable=False, index=True)
+    nombre_entidad = Column(String(300), nullable=True)
+
+    proceso_de_compra = Column(String(100), nullable=True)
+    referencia_del_contrato = Column(String(200), nullable=True)
+    estado_contrato = Column(String(100), nullable=True)
+    estado_normalizado = Column(String(100), nullable=True)  # minúsculas y sin tildes, para los KPIs
+    tipo_de_contrato = Column(String(200), nullable=True)
+    modalidad_de_contratacion = Column(String(200), nullable=True)
+    objeto_del_contrato = Column(Text, nullable=True)
+
+    fecha_de_firma = Column(DateTime, nullable=True, index=True)
+    fecha_de_inicio_del_contrato = Column(DateTime, nullable=True)
+    fecha_de_fin_del_contrato = Column(DateTime, nullable=True)
+    ultima_actualizacion = Column(DateTime, nullable=True, index=True)
+
+    documento_proveedor = Column(String(100), nullable=True)
+    proveedor_adjudicado = Column(String(300), nullable=True)
+
+    valor_del_contrato = Column(Float, nullable=True)
+    valor_pagado = Column(Float, nullable=True)
+
+    urlproceso = Column(String(500), nullable=True)
+    datos = Column(JSON, nullable=True)  # Registro completo tal como lo devuelve el API
+    sincronizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_secop_contratos_nit_fecha_firma", "nit_entidad", "fecha_de_firma"),
+    )
+
+
+class SecopSyncEstado(Base):
+    """Marca de agua de la sincronización SECOP por NIT"""
+    __tablename__ = "secop_sync_estado"
+
+    nit = Column(String(50), primary_key=True)
+    watermark = Column(DateTime, nullable=True)  # Mayor ultima_actualizacion ya sincronizada
+    ultima_ejecucion = Column(DateTime, nullable=True)
+    ultimo_estado = Column(String(20), nullable=True)  # ok | error
+    ultimo_error = Column(Text, nullable=True)
+    registros_ultima_ejecucion = Column(Integer, nullable=False, default=0)
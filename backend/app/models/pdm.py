@@ -28,6 +28,7 @@ class PdmMetaAssignment(Base):
     entity_id = Column(Integer, ForeignKey("entities.id"), nullable=False, index=True)
     codigo_indicador_producto = Column(String(128), nullable=False, index=True)
     secretaria = Column(String(256), nullable=True)
+    secretaria_id = Column(Integer, ForeignKey("secretarias.id", ondelete="SET NULL"), nullable=True, index=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -145,6 +145,8 @@ class Actividad(Base):
 
     # Responsable único de la actividad
     responsable = Column(String(200), nullable=False, index=True)
+    # Secretaría resuelta a partir de `responsable` (null si el texto no corresponde a una secretaría)
+    responsable_secretaria_id = Column(Integer, ForeignKey("secretarias.id", ondelete="SET NULL"), nullable=True, index=True)
 
     # Auditoría
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Boolean, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.config.database import Base
@@ -16,6 +16,10 @@ class UserType(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Listados por entidad y rol (secretarios de una entidad, admins a notificar)
+        Index("idx_users_entity_role", "entity_id", "role"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
@@ -56,6 +60,7 @@ class User(Base):
     
     # Campos legacy (mantener por compatibilidad)
     secretaria = Column(String, nullable=True)  # Secretaría a la que pertenece (legacy)
+    secretaria_id = Column(Integer, ForeignKey("secretarias.id", ondelete="SET NULL"), nullable=True, index=True)
     cedula = Column(String, nullable=True)  # Cédula para ciudadanos
     telefono = Column(String, nullable=True)  # Teléfono para ciudadanos
     direccion = Column(String, nullable=True)  # Dirección para ciudadanos
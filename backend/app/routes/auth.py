@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from datetime import timedelta
+import logging
 from app.config.database import get_db
 from app.config.settings import settings
 from app.models.user import User, UserRole
@@ -15,6 +16,7 @@ from app.utils.auth import (
 )
 
 router = APIRouter(prefix="/auth", tags=["Autenticación"])
+logger = logging.getLogger(__name__)
 
 @router.post("/login", response_model=Token)
 async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
@@ -158,32 +160,27 @@ async def initialize_admin(db: Session = Depends(get_db)):
     SOLO PARA DEBUGGING - Eliminar en producción después de configurar.
     """
     from sqlalchemy.exc import IntegrityError
-    import traceback
     
     try:
-        print("🔧 [init-admin] Iniciando creación/reset de admin...")
+        logger.info("init-admin: creación/reset de admin")
         
         # Contraseña simple y segura
         plain_password = "admin123"
         
         # Buscar admin existente por username
-        print("🔧 [init-admin] Buscando admin existente...")
         admin = db.query(User).filter(User.username == "admin").first()
         
         if admin:
-            print(f"🔧 [init-admin] Admin encontrado: {admin.username} ({admin.email})")
+            logger.debug("init-admin: admin encontrado", extra={"username": admin.username})
             # Actualizar contraseña del admin existente
             try:
                 # Hashear directamente sin procesamiento adicional
-                print("🔧 [init-admin] Hasheando nueva contraseña...")
                 new_hash = get_password_hash(plain_password)
-                print(f"🔧 [init-admin] Hash generado: {new_hash[:20]}...")
                 admin.hashed_password = new_hash
                 admin.is_active = True
-                print("🔧 [init-admin] Guardando cambios en DB...")
                 db.commit()
                 db.refresh(admin)
-                print("✅ [init-admin] Admin actualizado exitosamente")
+                logger.info("init-admin: admin actualizado")
                 return {
                     "message": "Admin password has been reset",
                     "username": "admin",
@@ -192,21 +189,17 @@ async def initialize_admin(db: Session = Depends(get_db)):
                     "exists": True
                 }
             except Exception as hash_error:
-                print(f"❌ [init-admin] Error actualizando admin: {hash_error}")
-                print(f"❌ [init-admin] Traceback: {traceback.format_exc()}")
+                logger.exception("init-admin: error actualizando admin")
                 db.rollback()
                 raise HTTPException(
                     status_code=500,
                     detail=f"Error hashing password: {str(hash_error)} | Type: {type(hash_error).__name__}"
                 )
         else:
-            print("🔧 [init-admin] No existe admin, creando nuevo...")
+            logger.debug("init-admin: no existe admin, creando uno nuevo")
             # Crear nuevo admin
             try:
-                print("🔧 [init-admin] Hasheando contraseña para nuevo admin...")
                 new_hash = get_password_hash(plain_password)
-                print(f"🔧 [init-admin] Hash generado: {new_hash[:20]}...")
-                print("🔧 [init-admin] Creando objeto User...")
                 new_admin = User(
                     username="admin",
                     email="admin@alcaldia.gov.co",
@@ -216,12 +209,10 @@ async def initialize_admin(db: Session = Depends(get_db)):
                     secretaria="Sistemas",
                     is_active=True
                 )
-                print("🔧 [init-admin] Agregando a DB...")
                 db.add(new_admin)
-                print("🔧 [init-admin] Haciendo commit...")
                 db.commit()
                 db.refresh(new_admin)
-                print("✅ [init-admin] Admin creado exitosamente")
+                logger.info("init-admin: admin creado")
                 return {
                     "message": "Admin user created successfully",
                     "username": "admin",
@@ -230,8 +221,7 @@ async def initialize_admin(db: Session = Depends(get_db)):
                     "exists": False
                 }
             except Exception as create_error:
-                print(f"❌ [init-admin] Error creando admin: {create_error}")
-                print(f"❌ [init-admin] Traceback: {traceback.format_exc()}")
+                logger.exception("init-admin: error creando admin")
                 db.rollback()
                 raise HTTPException(
                     status_code=500,
@@ -239,8 +229,7 @@ async def initialize_admin(db: Session = Depends(get_db)):
                 )
                 
     except IntegrityError as e:
-        print(f"❌ [init-admin] IntegrityError: {e}")
-        print(f"❌ [init-admin] Traceback: {traceback.format_exc()}")
+        logger.exception("init-admin: IntegrityError")
         db.rollback()
         raise HTTPException(
             status_code=400,
@@ -250,9 +239,7 @@ async def initialize_admin(db: Session = Depends(get_db)):
         # Re-lanzar HTTPException sin envolver
         raise
     except Exception as e:
-        print(f"❌ [init-admin] Unexpected error: {e}")
-        print(f"❌ [init-admin] Error type: {type(e).__name__}")
-        print(f"❌ [init-admin] Traceback: {traceback.format_exc()}")
+        logger.exception("init-admin: error inesperado")
         db.rollback()
         raise HTTPException(
             status_code=500,
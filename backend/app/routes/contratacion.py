@@ -1,39 +1,35 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, or_
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel
+from datetime import datetime, timedelta, date
+from app.config.database import get_db, SessionLocal
 from app.config.settings import settings
+from app.models.contratacion import ContratacionResumenIA, SecopContrato, SecopSyncEstado
+from app.models.user import User, UserRole
+from app.utils.auth import get_current_active_user, require_superadmin
+from app.utils.datos_gov import datos_gov_client
+from app.utils.secop_sync import ESTADOS_ACTIVOS, normalizar_estado, sincronizar_entidades
+import asyncio
+import hashlib
+import json
+import logging
 import httpx
-from urllib.parse import urlencode
 
 router = APIRouter(prefix="/contratacion", tags=["Contratación"])
+logger = logging.getLogger(__name__)
 
 # Dataset de contratos (jbjy-vk9h)
-DATOS_GOV_BASE_URL = "https://www.datos.gov.co/resource/jbjy-vk9h.json"
+DATOS_GOV_BASE_URL = settings.datos_gov_base_url
 
 
-@router.get("/proxy")
-async def proxy_datos_gov(query: Optional[str] = Query(None, alias="$query")):
-    """
-    Proxy para consultar el API de datos.gov.co (SECOP II).
-    Evita problemas de CORS haciendo la petición desde el servidor.
-    """
+async def consultar_datos_gov(query: Optional[str]):
+    """Consulta datos.gov.co con el cliente compartido, traduciendo los errores a HTTPException"""
     try:
-        params = {}
-        if query:
-            params["$query"] = query
-        
-        # Construir URL completa
-        url = DATOS_GOV_BASE_URL
-        if params:
-            url = f"{url}?{urlencode(params)}"
-        
-        # Hacer petición al API externo
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            
-            # Retornar la respuesta JSON
-            return response.json()
+        return await datos_gov_client.consultar(query)
             
     except httpx.HTTPStatusError as e:
         raise HTTPException(
@@ -52,6 +48,295 @@ async def proxy_datos_gov(query: Optional[str] = Query(None, alias="$query")):
         )
 
 
+@router.get("/proxy")
+async def proxy_datos_gov(query: Optional[str] = Query(None, alias="$query")):
+    """
+    Proxy para consultar el API de datos.gov.co (SECOP II).
+    Evita problemas de CORS haciendo la petición desde el servidor.
+    Usa un cliente compartido (keep-alive/HTTP2), caché LRU+TTL por consulta normalizada
+    y coalescencia de consultas idénticas concurrentes.
+    """
+    return await consultar_datos_gov(query)
+
+
+# ==== Espejo local de SECOP ====
+
+def _parse_fecha_filtro(valor: Optional[str], nombre: str) -> Optional[date]:
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{nombre} debe tener formato YYYY-MM-DD")
+
+
+def filtros_espejo(nit: str, desde: Optional[str], hasta: Optional[str]) -> List[Any]:
+    """Condiciones sobre secop_contratos para un NIT y rango de fecha de firma (inclusive)"""
+    filtros = [SecopContrato.nit_entidad == nit]
+    fecha_desde = _parse_fecha_filtro(desde, "desde")
+    fecha_hasta = _parse_fecha_filtro(hasta, "hasta")
+    if fecha_desde:
+        filtros.append(SecopContrato.fecha_de_firma >= datetime.combine(fecha_desde, datetime.min.time()))
+    if fecha_hasta:
+        filtros.append(SecopContrato.fecha_de_firma < datetime.combine(fecha_hasta + timedelta(days=1), datetime.min.time()))
+    return filtros
+
+
+def calcular_kpis_espejo(db: Session, filtros: List[Any]) -> Dict[str, Any]:
+    """KPIs del tablero (mismas reglas que computeKPIs del frontend) en una sola consulta agregada"""
+    activos = SecopContrato.estado_normalizado.in_(ESTADOS_ACTIVOS)
+    total, adjudicados, suma_pagada, promedio = db.query(
+        func.count(SecopContrato.id_contrato),
+        func.coalesce(func.sum(case((activos, 1), else_=0)), 0),
+        func.coalesce(func.sum(SecopContrato.valor_pagado), 0),
+        func.coalesce(func.avg(func.coalesce(SecopContrato.valor_del_contrato, 0)), 0),
+    ).filter(*filtros).one()
+    return {
+        "totalProcesos": int(total),
+        "totalAdjudicados": int(adjudicados),
+        "tasaAdjudicacion": (int(adjudicados) / int(total)) if total else 0,
+        "sumaAdjudicado": float(suma_pagada),
+        "promedioPrecioBase": float(promedio),
+    }
+
+
+def top_proveedores_espejo(db: Session, filtros: List[Any], limite: int = 10) -> List[Dict[str, Any]]:
+    """Proveedores con mayor valor contratado (solo contratos con valor > 0)"""
+    proveedor = func.coalesce(SecopContrato.proveedor_adjudicado, "N/D")
+    valor = func.sum(SecopContrato.valor_del_contrato)
+    filas = db.query(proveedor, valor, func.count(SecopContrato.id_contrato)).filter(
+        *filtros, SecopContrato.valor_del_contrato > 0
+    ).group_by(proveedor).order_by(valor.desc()).limit(limite).all()
+    return [
+        {"nombre": nombre, "valor": float(total or 0), "contratos": int(contratos)}
+        for nombre, total, contratos in filas
+    ]
+
+
+@router.get("/mirror/kpis")
+def kpis_espejo(
+    nit: str = Query(..., min_length=1),
+    desde: Optional[str] = Query(None, description="Fecha de firma inicial (YYYY-MM-DD)"),
+    hasta: Optional[str] = Query(None, description="Fecha de firma final (YYYY-MM-DD)"),
+    top: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    KPIs de contratación calculados en SQL sobre el espejo local (secop_contratos),
+    sin depender de la disponibilidad de datos.gov.co.
+    """
+    filtros = filtros_espejo(nit, desde, hasta)
+    estado = db.query(SecopSyncEstado).filter(SecopSyncEstado.nit == nit).first()
+    return {
+        "nit": nit,
+        "periodo": {"desde": desde, "hasta": hasta},
+        "kpis": calcular_kpis_espejo(db, filtros),
+        "top_proveedores": top_proveedores_espejo(db, filtros, top),
+        "ultima_sincronizacion": estado.ultima_ejecucion.isoformat() if estado and estado.ultima_ejecucion else None,
+    }
+
+
+def resumen_error_sync(error: Optional[str], detallado: bool) -> Optional[str]:
+    """
+    El texto guardado es la excepción cruda (upstream o BD): solo el superadmin ve su
+    primera línea; al resto se le informa que hubo un error.
+    """
+    if not error:
+        return None
+    lineas = error.strip().splitlines()
+    if not detallado or not lineas:
+        return "Error en la última sincronización"
+    return lineas[0][:200]
+
+
+@router.get("/mirror/estado")
+def estado_espejo(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Marca de agua y resultado de la última sincronización por NIT"""
+    detallado = current_user.role == UserRole.SUPERADMIN
+    estados = db.query(SecopSyncEstado).order_by(SecopSyncEstado.nit).all()
+    return [
+        {
+            "nit": e.nit,
+            "watermark": e.watermark.isoformat() if e.watermark else None,
+            "ultima_ejecucion": e.ultima_ejecucion.isoformat() if e.ultima_ejecucion else None,
+            "ultimo_estado": e.ultimo_estado,
+            "ultimo_error": resumen_error_sync(e.ultimo_error, detallado),
+            "registros_ultima_ejecucion": e.registros_ultima_ejecucion,
+        }
+        for e in estados
+    ]
+
+
+@router.post("/mirror/sync")
+async def sincronizar_espejo(
+    nit: Optional[str] = Query(None, description="NIT a sincronizar; por defecto todas las entidades activas"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_superadmin)
+):
+    """Ejecuta la sincronización incremental del espejo SECOP (solo superadmin)"""
+    return await sincronizar_entidades(db, [nit] if nit else None)
+
+
+# ==== Agregados de contratación (KPIs, distribuciones y top proveedores) ====
+
+# Distribución -> (columna SECOP, etiqueta para vacíos), igual que updateCharts del frontend
+COLUMNAS_DISTRIBUCION = {
+    "estados": ("estado_contrato", "SIN ESTADO"),
+    "modalidades": ("modalidad_de_contratacion", "N/D"),
+    "tiposContrato": ("tipo_de_contrato", "Sin especificar"),
+}
+
+
+def _numero(valor: Any) -> float:
+    try:
+        return float(valor) if valor not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def armar_agregados(
+    por_estado: List[tuple],
+    distribuciones: Dict[str, List[tuple]],
+    top_proveedores: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Combina los resultados agrupados (del espejo o de SoQL) en el formato de /summary.
+    por_estado: filas (estado, cantidad, suma valor_pagado, suma valor_del_contrato).
+    distribuciones: {nombre: filas (valor, cantidad)} para modalidades y tipos de contrato.
+    """
+    total = adjudicados = 0
+    suma_pagada = suma_valor = 0.0
+    estados: Dict[str, int] = {}
+    for estado, cantidad, pagado, valor in por_estado:
+        cantidad = int(_numero(cantidad))
+        total += cantidad
+        if normalizar_estado(estado) in ESTADOS_ACTIVOS:
+            adjudicados += cantidad
+        suma_pagada += _numero(pagado)
+        suma_valor += _numero(valor)
+        etiqueta = estado or COLUMNAS_DISTRIBUCION["estados"][1]
+        estados[etiqueta] = estados.get(etiqueta, 0) + cantidad
+
+    resultado_distribuciones: Dict[str, Dict[str, int]] = {"estados": estados}
+    for nombre, filas in distribuciones.items():
+        etiqueta_vacio = COLUMNAS_DISTRIBUCION[nombre][1]
+        conteos: Dict[str, int] = {}
+        for valor, cantidad in filas:
+            etiqueta = valor or etiqueta_vacio
+            conteos[etiqueta] = conteos.get(etiqueta, 0) + int(_numero(cantidad))
+        resultado_distribuciones[nombre] = conteos
+
+    for nombre, conteos in resultado_distribuciones.items():
+        resultado_distribuciones[nombre] = dict(sorted(conteos.items(), key=lambda x: x[1], reverse=True))
+
+    return {
+        "kpis": {
+            "totalProcesos": total,
+            "totalAdjudicados": adjudicados,
+            "tasaAdjudicacion": (adjudicados / total) if total else 0,
+            "sumaAdjudicado": suma_pagada,
+            "promedioPrecioBase": (suma_valor / total) if total else 0,
+        },
+        "distribuciones": resultado_distribuciones,
+        "top_proveedores": top_proveedores,
+    }
+
+
+def agregados_espejo(db: Session, filtros: List[Any], top: int) -> Dict[str, Any]:
+    """Agregados desde secop_contratos: una consulta GROUP BY por dimensión"""
+    por_estado = db.query(
+        SecopContrato.estado_contrato,
+        func.count(SecopContrato.id_contrato),
+        func.sum(SecopContrato.valor_pagado),
+        func.sum(SecopContrato.valor_del_contrato),
+    ).filter(*filtros).group_by(SecopContrato.estado_contrato).all()
+
+    distribuciones = {}
+    for nombre, (columna, _) in COLUMNAS_DISTRIBUCION.items():
+        if nombre == "estados":
+            continue
+        col = getattr(SecopContrato, columna)
+        distribuciones[nombre] = db.query(col, func.count(SecopContrato.id_contrato)).filter(*filtros).group_by(col).all()
+
+    return armar_agregados(por_estado, distribuciones, top_proveedores_espejo(db, filtros, top))
+
+
+def where_soql(nit: str, desde: Optional[str], hasta: Optional[str]) -> str:
+    condiciones = ["nit_entidad = '" + nit.replace("'", "''") + "'"]
+    fecha_desde = _parse_fecha_filtro(desde, "desde")
+    fecha_hasta = _parse_fecha_filtro(hasta, "hasta")
+    if fecha_desde:
+        condiciones.append(f"fecha_de_firma >= '{fecha_desde.isoformat()}T00:00:00.000'")
+    if fecha_hasta:
+        condiciones.append(f"fecha_de_firma <= '{fecha_hasta.isoformat()}T23:59:59.000'")
+    return " AND ".join(condiciones)
+
+
+async def agregados_upstream(nit: str, desde: Optional[str], hasta: Optional[str], top: int) -> Dict[str, Any]:
+    """Agregados con consultas SoQL agrupadas ($select/$group) en datos.gov.co, lanzadas en paralelo"""
+    where = where_soql(nit, desde, hasta)
+    dimensiones = [(nombre, columna) for nombre, (columna, _) in COLUMNAS_DISTRIBUCION.items() if nombre != "estados"]
+    consultas = [
+        f"SELECT estado_contrato, count(*) AS n, sum(valor_pagado) AS pagado, sum(valor_del_contrato) AS valor "
+        f"WHERE {where} GROUP BY estado_contrato",
+        *[f"SELECT {columna}, count(*) AS n WHERE {where} GROUP BY {columna}" for _, columna in dimensiones],
+        f"SELECT proveedor_adjudicado, sum(valor_del_contrato) AS valor, count(*) AS n "
+        f"WHERE {where} AND valor_del_contrato > 0 GROUP BY proveedor_adjudicado ORDER BY valor DESC LIMIT {top}",
+    ]
+    resultados = await asyncio.gather(*(consultar_datos_gov(q) for q in consultas))
+
+    por_estado = [(r.get("estado_contrato"), r.get("n"), r.get("pagado"), r.get("valor")) for r in resultados[0]]
+    distribuciones = {
+        nombre: [(r.get(columna), r.get("n")) for r in resultados[1 + i]]
+        for i, (nombre, columna) in enumerate(dimensiones)
+    }
+    proveedores = [
+        {"nombre": r.get("proveedor_adjudicado") or "N/D", "valor": _numero(r.get("valor")), "contratos": int(_numero(r.get("n")))}
+        for r in resultados[-1]
+    ]
+    return armar_agregados(por_estado, distribuciones, proveedores)
+
+
+def espejo_sincronizado(db: Session, nit: str) -> bool:
+    """True si el NIT tiene al menos una sincronización exitosa en el espejo local"""
+    return db.query(SecopSyncEstado.nit).filter(
+        SecopSyncEstado.nit == nit,
+        or_(SecopSyncEstado.watermark.isnot(None), SecopSyncEstado.ultimo_estado == "ok")
+    ).first() is not None
+
+
+@router.get("/agregados")
+async def agregados_contratacion(
+    nit: str = Query(..., min_length=1),
+    desde: Optional[str] = Query(None, description="Fecha de firma inicial (YYYY-MM-DD)"),
+    hasta: Optional[str] = Query(None, description="Fecha de firma final (YYYY-MM-DD)"),
+    top: int = Query(10, ge=1, le=50),
+    fuente: str = Query("auto", pattern="^(auto|espejo|upstream)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    KPIs, distribuciones (estados, modalidades, tiposContrato) y top proveedores ya agregados,
+    listos para el tablero y para /summary, en lugar de descargar los contratos al navegador.
+
+    fuente=auto usa el espejo local si el NIT tiene una sincronización exitosa y si no,
+    consultas SoQL agrupadas contra datos.gov.co.
+    """
+    if fuente == "auto":
+        fuente = "espejo" if await run_in_threadpool(espejo_sincronizado, db, nit) else "upstream"
+
+    if fuente == "espejo":
+        agregados = await run_in_threadpool(agregados_espejo, db, filtros_espejo(nit, desde, hasta), top)
+    else:
+        agregados = await agregados_upstream(nit, desde, hasta, top)
+
+    return {"nit": nit, "periodo": {"desde": desde, "hasta": hasta}, "fuente": fuente, **agregados}
+
+
 # ==== Resumen con IA ====
 
 class Periodo(BaseModel):
@@ -77,27 +362,32 @@ class ResumenRequest(BaseModel):
     notas: Optional[str] = None
 
 
-@router.post("/summary")
-async def resumen_con_ia(payload: ResumenRequest):
-    """Genera un resumen ejecutivo del módulo de contratación. Si hay OPENAI_API_KEY, usa IA; si no, devuelve un resumen heurístico.
+SYSTEM_PROMPT_RESUMEN = (
+    "Eres un analista de compras públicas. Redacta un resumen ejecutivo claro, en español, "
+    "con 2-3 párrafos y 3-5 bullet points de hallazgos y recomendaciones. Evita jerga innecesaria."
+)
+
+# Limita las llamadas simultáneas al LLM por proceso
+_ia_semaphore = asyncio.Semaphore(max(1, settings.openai_max_concurrency))
+_openai_client = None
+
+
+def get_openai_client():
+    """Cliente AsyncOpenAI compartido (import diferido: la librería es opcional)"""
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI  # type: ignore
+
+        _openai_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            timeout=settings.openai_timeout_seconds,
+        )
+    return _openai_client
 
-    Body esperado:
-    {
-      entity_name, nit, periodo: {desde, hasta},
-      kpis: { totalProcesos, totalAdjudicados, tasaAdjudicacion, sumaAdjudicado, promedioPrecioBase },
-      distribuciones: { estados: {...}, modalidades: {...}, tiposContrato: {...} },
-      top_proveedores: [{ nombre, valor }],
-      notas
-    }
-    """
-    # Si no hay datos
-    if payload.kpis.totalProcesos == 0:
-        return {
-            "configured": bool(settings.openai_api_key),
-            "summary": "No se encontraron procesos en el periodo seleccionado. Verifique el NIT y el rango de fechas."
-        }
 
-    # Resumen base heurístico
+def construir_resumen_base(payload: ResumenRequest) -> str:
+    """Resumen heurístico a partir de los KPIs (se usa sin IA y como contexto para la IA)"""
     k = payload.kpis
     periodo_txt = ""
     if payload.periodo and (payload.periodo.desde or payload.periodo.hasta):
@@ -123,6 +413,99 @@ async def resumen_con_ia(payload: ResumenRequest):
         top_estado = max(estados.items(), key=lambda x: x[1]) if estados else None
         if top_estado:
             base_summary += f" Estado más frecuente: {top_estado[0]} ({top_estado[1]} procesos)."
+    return base_summary
+
+
+def mensajes_resumen(payload: ResumenRequest, base_summary: str) -> List[Dict[str, str]]:
+    user_prompt = (
+        "Genera un informe ejecutivo de contratación pública con los siguientes datos en JSON. "
+        "Enfatiza tendencias, riesgos (p. ej. concentración de proveedores, procesos desiertos) y oportunidades.\n\n"
+        f"Datos: {payload.model_dump()}\n\n"
+        f"Resumen base: {base_summary}"
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_RESUMEN},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def clave_resumen(payload: ResumenRequest) -> str:
+    """Hash estable del payload de KPIs + modelo, usado como clave de caché"""
+    canonical = json.dumps(
+        {"modelo": settings.openai_model, "payload": payload.model_dump()},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def leer_resumen_cache(db: Session, clave: str) -> Optional[str]:
+    if settings.ai_summary_cache_ttl_seconds <= 0:
+        return None
+    row = db.query(ContratacionResumenIA).filter(
+        ContratacionResumenIA.clave == clave,
+        ContratacionResumenIA.expires_at > datetime.utcnow()
+    ).first()
+    return row.resumen if row else None
+
+
+def guardar_resumen_cache(db: Session, clave: str, resumen: str) -> None:
+    if settings.ai_summary_cache_ttl_seconds <= 0 or not resumen:
+        return
+    try:
+        row = db.query(ContratacionResumenIA).filter(ContratacionResumenIA.clave == clave).first()
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.ai_summary_cache_ttl_seconds)
+        if row:
+            row.resumen = resumen
+            row.modelo = settings.openai_model
+            row.created_at = datetime.utcnow()
+            row.expires_at = expires_at
+        else:
+            db.add(ContratacionResumenIA(
+                clave=clave, modelo=settings.openai_model, resumen=resumen, expires_at=expires_at
+            ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # La caché no debe interrumpir la respuesta
+        logger.warning("Error guardando resumen IA en caché: %s", e)
+
+
+def guardar_resumen_cache_sesion_propia(clave: str, resumen: str) -> None:
+    """Para el stream SSE: la sesión del request puede cerrarse antes de que termine"""
+    db = SessionLocal()
+    try:
+        guardar_resumen_cache(db, clave, resumen)
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/summary")
+async def resumen_con_ia(payload: ResumenRequest, db: Session = Depends(get_db)):
+    """Genera un resumen ejecutivo del módulo de contratación. Si hay OPENAI_API_KEY, usa IA; si no, devuelve un resumen heurístico.
+
+    Body esperado:
+    {
+      entity_name, nit, periodo: {desde, hasta},
+      kpis: { totalProcesos, totalAdjudicados, tasaAdjudicacion, sumaAdjudicado, promedioPrecioBase },
+      distribuciones: { estados: {...}, modalidades: {...}, tiposContrato: {...} },
+      top_proveedores: [{ nombre, valor }],
+      notas
+    }
+
+    Los resúmenes de IA se cachean por hash del payload (ver ai_summary_cache_ttl_seconds).
+    """
+    # Si no hay datos
+    if payload.kpis.totalProcesos == 0:
+        return {
+            "configured": bool(settings.openai_api_key),
+            "summary": "No se encontraron procesos en el periodo seleccionado. Verifique el NIT y el rango de fechas."
+        }
+
+    base_summary = construir_resumen_base(payload)
 
     # Si no hay API Key, devolver el heurístico
     if not settings.openai_api_key:
@@ -131,33 +514,24 @@ async def resumen_con_ia(payload: ResumenRequest):
             "summary": base_summary + " Nota: Para habilitar el resumen con IA, configure OPENAI_API_KEY en el backend."
         }
 
-    # Llamada a OpenAI (opcional) - manejo defensivo si la librería no está instalada
-    try:
-        from openai import OpenAI  # type: ignore
+    clave = clave_resumen(payload)
+    cached = await run_in_threadpool(leer_resumen_cache, db, clave)
+    if cached:
+        return {"configured": True, "summary": cached, "cached": True}
 
-        client = OpenAI(api_key=settings.openai_api_key)
-        system = (
-            "Eres un analista de compras públicas. Redacta un resumen ejecutivo claro, en español, "
-            "con 2-3 párrafos y 3-5 bullet points de hallazgos y recomendaciones. Evita jerga innecesaria."
-        )
-
-        user_prompt = (
-            "Genera un informe ejecutivo de contratación pública con los siguientes datos en JSON. "
-            "Enfatiza tendencias, riesgos (p. ej. concentración de proveedores, procesos desiertos) y oportunidades.\n\n"
-            f"Datos: {payload.model_dump()}\n\n"
-            f"Resumen base: {base_summary}"
-        )
-
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            max_tokens=500,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user_prompt}
-            ],
-        )
-        content = resp.choices[0].message.content if resp and resp.choices else base_summary
+    # Llamada asíncrona a OpenAI (no bloquea el event loop) - manejo defensivo si la librería no está instalada
+    try:
+        client = get_openai_client()
+        async with _ia_semaphore:
+            resp = await client.chat.completions.create(
+                model=settings.openai_model,
+                temperature=0.3,
+                max_tokens=500,
+                messages=mensajes_resumen(payload, base_summary),
+            )
+        content = resp.choices[0].message.content if resp and resp.choices else None
+        if content:
+            await run_in_threadpool(guardar_resumen_cache, db, clave, content)
         return {"configured": True, "summary": content or base_summary}
 
     except Exception as e:
@@ -166,3 +540,56 @@ async def resumen_con_ia(payload: ResumenRequest):
             "configured": True,
             "summary": base_summary + f" (Nota: IA no disponible temporalmente: {str(e)})"
         }
+
+
+@router.post("/summary/stream")
+async def resumen_con_ia_stream(payload: ResumenRequest, db: Session = Depends(get_db)):
+    """
+    Igual que /summary pero como Server-Sent Events: los tokens se envían a medida que llegan.
+    Eventos: `delta` ({"text": ...}), `done` ({"configured", "cached"}) y `error` ({"detail": ...}).
+    """
+    if payload.kpis.totalProcesos == 0 or not settings.openai_api_key:
+        respuesta = await resumen_con_ia(payload, db)
+
+        async def eventos_simples():
+            yield _sse("delta", {"text": respuesta["summary"]})
+            yield _sse("done", {"configured": respuesta["configured"], "cached": False})
+
+        return StreamingResponse(eventos_simples(), media_type="text/event-stream")
+
+    base_summary = construir_resumen_base(payload)
+    clave = clave_resumen(payload)
+    cached = await run_in_threadpool(leer_resumen_cache, db, clave)
+
+    async def eventos():
+        if cached:
+            yield _sse("delta", {"text": cached})
+            yield _sse("done", {"configured": True, "cached": True})
+            return
+        partes: List[str] = []
+        try:
+            client = get_openai_client()
+            async with _ia_semaphore:
+                stream = await client.chat.completions.create(
+                    model=settings.openai_model,
+                    temperature=0.3,
+                    max_tokens=500,
+                    messages=mensajes_resumen(payload, base_summary),
+                    stream=True,
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        partes.append(delta)
+                        yield _sse("delta", {"text": delta})
+        except Exception as e:
+            yield _sse("error", {"detail": f"IA no disponible temporalmente: {str(e)}", "summary": base_summary})
+            return
+        await run_in_threadpool(guardar_resumen_cache_sesion_propia, clave, "".join(partes))
+        yield _sse("done", {"configured": True, "cached": False})
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,78 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from app.config.database import get_db
+from sqlalchemy import func, case
+from typing import List, Optional
+from app.config.database import get_db, get_read_db
+from app.config.settings import settings
 from app.models.entity import Entity
 from app.models.user import User, UserRole
 from app.schemas.entity import EntityCreate, EntityUpdate, EntityResponse, EntityWithAdmin
 from app.utils.auth import require_superadmin, get_current_active_user
+from app.utils.entity_cache import entity_cache, etag_entidad
 
 router = APIRouter(prefix="/entities", tags=["Entidades"])
 
 
+def cabeceras_cache_publica(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Agrega ETag/Cache-Control a una respuesta pública.
+    Retorna un 304 si el cliente ya tiene esa versión (If-None-Match).
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.entity_http_max_age_seconds}",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    etags_cliente = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    if etag in etags_cliente or "*" in etags_cliente:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 @router.get("/by-slug/{slug}", response_model=EntityResponse)
-async def get_entity_by_slug(slug: str, db: Session = Depends(get_db)):
+async def get_entity_by_slug(
+    slug: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """
     Obtener entidad por slug (endpoint público).
     Usado para cargar información de la entidad en la ventanilla pública.
     """
-    entity = db.query(Entity).filter(
-        Entity.slug == slug,
-        Entity.is_active == True
-    ).first()
+    entity = entity_cache.get_by_slug(db, slug)
     
-    if not entity:
+    if not entity or not entity.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Entidad no encontrada o inactiva"
         )
-    return entity
+    no_modificado = cabeceras_cache_publica(request, response, etag_entidad(entity))
+    return no_modificado or entity
 
 
 @router.get("/", response_model=List[EntityWithAdmin])
 async def get_entities(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(require_superadmin)
 ):
     """
     Obtener todas las entidades (solo superadmin).
     Incluye conteo de administradores y usuarios por entidad.
+    Una sola consulta: entidades LEFT JOIN conteos de usuarios agrupados por entidad.
     """
-    entities = db.query(Entity).all()
-    
-    result = []
-    for entity in entities:
-        # Contar admins y usuarios de la entidad
-        admin_count = db.query(User).filter(
-            User.entity_id == entity.id,
-            User.role == UserRole.ADMIN
-        ).count()
-        
-        user_count = db.query(User).filter(
-            User.entity_id == entity.id
-        ).count()
-        
-        entity_dict = {
-            **entity.__dict__,
-            "admin_count": admin_count,
-            "user_count": user_count
-        }
-        result.append(entity_dict)
-    
-    return result
+    conteos = db.query(
+        User.entity_id.label("entity_id"),
+        func.count(User.id).label("user_count"),
+        func.count(case((User.role == UserRole.ADMIN, 1))).label("admin_count")
+    ).group_by(User.entity_id).subquery()
+
+    rows = db.query(
+        *Entity.__table__.columns,
+        func.coalesce(conteos.c.admin_count, 0).label("admin_count"),
+        func.coalesce(conteos.c.user_count, 0).label("user_count")
+    ).outerjoin(conteos, conteos.c.entity_id == Entity.id).order_by(Entity.id).all()
+
+    return [dict(row._mapping) for row in rows]
 
 
 @router.get("/public", response_model=List[EntityResponse])
 async def get_public_entities(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Listar entidades activas (público).
     Usado por el guard de entidad por defecto para seleccionar un slug inicial.
     """
-    entities = db.query(Entity).filter(Entity.is_active == True).all()
-    return entities
+    entities, etag = entity_cache.get_public(db)
+    no_modificado = cabeceras_cache_publica(request, response, etag)
+    return no_modificado or entities
 
 
 @router.get("/{entity_id}", response_model=EntityResponse)
@@ -130,6 +147,7 @@ async def create_entity(
     db.add(db_entity)
     db.commit()
     db.refresh(db_entity)
+    entity_cache.invalidate()
     
     return db_entity
 
@@ -183,6 +201,7 @@ async def update_entity(
     
     db.commit()
     db.refresh(entity)
+    entity_cache.invalidate()
     
     return entity
 
@@ -209,6 +228,7 @@ async def delete_entity(
     
     db.delete(entity)
     db.commit()
+    entity_cache.invalidate()
     
     return {
         "message": "Entidad eliminada exitosamente",
@@ -245,6 +265,7 @@ async def toggle_entity_status(
     
     db.commit()
     db.refresh(entity)
+    entity_cache.invalidate()
     
     return entity
 
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.pool import NullPool
+from app.config.database import engine
+from app.config.settings import settings
+from app.utils.db_metrics import pool_metrics
+from app.utils.replica import estado_replica
+from app.utils.auth import require_superadmin
+from app.models.user import User
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/db-pool")
+async def db_pool_metrics(current_user: User = Depends(require_superadmin)):
+    """Uso del pool de conexiones: en uso, overflow, timeouts y espera por checkout"""
+    return {
+        "mode": "pgbouncer" if isinstance(engine.pool, NullPool) else "pool",
+        "preset": settings.db_pool_preset_efectivo,
+        "config": settings.db_pool_config,
+        **pool_metrics.snapshot(engine.pool),
+    }
+
+
+@router.get("/read-replica")
+async def read_replica_metrics(current_user: User = Depends(require_superadmin)):
+    """Retraso medido de la réplica de lectura y lecturas servidas por réplica/principal"""
+    return estado_replica.snapshot()
+
+
+@router.get("/queries")
+async def query_profiler_report(
+    top: int = Query(20, ge=1, le=200),
+    orden: str = Query("total_ms", pattern="^(total_ms|count|max_ms|n_plus_one|slow)$"),
+    current_user: User = Depends(require_superadmin),
+):
+    """Sentencias con más tiempo total (o conteo, máximo, N+1) según el detector de consultas"""
+    if not settings.query_profiler_enabled:
+        raise HTTPException(status_code=404, detail="Detector de consultas deshabilitado (QUERY_PROFILER_ENABLED)")
+    from app.utils.query_profiler import reporte_consultas
+    return reporte_consultas.top(top, orden)
+
+
+@router.delete("/queries")
+async def reset_query_profiler(current_user: User = Depends(require_superadmin)):
+    """Reinicia el acumulado del detector de consultas"""
+    if not settings.query_profiler_enabled:
+        raise HTTPException(status_code=404, detail="Detector de consultas deshabilitado (QUERY_PROFILER_ENABLED)")
+    from app.utils.query_profiler import reporte_consultas
+    reporte_consultas.reset()
+    return {"message": "Reporte de consultas reiniciado"}
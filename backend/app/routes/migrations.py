@@ -9,25 +9,40 @@ Este módulo ejecuta una migración completa idempotente que:
 4. Crea índices para optimizar queries
 5. Mantiene integridad referencial con claves foráneas
 
+Cada paso tiene una versión; los pasos ya aplicados quedan en la tabla migration_ledger y
+se omiten en las siguientes corridas. La corrida se ejecuta en segundo plano y su avance
+(log y duración por paso) se guarda en migration_runs, visible desde cualquier worker.
+
 Endpoints:
-- POST /api/migrations/run/status - Ejecuta migración completa (requiere X-Migration-Key)
+- POST /api/migrations/run/status - Inicia la migración (requiere X-Migration-Key; ?force=true, ?wait=true)
+- GET /api/migrations/runs - Últimas corridas y ledger de pasos aplicados
+- GET /api/migrations/runs/{run_id} - Avance, log y duración por paso de una corrida
 - GET /api/migrations/status - Verifica estado de la BD (público para debugging)
+- GET /api/migrations/indexes/report - Índices faltantes y sin uso (requiere X-Migration-Key)
 
 Uso:
   curl -X POST https://pqrs-backend.onrender.com/api/migrations/run/status \
        -H "X-Migration-Key: tu-clave-secreta-2024"
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text, inspect
-from app.config.database import get_db, engine, Base
+from sqlalchemy.exc import IntegrityError, OperationalError
+from starlette.concurrency import run_in_threadpool
+from app.config.database import get_db, engine, Base, SessionLocal
 from app.config.settings import settings
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
+import logging
+import threading
+import time
 import traceback
+import uuid
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Estado global de migraciones
 migration_state = {
@@ -43,7 +58,7 @@ def log_msg(message: str, is_error: bool = False):
     """Registra un mensaje en el log de migraciones"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] {message}"
-    print(log_entry)
+    logger.log(logging.ERROR if is_error else logging.INFO, message)
     
     migration_state["logs"].append(log_entry)
     if is_error:
@@ -54,18 +69,32 @@ def log_msg(message: str, is_error: bool = False):
         migration_state["logs"] = migration_state["logs"][-200:]
 
 
+# Inspector compartido por la corrida del runner (solo en su hilo); fuera de ella, uno nuevo por llamada
+_run_local = threading.local()
+
+
+def get_inspector():
+    inspector = getattr(_run_local, "inspector", None)
+    return inspector if inspector is not None else inspect(engine)
+
+
+def refresh_inspector():
+    """Descarta la reflexión cacheada tras un cambio de DDL"""
+    inspector = getattr(_run_local, "inspector", None)
+    if inspector is not None:
+        inspector.clear_cache()
+
+
 def table_exists(table_name: str) -> bool:
     """Verifica si una tabla existe en la base de datos"""
-    inspector = inspect(engine)
-    return inspector.has_table(table_name)
+    return get_inspector().has_table(table_name)
 
 
 def column_exists(table_name: str, column_name: str) -> bool:
     """Verifica si una columna existe en una tabla"""
     if not table_exists(table_name):
         return False
-    inspector = inspect(engine)
-    columns = [col["name"] for col in inspector.get_columns(table_name)]
+    columns = [col["name"] for col in get_inspector().get_columns(table_name)]
     return column_name in columns
 
 
@@ -88,13 +117,15 @@ def get_column_type(table_name: str, column_name: str, db: Session) -> Optional[
 
 def drop_enum_type_safe(db: Session, enum_name: str) -> bool:
     """Elimina un tipo ENUM de forma segura si existe"""
+    if engine.dialect.name != "postgresql":
+        return True  # Solo PostgreSQL tiene tipos ENUM
     try:
         db.execute(text(f"DROP TYPE IF EXISTS {enum_name} CASCADE"))
         db.commit()
         log_msg(f"✓ Tipo ENUM '{enum_name}' eliminado")
         return True
     except Exception as e:
-        log_msg(f"⚠ No se pudo eliminar ENUM '{enum_name}': {str(e)}")
+        log_msg(f"❌ No se pudo eliminar ENUM '{enum_name}': {str(e)}", is_error=True)
         db.rollback()
         return False
 
@@ -118,13 +149,28 @@ def convert_enum_to_text(
             log_msg(f"Convirtiendo {table_name}.{column_name} de ENUM a TEXT...")
             
             # Crear columna temporal
+            set_lock_timeout(db)
             db.execute(text(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {column_name}_temp TEXT"))
+            db.commit()
             
-            # Copiar valores normalizados
+            # Copiar valores normalizados por lotes de id (reanudable)
+            backfill_in_batches(
+                db, f"enum_text:{table_name}.{column_name}", table_name, f"""
+                    UPDATE {table_name} 
+                    SET {column_name}_temp = LOWER({column_name}::text)
+                    WHERE {column_name}_temp IS NULL AND {column_name} IS NOT NULL
+                    AND id >= :inicio AND id < :fin
+                """,
+            )
+            
+            # Cambio final en una transacción corta con la tabla bloqueada: se vuelven a copiar
+            # las filas nuevas y las modificadas después de copiar su lote, y se hace el swap
+            set_lock_timeout(db)
+            db.execute(text(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE"))
             db.execute(text(f"""
                 UPDATE {table_name} 
                 SET {column_name}_temp = LOWER({column_name}::text)
-                WHERE {column_name}_temp IS NULL
+                WHERE {column_name}_temp IS DISTINCT FROM LOWER({column_name}::text)
             """))
             
             # Eliminar columna original
@@ -135,6 +181,8 @@ def convert_enum_to_text(
             
             # Agregar NOT NULL si es requerido explícitamente y no hay NULLs
             if set_not_null:
+                # Savepoint: si falla el NOT NULL no se pierde el cambio de columnas de la transacción
+                savepoint = db.begin_nested()
                 try:
                     # Verificar si hay NULLs antes de forzar NOT NULL
                     nulls = db.execute(text(
@@ -148,14 +196,17 @@ def convert_enum_to_text(
                         log_msg(
                             f"⚠ No se aplica NOT NULL a {table_name}.{column_name} porque existen {nulls} valores NULL"
                         )
+                    savepoint.commit()
                 except Exception as e:
-                    log_msg(f"⚠ No se pudo aplicar NOT NULL a {table_name}.{column_name}: {str(e)}")
+                    savepoint.rollback()
+                    log_msg(f"❌ No se pudo aplicar NOT NULL a {table_name}.{column_name}: {str(e)}", is_error=True)
             
             # Agregar default si se especifica
             if default_value:
                 db.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} SET DEFAULT '{default_value}'"))
             
             db.commit()
+            refresh_inspector()
             log_msg(f"✓ {table_name}.{column_name} convertido a TEXT")
             return True
         else:
@@ -173,8 +224,10 @@ def ensure_column(db: Session, table_name: str, column_name: str, column_type: s
     try:
         if not column_exists(table_name, column_name):
             log_msg(f"Agregando columna {column_name} a {table_name}...")
+            set_lock_timeout(db)
             db.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
             db.commit()
+            refresh_inspector()
             log_msg(f"✓ Columna {column_name} agregada a {table_name}")
             return True
         return True
@@ -191,11 +244,120 @@ def create_index_safe(db: Session, index_name: str, table_name: str, columns: st
         db.commit()
         return True
     except Exception as e:
-        log_msg(f"⚠ Índice {index_name}: {str(e)}")
+        log_msg(f"❌ Índice {index_name}: {str(e)}", is_error=True)
         db.rollback()
         return False
 
 
+def set_lock_timeout(db: Session, lock_timeout_ms: Optional[int] = None) -> None:
+    """
+    PostgreSQL: limita la espera por locks en la transacción actual. Un DDL o lote encolado
+    detrás de una transacción larga bloquearía a su vez todo el tráfico que llega después.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    ms = settings.migration_lock_timeout_ms if lock_timeout_ms is None else lock_timeout_ms
+    db.execute(text(f"SET LOCAL lock_timeout = '{int(ms)}ms'"))
+
+
+def _es_lock_timeout(error: Exception) -> bool:
+    # 55P03 = lock_not_available (lock_timeout alcanzado)
+    return getattr(getattr(error, "orig", None), "pgcode", None) == "55P03"
+
+
+def _guardar_checkpoint(db: Session, nombre: str, last_pk: int, rows_done: int, completado: bool = False) -> None:
+    db.execute(text("DELETE FROM migration_backfills WHERE name = :name"), {"name": nombre})
+    db.execute(
+        text("INSERT INTO migration_backfills (name, last_pk, rows_done, updated_at, completed_at) "
+             "VALUES (:name, :last_pk, :rows_done, :ahora, :completado)"),
+        {"name": nombre, "last_pk": last_pk, "rows_done": rows_done,
+         "ahora": datetime.utcnow(), "completado": datetime.utcnow() if completado else None},
+    )
+
+
+def backfill_in_batches(
+    db: Session,
+    nombre: str,
+    tabla: str,
+    sql: str,
+    pk: str = "id",
+    batch_size: Optional[int] = None,
+    sleep_ms: Optional[int] = None,
+    lock_timeout_ms: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Ejecuta `sql` por rangos de la PK entera de `tabla`, un lote y un commit a la vez.
+
+    `sql` debe acotar sus filas con `:inicio <= pk < :fin` y ser idempotente (p. ej. `... IS NULL`).
+    El último PK procesado queda en migration_backfills bajo `nombre`: una corrida interrumpida
+    continúa desde ahí, y una posterior solo recorre las filas nuevas. Cada lote corre con
+    lock_timeout (PostgreSQL) y se reintenta con espera creciente si no consigue el lock.
+    Retorna las filas afectadas en esta corrida.
+    """
+    ensure_migration_tables()
+    batch_size = batch_size or settings.migration_backfill_batch_size
+    pausa = (settings.migration_backfill_sleep_ms if sleep_ms is None else sleep_ms) / 1000
+    max_retries = settings.migration_backfill_max_retries if max_retries is None else max_retries
+
+    minimo, maximo = db.execute(text(f"SELECT MIN({pk}), MAX({pk}) FROM {tabla}")).first()
+    checkpoint = db.execute(
+        text("SELECT last_pk, rows_done FROM migration_backfills WHERE name = :name"), {"name": nombre}
+    ).first()
+    db.commit()
+    if maximo is None:
+        return 0
+
+    inicio = minimo
+    total = 0
+    if checkpoint is not None and checkpoint[0] is not None:
+        inicio = max(minimo, checkpoint[0] + 1)
+        total = checkpoint[1] or 0
+        if inicio <= maximo:
+            log_msg(f"↻ Backfill {nombre}: continuando desde {tabla}.{pk} = {inicio}")
+
+    afectadas_corrida = 0
+    lotes = 0
+    while inicio <= maximo:
+        fin = inicio + batch_size
+        intentos = 0
+        while True:
+            try:
+                set_lock_timeout(db, lock_timeout_ms)
+                afectadas = db.execute(text(sql), {**(params or {}), "inicio": inicio, "fin": fin}).rowcount or 0
+                _guardar_checkpoint(db, nombre, fin - 1, total + afectadas)
+                db.commit()
+                break
+            except OperationalError as e:
+                db.rollback()
+                intentos += 1
+                if not _es_lock_timeout(e) or intentos > max_retries:
+                    raise
+                log_msg(f"⚠ Backfill {nombre}: lock timeout en {pk} {inicio}-{fin - 1}, reintento {intentos}/{max_retries}")
+                time.sleep(max(pausa, 0.1) * 2 ** intentos)
+        total += afectadas
+        afectadas_corrida += afectadas
+        lotes += 1
+        inicio = fin
+        if pausa and inicio <= maximo:
+            time.sleep(pausa)
+
+    _guardar_checkpoint(db, nombre, maximo, total, completado=True)
+    db.commit()
+    log_msg(f"✓ Backfill {nombre}: {afectadas_corrida} filas en {lotes} lotes de {batch_size}")
+    return afectadas_corrida
+
+
+def backfill_pendiente(db: Session, nombre: str) -> bool:
+    """True si el backfill empezó y no terminó (checkpoint sin completed_at)"""
+    ensure_migration_tables()
+    row = db.execute(
+        text("SELECT completed_at FROM migration_backfills WHERE name = :name"), {"name": nombre}
+    ).first()
+    return row is not None and row[0] is None
+
+
 # ============================================================================
 # MIGRACIONES POR MÓDULO
 # ============================================================================
@@ -293,7 +455,7 @@ def migrate_users(db: Session) -> List[str]:
         db.commit()
         results.append("✓ Normalizados users.role y users.user_type a minúsculas")
     except Exception as e:
-        log_msg(f"⚠ No se pudo normalizar roles a minúsculas: {str(e)}")
+        log_msg(f"❌ No se pudo normalizar roles a minúsculas: {str(e)}", is_error=True)
         db.rollback()
 
     # Índices
@@ -301,6 +463,7 @@ def migrate_users(db: Session) -> List[str]:
     create_index_safe(db, "idx_users_email", "users", "email")
     create_index_safe(db, "idx_users_entity", "users", "entity_id")
     create_index_safe(db, "idx_users_role", "users", "role")
+    create_index_safe(db, "idx_users_entity_role", "users", "entity_id, role")
     
     # Eliminar tipos ENUM
     drop_enum_type_safe(db, "userrole")
@@ -904,6 +1067,7 @@ def migrate_pdm(db: Session) -> List[str]:
                 )
             """))
             db.commit()
+            refresh_inspector()
             results.append("✓ Tabla pdm_actividades_ejecuciones creada")
         except Exception as e:
             log_msg(f"❌ Error creando pdm_actividades_ejecuciones: {str(e)}", is_error=True)
@@ -937,6 +1101,7 @@ def migrate_pdm(db: Session) -> List[str]:
                 )
             """))
             db.commit()
+            refresh_inspector()
             results.append("✓ Tabla pdm_actividades_evidencias creada")
         except Exception as e:
             log_msg(f"❌ Error creando pdm_actividades_evidencias: {str(e)}", is_error=True)
@@ -947,8 +1112,21 @@ def migrate_pdm(db: Session) -> List[str]:
         try:
             has_ejec = column_exists("pdm_actividades_evidencias", "ejecucion_id")
             has_act = column_exists("pdm_actividades_evidencias", "actividad_id")
-            if not has_ejec:
-                log_msg("Detectado esquema legado de evidencias (sin ejecucion_id). Migrando estructura...")
+            # Una corrida interrumpida ya dejó la columna: se retoma mientras falten backfills o la FK
+            has_fk = has_ejec and any(
+                fk["constrained_columns"] == ["ejecucion_id"]
+                for fk in get_inspector().get_foreign_keys("pdm_actividades_evidencias")
+            )
+            reanudar = has_ejec and (
+                not has_fk
+                or backfill_pendiente(db, "pdm:ejecuciones_placeholder")
+                or backfill_pendiente(db, "pdm:evidencias_ejecucion_id")
+            )
+            if not has_ejec or reanudar:
+                if reanudar:
+                    log_msg("↻ Retomando migración de estructura de evidencias (ejecucion_id)...")
+                else:
+                    log_msg("Detectado esquema legado de evidencias (sin ejecucion_id). Migrando estructura...")
                 # 1) Agregar columna ejecucion_id (nullable inicialmente)
                 db.execute(text(
                     "ALTER TABLE pdm_actividades_evidencias ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER"
@@ -977,29 +1155,29 @@ def migrate_pdm(db: Session) -> List[str]:
                     """))
                     db.commit()
 
-                # 3) Crear ejecuciones placeholder por actividad si no existen
+                # 3) Crear ejecuciones placeholder por actividad si no existen (por lotes de actividades)
                 log_msg("Creando ejecuciones placeholder por actividad (si faltan)...")
-                db.execute(text("""
+                backfill_in_batches(db, "pdm:ejecuciones_placeholder", "pdm_actividades", """
                     INSERT INTO pdm_actividades_ejecuciones (actividad_id, entity_id, valor_ejecutado_incremento, descripcion, registrado_por, created_at, updated_at)
                     SELECT a.id, a.entity_id, 0, 'Migración automática - placeholder', 'Sistema', NOW(), NOW()
                     FROM pdm_actividades a
-                    WHERE NOT EXISTS (
+                    WHERE a.id >= :inicio AND a.id < :fin
+                    AND NOT EXISTS (
                         SELECT 1 FROM pdm_actividades_ejecuciones e WHERE e.actividad_id = a.id
                     )
-                """))
-                db.commit()
+                """)
 
                 # 4) Rellenar ejecucion_id de evidencias basándose en actividad_id (si existe)
                 if has_act:
                     log_msg("Asignando ejecucion_id en evidencias basándose en actividad_id...")
-                    db.execute(text("""
+                    backfill_in_batches(db, "pdm:evidencias_ejecucion_id", "pdm_actividades_evidencias", """
                         UPDATE pdm_actividades_evidencias ev
                         SET ejecucion_id = e.id
                         FROM pdm_actividades_ejecuciones e
                         WHERE e.actividad_id = ev.actividad_id
                         AND (ev.ejecucion_id IS NULL)
-                    """))
-                    db.commit()
+                        AND ev.id >= :inicio AND ev.id < :fin
+                    """)
 
                 # 5) Crear FK y NOT NULL si es posible (solo si no hay NULLs)
                 nulls = db.execute(text(
@@ -1008,6 +1186,7 @@ def migrate_pdm(db: Session) -> List[str]:
                 if nulls == 0:
                     log_msg("Aplicando NOT NULL y FK a ejecucion_id en evidencias...")
                     try:
+                        set_lock_timeout(db)
                         db.execute(text(
                             "ALTER TABLE pdm_actividades_evidencias ALTER COLUMN ejecucion_id SET NOT NULL"
                         ))
@@ -1016,13 +1195,14 @@ def migrate_pdm(db: Session) -> List[str]:
                         ))
                         db.commit()
                     except Exception as e:
-                        log_msg(f"⚠ No se pudo aplicar NOT NULL/FK en ejecucion_id: {str(e)}")
+                        log_msg(f"❌ No se pudo aplicar NOT NULL/FK en ejecucion_id: {str(e)}", is_error=True)
                         db.rollback()
                 else:
                     log_msg(f"⚠ ejecucion_id tiene {nulls} filas NULL; se mantendrá nullable por ahora")
         except Exception as e:
-            log_msg(f"⚠ Error migrando estructura de evidencias PDM: {str(e)}")
+            log_msg(f"❌ Error migrando estructura de evidencias PDM: {str(e)}", is_error=True)
             db.rollback()
+        refresh_inspector()
     
     # Índices (solo si existe la columna)
     if column_exists("pdm_actividades_evidencias", "ejecucion_id"):
@@ -1033,132 +1213,544 @@ def migrate_pdm(db: Session) -> List[str]:
     return results
 
 
-# ============================================================================
-# ENDPOINT PRINCIPAL
-# ============================================================================
+def migrate_secretaria_fk(db: Session) -> List[str]:
+    """
+    Vincula los nombres de secretaría en texto con secretarias.id:
+    users.secretaria_id, actividades.responsable_secretaria_id y pdm_meta_assignments.secretaria_id.
+    El texto se conserva (compatibilidad); solo se completan los ids faltantes.
+    """
+    from app.utils.secretarias import resolver_secretaria_id
 
-@router.post("/migrations/run/status")
-async def run_complete_migration(
-    db: Session = Depends(get_db),
-    x_migration_key: Optional[str] = Header(None)
-):
+    results = []
+    fk_type = "INTEGER REFERENCES secretarias(id) ON DELETE SET NULL"
+    columnas = [
+        ("users", "secretaria_id", "idx_users_secretaria_id"),
+        ("actividades", "responsable_secretaria_id", "idx_actividades_responsable_secretaria"),
+        ("pdm_meta_assignments", "secretaria_id", "idx_pdm_assignment_secretaria"),
+    ]
+    for tabla, columna, indice in columnas:
+        if not table_exists(tabla):
+            continue
+        ensure_column(db, tabla, columna, fk_type)
+        create_index_safe(db, indice, tabla, columna)
+
+    # 1. Toda secretaría usada por usuarios debe existir (como ya hacen create_user/update_user)
+    try:
+        pendientes = db.execute(text("""
+            SELECT DISTINCT entity_id, TRIM(secretaria) FROM users
+            WHERE secretaria_id IS NULL AND entity_id IS NOT NULL
+              AND secretaria IS NOT NULL AND TRIM(secretaria) <> ''
+        """)).fetchall()
+        for entity_id, nombre in pendientes:
+            resolver_secretaria_id(db, entity_id, nombre, crear=True)
+        db.commit()
+        if pendientes:
+            results.append(f"✓ Secretarías verificadas/creadas desde usuarios: {len(pendientes)}")
+    except Exception as e:
+        log_msg(f"❌ Error creando secretarías desde usuarios: {str(e)}", is_error=True)
+        db.rollback()
+
+    # 2. Backfill de ids por lotes de PK (coincidencia sin distinguir mayúsculas)
+    backfills = {
+        "users": """
+            UPDATE users SET secretaria_id = (
+                SELECT s.id FROM secretarias s
+                WHERE s.entity_id = users.entity_id
+                  AND LOWER(s.nombre) = LOWER(TRIM(users.secretaria))
+                ORDER BY s.id LIMIT 1
+            )
+            WHERE secretaria_id IS NULL AND entity_id IS NOT NULL AND secretaria IS NOT NULL
+              AND id >= :inicio AND id < :fin
+        """,
+        "actividades": """
+            UPDATE actividades SET responsable_secretaria_id = (
+                SELECT s.id FROM secretarias s
+                JOIN componentes_procesos c ON c.id = actividades.componente_id
+                JOIN planes_institucionales p ON p.id = c.plan_id
+                WHERE s.entity_id = p.entity_id
+                  AND LOWER(s.nombre) = LOWER(TRIM(actividades.responsable))
+                ORDER BY s.id LIMIT 1
+            )
+            WHERE responsable_secretaria_id IS NULL AND responsable IS NOT NULL
+              AND id >= :inicio AND id < :fin
+        """,
+        "pdm_meta_assignments": """
+            UPDATE pdm_meta_assignments SET secretaria_id = (
+                SELECT s.id FROM secretarias s
+                WHERE s.entity_id = pdm_meta_assignments.entity_id
+                  AND LOWER(s.nombre) = LOWER(TRIM(pdm_meta_assignments.secretaria))
+                ORDER BY s.id LIMIT 1
+            )
+            WHERE secretaria_id IS NULL AND secretaria IS NOT NULL
+              AND id >= :inicio AND id < :fin
+        """,
+    }
+    for tabla, sql in backfills.items():
+        if not table_exists(tabla):
+            continue
+        try:
+            backfill_in_batches(db, f"secretaria_fk:{tabla}", tabla, sql)
+            results.append(f"✓ {tabla}: ids de secretaría completados")
+        except Exception as e:
+            log_msg(f"❌ Error completando secretaría en {tabla}: {str(e)}", is_error=True)
+            db.rollback()
+
+    results.append("✓ Migración de FKs de secretaría completada")
+    return results
+
+
+# Índices que siguen la forma de las consultas de cada ruta (igualdad primero, luego orden).
+# (nombre, tabla, columnas, condición parcial, consulta que lo usa)
+INDICES_CONSULTAS = [
+    ("idx_pqrs_entity_created", "pqrs", "entity_id, created_at DESC", None,
+     "GET /pqrs (admin): entity_id = ? ORDER BY created_at DESC"),
+    ("idx_pqrs_entity_estado_created", "pqrs", "entity_id, estado, created_at DESC", None,
+     "GET /pqrs?estado= (admin)"),
+    ("idx_pqrs_assigned_created", "pqrs", "assigned_to_id, created_at DESC", "assigned_to_id IS NOT NULL",
+     "GET /pqrs (secretario / assigned_to_me)"),
+    ("idx_pqrs_created_by_created", "pqrs", "created_by_id, created_at DESC", None,
+     "GET /pqrs (ciudadano): created_by_id = ?"),
+    ("idx_pqrs_cedula_ciudadano", "pqrs", "cedula_ciudadano", "cedula_ciudadano IS NOT NULL",
+     "GET /pqrs (ciudadano): OR cedula_ciudadano = ?"),
+    ("idx_pqrs_email_ciudadano", "pqrs", "email_ciudadano", "email_ciudadano IS NOT NULL",
+     "GET /pqrs (ciudadano): OR email_ciudadano = ?"),
+    ("idx_users_entity_role", "users", "entity_id, role", None,
+     "GET /users, admins de la entidad al radicar PQRS"),
+    ("idx_secretarias_entity_nombre", "secretarias", "entity_id, nombre", None,
+     "GET /secretarias: entity_id = ? ORDER BY nombre"),
+    ("idx_alerts_recipient_unread", "alerts", "recipient_user_id, created_at DESC", "read_at IS NULL",
+     "GET /alerts?only_unread, conteo de no leídas"),
+    ("idx_pdm_actividad_entity_codigo", "pdm_actividades", "entity_id, codigo_indicador_producto, created_at DESC", None,
+     "GET /pdm/{slug}/actividades/{codigo} y carga por lote de códigos"),
+    ("idx_pdm_avance_entity_codigo", "pdm_avances", "entity_id, codigo_indicador_producto", None,
+     "GET /pdm/{slug}/avances/{codigo}"),
+    ("idx_pdm_meta_entity_codigo", "pdm_meta_assignments", "entity_id, codigo_indicador_producto", None,
+     "Asignación de metas por entidad y código"),
+    ("idx_pdm_ejecucion_actividad_created", "pdm_actividades_ejecuciones", "actividad_id, created_at DESC", None,
+     "Historial de ejecuciones de una actividad"),
+]
+
+
+def create_index_concurrently(index_name: str, table_name: str, columns: str, where: Optional[str] = None) -> bool:
     """
-    Ejecuta la migración completa de la base de datos.
-    
-    Requiere header: X-Migration-Key: tu-clave-secreta-2024
-    
-    Esta migración es idempotente y puede ejecutarse múltiples veces sin problemas.
+    Crea un índice sin bloquear escrituras: CREATE INDEX CONCURRENTLY en PostgreSQL
+    (fuera de transacción, en autocommit). En otros motores, CREATE INDEX normal.
+    Un índice INVALID de un intento anterior interrumpido se elimina y se reconstruye.
     """
-    # Validar clave de seguridad
-    if not x_migration_key or x_migration_key != settings.migration_secret_key:
-        raise HTTPException(
-            status_code=403,
-            detail="❌ Clave de migración inválida. Usa X-Migration-Key header."
+    condicion = f" WHERE {where}" if where else ""
+    try:
+        if engine.dialect.name != "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}({columns}){condicion}"))
+            return True
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            invalido = conn.execute(text("""
+                SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = :nombre AND NOT i.indisvalid
+            """), {"nombre": index_name}).first()
+            if invalido:
+                log_msg(f"⚠ Índice {index_name} inválido, reconstruyendo...")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name}({columns}){condicion}"
+            ))
+        return True
+    except Exception as e:
+        log_msg(f"❌ Índice {index_name}: {str(e)}", is_error=True)
+        return False
+
+
+def migrate_query_indexes(db: Session) -> List[str]:
+    """Índices compuestos y parciales de INDICES_CONSULTAS (idempotente)"""
+    results = []
+    creados = 0
+    for nombre, tabla, columnas, where, _ in INDICES_CONSULTAS:
+        if not table_exists(tabla):
+            continue
+        if create_index_concurrently(nombre, tabla, columnas, where):
+            creados += 1
+    results.append(f"✓ Índices de consultas verificados: {creados}/{len(INDICES_CONSULTAS)}")
+    return results
+
+
+def reporte_indices(db: Session) -> Dict[str, Any]:
+    """
+    Índices esperados que faltan y, en PostgreSQL, índices sin uso (pg_stat_user_indexes.idx_scan = 0,
+    excluyendo únicos/PK) y tablas con más lecturas secuenciales que por índice.
+    Los contadores son acumulados desde el último reinicio de estadísticas.
+    """
+    inspector = inspect(engine)
+    existentes: Dict[str, set] = {}
+    faltantes = []
+    for nombre, tabla, columnas, where, consulta in INDICES_CONSULTAS:
+        if tabla not in existentes:
+            existentes[tabla] = (
+                {ix["name"] for ix in inspector.get_indexes(tabla)} if inspector.has_table(tabla) else set()
+            )
+        if nombre not in existentes[tabla]:
+            faltantes.append({"index": nombre, "table": tabla, "columns": columnas, "where": where, "query": consulta})
+
+    reporte: Dict[str, Any] = {
+        "dialect": engine.dialect.name,
+        "expected": len(INDICES_CONSULTAS),
+        "missing": faltantes,
+    }
+    if engine.dialect.name != "postgresql":
+        reporte["unused"] = None
+        reporte["seq_scan_heavy"] = None
+        return reporte
+
+    sin_uso = db.execute(text("""
+        SELECT s.relname, s.indexrelname, s.idx_scan, pg_relation_size(s.indexrelid)
+        FROM pg_stat_user_indexes s
+        JOIN pg_index i ON i.indexrelid = s.indexrelid
+        WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary
+        ORDER BY pg_relation_size(s.indexrelid) DESC
+    """)).fetchall()
+    secuenciales = db.execute(text("""
+        SELECT relname, seq_scan, seq_tup_read, COALESCE(idx_scan, 0), n_live_tup
+        FROM pg_stat_user_tables
+        WHERE seq_scan > COALESCE(idx_scan, 0) AND n_live_tup > 1000
+        ORDER BY seq_tup_read DESC
+        LIMIT 20
+    """)).fetchall()
+    reporte["unused"] = [
+        {"table": t, "index": ix, "idx_scan": scans, "size_bytes": size}
+        for t, ix, scans, size in sin_uso
+    ]
+    reporte["seq_scan_heavy"] = [
+        {"table": t, "seq_scan": seq, "seq_tup_read": tup, "idx_scan": idx, "live_rows": vivas}
+        for t, seq, tup, idx, vivas in secuenciales
+    ]
+    return reporte
+
+
+def migrate_base_tables(db: Session) -> List[str]:
+    """Estructura base con SQLAlchemy ORM"""
+    try:
+        Base.metadata.create_all(bind=engine)
+        refresh_inspector()
+        log_msg("✓ Tablas base creadas correctamente")
+        return ["✓ Tablas base creadas/verificadas con SQLAlchemy"]
+    except Exception as e:
+        log_msg(f"❌ Error creando tablas base: {str(e)}", is_error=True)
+        return [f"❌ Error en tablas base: {str(e)}"]
+
+
+def _version_tablas_base() -> str:
+    # create_all vuelve a correr cuando cambian los modelos
+    from app.utils.schema import huella_esquema
+    return huella_esquema()
+
+
+# Pasos en orden: (paso, versión, descripción, función).
+# Subir la versión de un paso cuando cambie su código para que vuelva a aplicarse.
+MIGRATION_STEPS = [
+    ("base_tables", _version_tablas_base, "Creando tablas base con SQLAlchemy ORM", migrate_base_tables),
+    ("entities", "1", "Migrando tabla entities", migrate_entities),
+    ("users", "1", "Migrando tabla users", migrate_users),
+    ("secretarias", "1", "Migrando tabla secretarias", migrate_secretarias),
+    ("pqrs", "1", "Migrando tabla pqrs", migrate_pqrs),
+    ("alerts", "1", "Migrando tabla alerts", migrate_alerts),
+    ("planes_institucionales", "1", "Migrando módulo Planes Institucionales", migrate_planes_institucionales),
+    ("pdm", "1", "Migrando módulo PDM", migrate_pdm),
+    ("secretaria_fk", "1", "Vinculando secretarías (FK)", migrate_secretaria_fk),
+    ("query_indexes", "1", "Creando índices de consultas", migrate_query_indexes),
+]
+
+# Una corrida "running" más antigua que esto se considera abandonada (worker reiniciado)
+RUN_STALE_AFTER = timedelta(hours=2)
+
+
+def ensure_migration_tables() -> None:
+    """Ledger de pasos, bitácora de corridas y checkpoints de backfills (fuera de Base: deben existir antes del paso 1)"""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS migration_ledger (
+                step VARCHAR(100) PRIMARY KEY,
+                version VARCHAR(64) NOT NULL,
+                applied_at TIMESTAMP,
+                duration_ms INTEGER
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS migration_backfills (
+                name VARCHAR(150) PRIMARY KEY,
+                last_pk BIGINT,
+                rows_done BIGINT,
+                updated_at TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS migration_runs (
+                id VARCHAR(32) PRIMARY KEY,
+                status VARCHAR(20) NOT NULL,
+                force BOOLEAN NOT NULL DEFAULT FALSE,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                current_step VARCHAR(100),
+                steps TEXT,
+                logs TEXT,
+                errors TEXT
+            )
+        """))
+        # A lo sumo una corrida 'running': dos workers no pueden iniciar a la vez (ver create_run)
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_migration_runs_running ON migration_runs (status) "
+            "WHERE status = 'running'"
+        ))
+
+
+def applied_steps(db: Session) -> Dict[str, Dict[str, Any]]:
+    """Pasos registrados en el ledger (una consulta)"""
+    rows = db.execute(text("SELECT step, version, applied_at, duration_ms FROM migration_ledger")).fetchall()
+    return {
+        step: {"version": version, "applied_at": applied_at, "duration_ms": duration_ms}
+        for step, version, applied_at, duration_ms in rows
+    }
+
+
+def record_step(db: Session, step: str, version: str, duration_ms: int) -> None:
+    db.execute(text("DELETE FROM migration_ledger WHERE step = :step"), {"step": step})
+    db.execute(
+        text("INSERT INTO migration_ledger (step, version, applied_at, duration_ms) VALUES (:step, :version, :applied_at, :duration_ms)"),
+        {"step": step, "version": version, "applied_at": datetime.utcnow(), "duration_ms": duration_ms},
+    )
+    db.commit()
+
+
+def active_run(db: Session) -> Optional[str]:
+    """Id de una corrida en curso (de cualquier worker), si la hay"""
+    row = db.execute(
+        text("SELECT id FROM migration_runs WHERE status = 'running' AND started_at > :desde ORDER BY started_at DESC"),
+        {"desde": datetime.utcnow() - RUN_STALE_AFTER},
+    ).first()
+    return row[0] if row else None
+
+
+def create_run(db: Session, force: bool) -> Optional[str]:
+    """
+    Registra una corrida nueva. Retorna None si otro worker ya tiene una en curso
+    (el índice único parcial sobre status = 'running' rechaza la segunda).
+    """
+    ahora = datetime.utcnow()
+    # Una corrida 'running' vencida quedó de un worker caído: se cierra para no bloquear las nuevas
+    db.execute(
+        text("UPDATE migration_runs SET status = 'error', finished_at = :ahora "
+             "WHERE status = 'running' AND started_at <= :desde"),
+        {"ahora": ahora, "desde": ahora - RUN_STALE_AFTER},
+    )
+    run_id = uuid.uuid4().hex
+    try:
+        db.execute(
+            text("INSERT INTO migration_runs (id, status, force, started_at, steps, logs, errors) "
+                 "VALUES (:id, 'running', :force, :started_at, '[]', '[]', '[]')"),
+            {"id": run_id, "force": force, "started_at": ahora},
         )
-    
-    # Verificar si ya hay una migración corriendo
-    if migration_state["running"]:
-        return {
-            "status": "already_running",
-            "message": "⚠ Ya hay una migración en ejecución",
-            "last_run": migration_state["last_run"],
-            "logs": migration_state["logs"][-20:]
-        }
-    
-    # Iniciar migración
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    return run_id
+
+
+def persist_run(db: Session, run_id: str, steps: List[Dict[str, Any]], current_step: Optional[str] = None,
+                status: Optional[str] = None) -> None:
+    """Guarda el avance de la corrida (pasos, logs y errores) para consultarlo desde cualquier worker"""
+    valores = {
+        "id": run_id,
+        "current_step": current_step,
+        "steps": json.dumps(steps, default=str, ensure_ascii=False),
+        "logs": json.dumps(migration_state["logs"], ensure_ascii=False),
+        "errors": json.dumps(migration_state["errors"], ensure_ascii=False),
+    }
+    sets = "current_step = :current_step, steps = :steps, logs = :logs, errors = :errors"
+    if status:
+        sets += ", status = :status, finished_at = :finished_at"
+        valores.update(status=status, finished_at=datetime.utcnow())
+    db.execute(text(f"UPDATE migration_runs SET {sets} WHERE id = :id"), valores)
+    db.commit()
+
+
+def get_run(db: Session, run_id: str) -> Optional[Dict[str, Any]]:
+    row = db.execute(
+        text("SELECT id, status, force, started_at, finished_at, current_step, steps, logs, errors "
+             "FROM migration_runs WHERE id = :id"),
+        {"id": run_id},
+    ).first()
+    if row is None:
+        return None
+    run = dict(row._mapping)
+    for campo in ("steps", "logs", "errors"):
+        run[campo] = json.loads(run[campo] or "[]")
+    return run
+
+
+def run_migration_job(run_id: str, force: bool = False) -> None:
+    """
+    Ejecuta los pasos pendientes de MIGRATION_STEPS (o todos con force) en su propia sesión.
+    Un paso solo se registra en el ledger si terminó sin errores; si no, se reintenta la próxima vez.
+    """
+    db = SessionLocal()
+    _run_local.inspector = inspect(engine)
     migration_state["running"] = True
     migration_state["logs"] = []
     migration_state["errors"] = []
-    all_results = []
-    
+    steps: List[Dict[str, Any]] = []
+    total = len(MIGRATION_STEPS) + 1
+    status = "error"
+
     try:
         log_msg("="*70)
         log_msg("INICIANDO MIGRACIÓN COMPLETA DE BASE DE DATOS")
         log_msg("="*70)
-        
-        # Paso 1: Crear estructura base con SQLAlchemy
-        log_msg("\n[1/9] Creando tablas base con SQLAlchemy ORM...")
-        try:
-            Base.metadata.create_all(bind=engine)
-            all_results.append("✓ Tablas base creadas/verificadas con SQLAlchemy")
-            log_msg("✓ Tablas base creadas correctamente")
-        except Exception as e:
-            log_msg(f"❌ Error creando tablas base: {str(e)}", is_error=True)
-            all_results.append(f"❌ Error en tablas base: {str(e)}")
-        
-        # Paso 2: Migrar entities
-        log_msg("\n[2/9] Migrando tabla entities...")
-        all_results.extend(migrate_entities(db))
-        
-        # Paso 3: Migrar users
-        log_msg("\n[3/9] Migrando tabla users...")
-        all_results.extend(migrate_users(db))
-        
-        # Paso 4: Migrar secretarias
-        log_msg("\n[4/9] Migrando tabla secretarias...")
-        all_results.extend(migrate_secretarias(db))
-        
-        # Paso 5: Migrar pqrs
-        log_msg("\n[5/9] Migrando tabla pqrs...")
-        all_results.extend(migrate_pqrs(db))
-        
-        # Paso 6: Migrar alerts
-        log_msg("\n[6/9] Migrando tabla alerts...")
-        all_results.extend(migrate_alerts(db))
-        
-        # Paso 7: Migrar planes institucionales
-        log_msg("\n[7/9] Migrando módulo Planes Institucionales...")
-        all_results.extend(migrate_planes_institucionales(db))
-        
-        # Paso 8: Migrar PDM
-        log_msg("\n[8/9] Migrando módulo PDM...")
-        all_results.extend(migrate_pdm(db))
-        
-        # Paso 9: Verificación final
-        log_msg("\n[9/9] Verificación final...")
-        inspector = inspect(engine)
-        total_tables = len(inspector.get_table_names())
+
+        ledger = applied_steps(db)
+        for numero, (paso, version, descripcion, funcion) in enumerate(MIGRATION_STEPS, start=1):
+            version = version() if callable(version) else version
+            if not force and ledger.get(paso, {}).get("version") == version:
+                log_msg(f"[{numero}/{total}] {descripcion}: ya aplicado (v{version[:12]}), se omite")
+                steps.append({"step": paso, "version": version, "status": "skipped", "duration_ms": 0})
+                continue
+
+            log_msg(f"\n[{numero}/{total}] {descripcion}...")
+            persist_run(db, run_id, steps, current_step=paso)
+            errores_antes = len(migration_state["errors"])
+            inicio = time.perf_counter()
+            try:
+                results = funcion(db)
+            except Exception as e:
+                db.rollback()
+                log_msg(f"❌ Error en paso {paso}: {str(e)}", is_error=True)
+                results = []
+            duration_ms = int((time.perf_counter() - inicio) * 1000)
+            ok = len(migration_state["errors"]) == errores_antes
+            if ok:
+                record_step(db, paso, version, duration_ms)
+            log_msg(f"{'✓' if ok else '❌'} Paso {paso}: {duration_ms} ms")
+            steps.append({
+                "step": paso, "version": version, "status": "ok" if ok else "error",
+                "duration_ms": duration_ms, "results": results,
+            })
+
+        # Verificación final (siempre)
+        log_msg(f"\n[{total}/{total}] Verificación final...")
+        refresh_inspector()
+        total_tables = len(get_inspector().get_table_names())
         log_msg(f"✓ Total de tablas en la base de datos: {total_tables}")
-        all_results.append(f"✓ Base de datos tiene {total_tables} tablas")
-        
+        steps.append({"step": "verificacion", "status": "ok", "results": [f"✓ Base de datos tiene {total_tables} tablas"]})
+
+        # Registrar la huella del esquema para que los workers no lo vuelvan a aplicar al arrancar
+        from app.utils.schema import guardar_version
+        guardar_version()
+
+        status = "success" if not migration_state["errors"] else "error"
         log_msg("\n" + "="*70)
-        log_msg("✓✓✓ MIGRACIÓN COMPLETADA EXITOSAMENTE ✓✓✓")
+        log_msg("✓✓✓ MIGRACIÓN COMPLETADA EXITOSAMENTE ✓✓✓" if status == "success" else "⚠ MIGRACIÓN COMPLETADA CON ERRORES")
         log_msg("="*70)
-        
-        migration_state["last_run"] = datetime.now().isoformat()
-        migration_state["last_result"] = "success"
-        
-        return {
-            "status": "success",
-            "message": "✓ Migración completada exitosamente",
-            "timestamp": datetime.now().isoformat(),
-            "total_results": len(all_results),
-            "total_errors": len(migration_state["errors"]),
-            "results": all_results,
-            "errors": migration_state["errors"],
-            "logs": migration_state["logs"]
-        }
-        
     except Exception as e:
-        error_msg = f"❌ Error crítico en migración: {str(e)}"
-        log_msg(error_msg, is_error=True)
+        db.rollback()
+        log_msg(f"❌ Error crítico en migración: {str(e)}", is_error=True)
         log_msg(traceback.format_exc(), is_error=True)
-        
+    finally:
+        try:
+            persist_run(db, run_id, steps, status=status)
+        except Exception as e:
+            logger.exception("No se pudo guardar la corrida de migración %s", run_id)
         migration_state["last_run"] = datetime.now().isoformat()
-        migration_state["last_result"] = "error"
-        
+        migration_state["last_result"] = status
+        migration_state["running"] = False
+        _run_local.inspector = None
+        db.close()
+
+
+def _validar_clave(x_migration_key: Optional[str]) -> None:
+    if not x_migration_key or x_migration_key != settings.migration_secret_key:
+        raise HTTPException(
+            status_code=403,
+            detail="❌ Clave de migración inválida. Usa X-Migration-Key header."
+        )
+
+
+# ============================================================================
+# ENDPOINT PRINCIPAL
+# ============================================================================
+
+@router.post("/migrations/run/status")
+async def run_complete_migration(
+    background_tasks: BackgroundTasks,
+    force: bool = Query(False, description="Re-ejecutar también los pasos ya registrados en el ledger"),
+    wait: bool = Query(False, description="Esperar a que termine y devolver el resultado"),
+    db: Session = Depends(get_db),
+    x_migration_key: Optional[str] = Header(None)
+):
+    """
+    Inicia la migración de la base de datos como tarea de fondo.
+    
+    Requiere header: X-Migration-Key: tu-clave-secreta-2024
+    
+    Solo se ejecutan los pasos cuya versión no está en el ledger (migration_ledger).
+    El avance queda en migration_runs: GET /api/migrations/runs/{run_id}.
+    """
+    _validar_clave(x_migration_key)
+
+    await run_in_threadpool(ensure_migration_tables)
+    run_id = await run_in_threadpool(create_run, db, force)
+    if run_id is None:
         return {
-            "status": "error",
-            "message": error_msg,
-            "timestamp": datetime.now().isoformat(),
-            "results": all_results,
-            "errors": migration_state["errors"],
-            "logs": migration_state["logs"],
-            "traceback": traceback.format_exc()
+            "status": "already_running",
+            "message": "⚠ Ya hay una migración en ejecución",
+            "run_id": await run_in_threadpool(active_run, db),
         }
-        
-    finally:
-        migration_state["running"] = False
+
+    if wait:
+        await run_in_threadpool(run_migration_job, run_id, force)
+        return await run_in_threadpool(get_run, db, run_id)
+
+    background_tasks.add_task(run_migration_job, run_id, force)
+    return {
+        "status": "started",
+        "message": "✓ Migración iniciada en segundo plano",
+        "run_id": run_id,
+        "progress_url": f"/api/migrations/runs/{run_id}",
+    }
+
+
+@router.get("/migrations/runs")
+async def list_migration_runs(
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    x_migration_key: Optional[str] = Header(None)
+):
+    """Últimas corridas de migración (sin logs). Requiere header: X-Migration-Key"""
+    _validar_clave(x_migration_key)
+    ensure_migration_tables()
+    rows = db.execute(
+        text("SELECT id, status, force, started_at, finished_at, current_step FROM migration_runs "
+             "ORDER BY started_at DESC LIMIT :limit"),
+        {"limit": limit},
+    ).fetchall()
+    return {
+        "runs": [dict(r._mapping) for r in rows],
+        "ledger": applied_steps(db),
+    }
+
+
+@router.get("/migrations/runs/{run_id}")
+async def get_migration_run(
+    run_id: str,
+    db: Session = Depends(get_db),
+    x_migration_key: Optional[str] = Header(None)
+):
+    """Estado, duración por paso y log de una corrida. Requiere header: X-Migration-Key"""
+    _validar_clave(x_migration_key)
+    ensure_migration_tables()
+    run = get_run(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Corrida de migración no encontrada")
+    return run
 
 
 @router.get("/migrations/status")
@@ -1195,7 +1787,8 @@ async def get_database_status(db: Session = Depends(get_db)):
                 "pdm_actividades",
                 "pdm_actividades_ejecuciones",
                 "pdm_actividades_evidencias"
-            ]
+            ],
+            "contratacion": ["contratacion_resumenes_ia", "secop_contratos", "secop_sync_estado"]
         }
         
         # Verificar existencia de tablas
@@ -1216,6 +1809,12 @@ async def get_database_status(db: Session = Depends(get_db)):
                 except Exception as e:
                     record_counts[table] = f"Error: {str(e)}"
         
+        # Última corrida registrada (de cualquier worker)
+        ultima = None
+        if table_exists("migration_runs"):
+            row = db.execute(text("SELECT id FROM migration_runs ORDER BY started_at DESC LIMIT 1")).first()
+            ultima = get_run(db, row[0]) if row else None
+        
         # Calcular estadísticas
         total_expected = sum(len(tables) for tables in expected_tables.values())
         total_existing = sum(
@@ -1239,11 +1838,12 @@ async def get_database_status(db: Session = Depends(get_db)):
             "record_counts": record_counts,
             "all_tables": sorted(all_tables),
             "migration_history": {
-                "running": migration_state["running"],
-                "last_run": migration_state["last_run"],
-                "last_result": migration_state["last_result"],
-                "recent_logs": migration_state["logs"][-15:] if migration_state["logs"] else [],
-                "error_count": len(migration_state["errors"])
+                "run_id": ultima["id"] if ultima else None,
+                "running": bool(ultima and ultima["status"] == "running"),
+                "last_run": ultima["started_at"] if ultima else None,
+                "last_result": ultima["status"] if ultima else None,
+                "recent_logs": ultima["logs"][-15:] if ultima else [],
+                "error_count": len(ultima["errors"]) if ultima else 0
             }
         }
         
@@ -1255,3 +1855,31 @@ async def get_database_status(db: Session = Depends(get_db)):
             "error": str(e),
             "traceback": traceback.format_exc()
         }
+
+
+@router.get("/migrations/indexes/report")
+async def get_indexes_report(
+    db: Session = Depends(get_db),
+    x_migration_key: Optional[str] = Header(None)
+):
+    """
+    Reporte de índices: esperados que faltan (INDICES_CONSULTAS) y, en PostgreSQL,
+    índices sin uso según pg_stat_user_indexes.
+
+    Requiere header: X-Migration-Key
+    """
+    _validar_clave(x_migration_key)
+
+    try:
+        return {
+            "status": "ok",
+            "timestamp": datetime.now().isoformat(),
+            **reporte_indices(db)
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "timestamp": datetime.now().isoformat(),
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }
@@ -4,8 +4,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Dict
 from io import BytesIO
-from app.config.database import get_db
-from app.models.entity import Entity
+from app.config.database import get_db, get_read_db
+from app.utils.entity_cache import entity_cache, EntitySnapshot
+from app.utils.secretarias import resolver_secretaria_id, condicion_secretaria
 from app.models.user import User, UserRole
 from app.models.pdm import (
     PdmMetaAssignment, 
@@ -18,6 +19,7 @@ from app.models.pdm import (
 from app.models.alert import Alert
 import json
 import base64
+import logging
 from app.schemas.pdm import (
     AssignmentUpsertRequest,
     AssignmentResponse,
@@ -42,18 +44,32 @@ from app.schemas.pdm import (
     EvidenciasListResponse,
 )
 from app.utils.auth import get_current_active_user
+from app.utils.respuestas import RespuestaJSON, SerializadorFilas, isoformat_o, valor_o
 
 router = APIRouter(prefix="/pdm")
+logger = logging.getLogger(__name__)
 
+# Filas de pdm_actividades -> ActividadResponse sin hidratar objetos ORM ni validar cada fila
+serializar_actividades = SerializadorFilas.para_modelo(
+    ActividadResponse,
+    fecha_inicio=isoformat_o(),
+    fecha_fin=isoformat_o(),
+    anio=valor_o(0),
+    meta_ejecutar=valor_o(0.0),
+    valor_ejecutado=valor_o(0.0),
+    created_at=isoformat_o(''),
+    updated_at=isoformat_o(''),
+)
 
-def get_entity_or_404(db: Session, slug: str) -> Entity:
-    entity = db.query(Entity).filter(Entity.slug == slug, Entity.is_active == True).first()
-    if not entity:
+
+def get_entity_or_404(db: Session, slug: str) -> EntitySnapshot:
+    entity = entity_cache.get_by_slug(db, slug)
+    if not entity or not entity.is_active:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entidad no encontrada o inactiva")
     return entity
 
 
-def ensure_user_can_manage_entity(current_user: User, entity: Entity):
+def ensure_user_can_manage_entity(current_user: User, entity: EntitySnapshot):
     if current_user.role == UserRole.SUPERADMIN:
         return
     if not current_user.entity_id or current_user.entity_id != entity.id:
@@ -63,7 +79,7 @@ def ensure_user_can_manage_entity(current_user: User, entity: Entity):
 @router.get("/{slug}/assignments", response_model=AssignmentsMapResponse)
 async def get_assignments(
     slug: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     entity = get_entity_or_404(db, slug)
@@ -92,17 +108,20 @@ async def upsert_assignment(
     # Detectar si es una nueva asignación o cambio de secretaría
     is_new_assignment = False
     old_secretaria = None
+    secretaria_id = resolver_secretaria_id(db, entity.id, payload.secretaria)
     if rec:
         old_secretaria = rec.secretaria
         if rec.secretaria != payload.secretaria and payload.secretaria:
             is_new_assignment = True
         rec.secretaria = payload.secretaria
+        rec.secretaria_id = secretaria_id
     else:
         is_new_assignment = bool(payload.secretaria)
         rec = PdmMetaAssignment(
             entity_id=entity.id,
             codigo_indicador_producto=payload.codigo_indicador_producto,
             secretaria=payload.secretaria,
+            secretaria_id=secretaria_id,
         )
         db.add(rec)
     
@@ -115,7 +134,7 @@ async def upsert_assignment(
             secretarios = db.query(User).filter(
                 User.role == UserRole.SECRETARIO,
                 User.entity_id == entity.id,
-                User.secretaria == payload.secretaria
+                condicion_secretaria(User.secretaria_id, User.secretaria, secretaria_id, payload.secretaria)
             ).all()
             
             for secretario in secretarios:
@@ -131,7 +150,7 @@ async def upsert_assignment(
         except Exception as e:
             db.rollback()
             # No interrumpir el flujo por alertas
-            print(f"Error creando alertas de asignación: {e}")
+            logger.warning("Error creando alertas de asignación: %s", e)
     
     return AssignmentResponse(
         entity_id=rec.entity_id,
@@ -144,7 +163,7 @@ async def upsert_assignment(
 async def get_avances(
     slug: str,
     codigo: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     entity = get_entity_or_404(db, slug)
@@ -215,39 +234,21 @@ async def upsert_avance(
 async def get_actividades(
     slug: str,
     codigo: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     entity = get_entity_or_404(db, slug)
     ensure_user_can_manage_entity(current_user, entity)
 
-    rows = db.query(PdmActividad).filter(
+    rows = db.query(*serializar_actividades.columnas(PdmActividad)).filter(
         PdmActividad.entity_id == entity.id,
         PdmActividad.codigo_indicador_producto == codigo,
     ).order_by(PdmActividad.created_at.desc()).all()
 
-    return ActividadesListResponse(
-        codigo_indicador_producto=codigo,
-        actividades=[
-            ActividadResponse(
-                id=row.id,
-                entity_id=row.entity_id,
-                codigo_indicador_producto=row.codigo_indicador_producto,
-                nombre=row.nombre,
-                descripcion=row.descripcion,
-                responsable=row.responsable,
-                fecha_inicio=row.fecha_inicio.isoformat() if row.fecha_inicio else None,
-                fecha_fin=row.fecha_fin.isoformat() if row.fecha_fin else None,
-                estado=row.estado,
-                anio=row.anio if row.anio is not None else 0,
-                meta_ejecutar=row.meta_ejecutar if row.meta_ejecutar is not None else 0.0,
-                valor_ejecutado=row.valor_ejecutado if row.valor_ejecutado is not None else 0.0,
-                created_at=row.created_at.isoformat() if row.created_at else '',
-                updated_at=row.updated_at.isoformat() if row.updated_at else '',
-            )
-            for row in rows
-        ],
-    )
+    return RespuestaJSON({
+        "codigo_indicador_producto": codigo,
+        "actividades": serializar_actividades(rows),
+    })
 
 
 @router.post("/{slug}/actividades/bulk", response_model=ActividadesBulkResponse)
@@ -277,7 +278,7 @@ async def get_actividades_bulk(
 
         # Query optimizada con limit para evitar cargar todo en memoria
         rows = (
-            db.query(PdmActividad)
+            db.query(*serializar_actividades.columnas(PdmActividad))
             .filter(
                 PdmActividad.entity_id == entity.id,
                 PdmActividad.codigo_indicador_producto.in_(codigos),
@@ -289,33 +290,17 @@ async def get_actividades_bulk(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error en actividades/bulk: {str(e)}")
+        logger.exception("Error en actividades/bulk")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error cargando actividades: {str(e)}"
         )
 
-    items: Dict[str, List[ActividadResponse]] = {c: [] for c in codigos}
+    items: Dict[str, List[dict]] = {c: [] for c in codigos}
     for row in rows:
-        ar = ActividadResponse(
-            id=row.id,
-            entity_id=row.entity_id,
-            codigo_indicador_producto=row.codigo_indicador_producto,
-            nombre=row.nombre,
-            descripcion=row.descripcion,
-            responsable=row.responsable,
-            fecha_inicio=row.fecha_inicio.isoformat() if row.fecha_inicio else None,
-            fecha_fin=row.fecha_fin.isoformat() if row.fecha_fin else None,
-            estado=row.estado,
-            anio=row.anio if row.anio is not None else 0,
-            meta_ejecutar=row.meta_ejecutar if row.meta_ejecutar is not None else 0.0,
-            valor_ejecutado=row.valor_ejecutado if row.valor_ejecutado is not None else 0.0,
-            created_at=row.created_at.isoformat() if row.created_at else '',
-            updated_at=row.updated_at.isoformat() if row.updated_at else '',
-        )
-        items.setdefault(row.codigo_indicador_producto, []).append(ar)
+        items.setdefault(row.codigo_indicador_producto, []).append(serializar_actividades.fila(row))
 
-    return {"items": items}
+    return RespuestaJSON({"items": items})
 
 
 @router.post("/{slug}/actividades", response_model=ActividadResponse, status_code=status.HTTP_201_CREATED)
@@ -386,7 +371,7 @@ async def create_actividad(
             secretarios = db.query(User).filter(
                 User.role == UserRole.SECRETARIO,
                 User.entity_id == entity.id,
-                User.secretaria == assignment.secretaria
+                condicion_secretaria(User.secretaria_id, User.secretaria, assignment.secretaria_id, assignment.secretaria)
             ).all()
             
             for secretario in secretarios:
@@ -405,7 +390,7 @@ async def create_actividad(
     except Exception as e:
         db.rollback()
         # No interrumpir el flujo por alertas
-        print(f"Error creando alertas de nueva actividad: {e}")
+        logger.warning("Error creando alertas de nueva actividad: %s", e)
 
     return ActividadResponse(
         id=nueva_actividad.id,
@@ -623,7 +608,7 @@ async def create_evidencia(
 async def get_evidencias(
     slug: str,
     actividad_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -807,7 +792,7 @@ async def crear_ejecucion(
 async def get_ejecuciones(
     slug: str,
     actividad_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -1070,7 +1055,7 @@ async def download_excel(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error en download_excel: {str(e)}")
+        logger.exception("Error en download_excel")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error descargando archivo: {str(e)}"
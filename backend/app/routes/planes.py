@@ -4,13 +4,17 @@ Este archivo maneja los endpoints relacionados con Planes y Componentes.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, case, exists
 from typing import List, Optional
 from decimal import Decimal
 from datetime import date
 import json
+import logging
 
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.models.plan import (
     PlanInstitucional, ComponenteProceso, Actividad, ActividadEjecucion,
     EstadoPlan, EstadoComponente
@@ -19,35 +23,184 @@ from app.models.user import User, UserRole
 from app.models.alert import Alert
 from app.schemas import plan as plan_schemas
 from app.utils.auth import get_current_user, require_feature_enabled
+from app.utils.respuestas import RespuestaJSON, respuesta_modelos
+from app.utils.secretarias import resolver_secretaria_id, condicion_secretaria, misma_secretaria, clave_secretaria
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 # ==================== UTILIDADES ====================
 
+def _actividad_tiene_ejecucion():
+    """Subconsulta correlacionada EXISTS: la actividad tiene al menos una ejecución"""
+    return exists().where(ActividadEjecucion.actividad_id == Actividad.id)
+
+
+def _porcentaje(con_avance: int, total: int) -> Decimal:
+    """Regla de avance: proporción de actividades con al menos una ejecución (0-100)"""
+    if not total:
+        return Decimal(0)
+    return Decimal(100 * int(con_avance or 0)) / Decimal(total)
+
+
+def avance_por_componente(db: Session, plan_id: int) -> dict:
+    """
+    Calcula en una sola consulta agrupada, para cada componente del plan,
+    (total_actividades, actividades_con_avance).
+    Los componentes sin actividades se incluyen con (0, 0).
+    """
+    con_avance = case((_actividad_tiene_ejecucion(), 1), else_=0)
+    rows = db.query(
+        ComponenteProceso.id,
+        func.count(Actividad.id),
+        func.coalesce(func.sum(con_avance), 0),
+    ).outerjoin(
+        Actividad, Actividad.componente_id == ComponenteProceso.id
+    ).filter(
+        ComponenteProceso.plan_id == plan_id
+    ).group_by(ComponenteProceso.id).all()
+    return {componente_id: (int(total), int(avance)) for componente_id, total, avance in rows}
+
+
 def calcular_porcentaje_avance_actividad(db: Session, actividad: Actividad) -> Decimal:
     """Regla: si la actividad tiene al menos una ejecución, su avance es 100%, sino 0%"""
-    count = db.query(ActividadEjecucion).filter(ActividadEjecucion.actividad_id == actividad.id).count()
-    return Decimal(100) if count > 0 else Decimal(0)
+    tiene_ejecucion = db.query(
+        exists().where(ActividadEjecucion.actividad_id == actividad.id)
+    ).scalar()
+    return Decimal(100) if tiene_ejecucion else Decimal(0)
 
 
 def calcular_porcentaje_avance_componente(componente: ComponenteProceso, db: Session) -> Decimal:
-    """Avance del componente: promedio del avance (0% o 100%) de sus actividades"""
-    actividades = db.query(Actividad).filter(Actividad.componente_id == componente.id).all()
-    if not actividades:
-        return Decimal(0)
-    avances = [calcular_porcentaje_avance_actividad(db, a) for a in actividades]
-    return sum(avances) / len(avances)
+    """Avance del componente: promedio del avance (0% o 100%) de sus actividades (una consulta)"""
+    total, con_avance = db.query(
+        func.count(Actividad.id),
+        func.coalesce(func.sum(case((_actividad_tiene_ejecucion(), 1), else_=0)), 0),
+    ).filter(Actividad.componente_id == componente.id).one()
+    return _porcentaje(con_avance, total)
 
 
 def calcular_porcentaje_avance_plan(plan: PlanInstitucional, db: Session) -> Decimal:
-    """Calcula el porcentaje de avance de un plan basado en sus componentes"""
-    componentes = db.query(ComponenteProceso).filter(ComponenteProceso.plan_id == plan.id).all()
-    if not componentes:
+    """Calcula el porcentaje de avance de un plan basado en sus componentes (una consulta)"""
+    promedio = db.query(
+        func.avg(ComponenteProceso.porcentaje_avance)
+    ).filter(ComponenteProceso.plan_id == plan.id).scalar()
+    if promedio is None:
         return Decimal(0)
-    
-    total_avance = sum(comp.porcentaje_avance for comp in componentes)
-    return total_avance / len(componentes)
+    return Decimal(str(promedio))
+
+
+def recalcular_avance_componente(db: Session, componente_id: int) -> None:
+    """
+    Recalcula el avance del componente y de su plan sin hacer commit.
+    El llamador confirma la transacción una sola vez.
+    """
+    componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == componente_id).first()
+    if not componente:
+        return
+    componente.porcentaje_avance = calcular_porcentaje_avance_componente(componente, db)
+    db.flush()
+    plan = componente.plan
+    if plan:
+        plan.porcentaje_avance = calcular_porcentaje_avance_plan(plan, db)
+
+
+def recalcular_avance_plan(db: Session, plan: PlanInstitucional) -> Decimal:
+    """
+    Recalcula el avance de todos los componentes del plan y del plan mismo
+    con una consulta agrupada; no hace commit.
+    """
+    avances = avance_por_componente(db, plan.id)
+    componentes = db.query(ComponenteProceso).filter(ComponenteProceso.plan_id == plan.id).all()
+    for componente in componentes:
+        total, con_avance = avances.get(componente.id, (0, 0))
+        componente.porcentaje_avance = _porcentaje(con_avance, total)
+    if componentes:
+        plan.porcentaje_avance = sum(
+            (Decimal(c.porcentaje_avance) for c in componentes), Decimal(0)
+        ) / len(componentes)
+    else:
+        plan.porcentaje_avance = Decimal(0)
+    return plan.porcentaje_avance
+
+
+def actualizar_avance_por_ejecuciones(db: Session, actividad: Actividad, agregada: bool) -> None:
+    """
+    Actualización incremental del avance tras agregar (agregada=True) o eliminar una ejecución.
+    El avance de una actividad solo cambia cuando pasa de 0 a 1 ejecución o de 1 a 0,
+    así que el componente y el plan se recalculan únicamente en esas transiciones.
+    Debe llamarse después de hacer flush del cambio; no hace commit.
+    """
+    total_ejecuciones = db.query(func.count(ActividadEjecucion.id)).filter(
+        ActividadEjecucion.actividad_id == actividad.id
+    ).scalar() or 0
+    if total_ejecuciones != (1 if agregada else 0):
+        return
+    recalcular_avance_componente(db, actividad.componente_id)
+
+
+def consultar_plan_proyectado(db: Session, plan_id: int):
+    """Fila (Row) con las columnas del plan, sin hidratar el objeto ORM"""
+    return db.query(*PlanInstitucional.__table__.columns).filter(
+        PlanInstitucional.id == plan_id
+    ).first()
+
+
+def cargar_arbol_plan(
+    db: Session,
+    plan_row,
+    profundidad: int = 2,
+    campos_actividad: Optional[List[str]] = None,
+) -> dict:
+    """
+    Arma el plan con sus componentes y actividades como diccionarios anidados.
+    Usa una consulta con proyección de columnas por nivel (componentes, actividades)
+    en lugar de joinedload, así cada fila se trae una sola vez y no se hidratan objetos ORM.
+    - plan_row: resultado de consultar_plan_proyectado
+    - profundidad: 0 = solo plan, 1 = plan + componentes, 2 = plan + componentes + actividades
+    - campos_actividad: subconjunto de columnas de actividad a devolver (id siempre incluido)
+    """
+    plan_id = plan_row.id
+    plan = dict(plan_row._mapping)
+    plan["componentes"] = []
+    if profundidad < 1:
+        return plan
+
+    componentes = {}
+    comp_rows = db.query(*ComponenteProceso.__table__.columns).filter(
+        ComponenteProceso.plan_id == plan_id
+    ).order_by(ComponenteProceso.created_at, ComponenteProceso.id)
+    for row in comp_rows:
+        componente = dict(row._mapping)
+        componente["actividades"] = []
+        componentes[componente["id"]] = componente
+        plan["componentes"].append(componente)
+
+    if profundidad < 2 or not componentes:
+        return plan
+
+    tabla = Actividad.__table__
+    nombres = list(campos_actividad) if campos_actividad else [c.name for c in tabla.columns]
+    if "id" not in nombres:
+        nombres.insert(0, "id")
+    incluir_componente_id = "componente_id" in nombres
+    columnas = [tabla.c[n] for n in nombres]
+    if not incluir_componente_id:
+        columnas.append(tabla.c.componente_id)
+
+    act_rows = db.query(*columnas).join(
+        ComponenteProceso, ComponenteProceso.id == Actividad.componente_id
+    ).filter(
+        ComponenteProceso.plan_id == plan_id
+    ).order_by(Actividad.componente_id, Actividad.created_at, Actividad.id)
+
+    # Ensamble en una sola pasada sobre las filas
+    for row in act_rows:
+        actividad = dict(row._mapping)
+        componente_id = actividad["componente_id"] if incluir_componente_id else actividad.pop("componente_id")
+        componentes[componente_id]["actividades"].append(actividad)
+
+    return plan
 
 
 """ Se elimina toda la lógica de presupuesto: no se gestionan montos en el módulo. """
@@ -75,6 +228,44 @@ def tiene_permiso_componente(user: User, componente: ComponenteProceso, db: Sess
     return plan is not None and plan.entity_id == user.entity_id
 
 
+_ENTIDAD_ACTIVIDAD_KEY = "planes_entidad_por_actividad"
+
+
+def _cache_entidad_actividad(db: Session) -> dict:
+    """Memo por request: la sesión se crea por request en get_db, así que session.info vive lo mismo"""
+    return db.info.setdefault(_ENTIDAD_ACTIVIDAD_KEY, {})
+
+
+def cargar_actividad_con_entidad(db: Session, actividad_id: int) -> Optional[Actividad]:
+    """
+    Carga la actividad junto con la entidad de su plan (actividad → componente → plan)
+    en una sola consulta y deja la entidad memoizada para las validaciones de permisos.
+    """
+    row = db.query(Actividad, PlanInstitucional.entity_id).outerjoin(
+        ComponenteProceso, ComponenteProceso.id == Actividad.componente_id
+    ).outerjoin(
+        PlanInstitucional, PlanInstitucional.id == ComponenteProceso.plan_id
+    ).filter(Actividad.id == actividad_id).first()
+    if not row:
+        return None
+    actividad, entity_id = row
+    _cache_entidad_actividad(db)[actividad.id] = entity_id
+    return actividad
+
+
+def resolver_entidad_actividad(db: Session, actividad: Actividad) -> Optional[int]:
+    """
+    Devuelve el entity_id del plan al que pertenece la actividad.
+    Resuelve la cadena actividad → componente → plan con un solo JOIN y la memoiza por request.
+    """
+    cache = _cache_entidad_actividad(db)
+    if actividad.id not in cache:
+        cache[actividad.id] = db.query(PlanInstitucional.entity_id).join(
+            ComponenteProceso, ComponenteProceso.plan_id == PlanInstitucional.id
+        ).filter(ComponenteProceso.id == actividad.componente_id).scalar()
+    return cache[actividad.id]
+
+
 def tiene_permiso_actividad(user: User, actividad: Actividad, db: Session) -> bool:
     """
     Permisos para actividades:
@@ -86,11 +277,8 @@ def tiene_permiso_actividad(user: User, actividad: Actividad, db: Session) -> bo
         return True
     
     # Verificar que pertenece a la misma entidad
-    componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-    if not componente:
-        return False
-    plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-    if not plan or plan.entity_id != user.entity_id:
+    entity_id = resolver_entidad_actividad(db, actividad)
+    if entity_id is None or entity_id != user.entity_id:
         return False
     
     # Si es admin, tiene acceso
@@ -100,7 +288,10 @@ def tiene_permiso_actividad(user: User, actividad: Actividad, db: Session) -> bo
     # Si es secretario, solo puede acceder si la actividad está asignada a su secretaría
     if user.role == UserRole.SECRETARIO:
         # Verificar que el responsable de la actividad coincida con la secretaría del usuario
-        return actividad.responsable == user.secretaria
+        return misma_secretaria(
+            user.secretaria_id, user.secretaria,
+            actividad.responsable_secretaria_id, actividad.responsable
+        )
     
     return False
 
@@ -118,11 +309,8 @@ def puede_editar_actividad(user: User, actividad: Actividad, db: Session) -> boo
         return False  # Secretarios no editan actividades, solo registran ejecuciones
     
     # Admin puede editar
-    componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-    if not componente:
-        return False
-    plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-    return plan is not None and plan.entity_id == user.entity_id
+    entity_id = resolver_entidad_actividad(db, actividad)
+    return entity_id is not None and entity_id == user.entity_id
 
 
 def puede_registrar_ejecucion(user: User, actividad: Actividad, db: Session) -> bool:
@@ -133,15 +321,15 @@ def puede_registrar_ejecucion(user: User, actividad: Actividad, db: Session) ->
     """
     if user.role == UserRole.SUPERADMIN or user.role == UserRole.ADMIN:
         # Verificar que pertenece a la entidad
-        componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-        if not componente:
-            return False
-        plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-        return plan is not None and plan.entity_id == user.entity_id
+        entity_id = resolver_entidad_actividad(db, actividad)
+        return entity_id is not None and entity_id == user.entity_id
     
     # Secretarios solo en su secretaría
     if user.role == UserRole.SECRETARIO:
-        return actividad.responsable == user.secretaria
+        return misma_secretaria(
+            user.secretaria_id, user.secretaria,
+            actividad.responsable_secretaria_id, actividad.responsable
+        )
     
     return False
 
@@ -205,22 +393,42 @@ def obtener_plan(
 @router.get("/{plan_id}/completo", response_model=plan_schemas.PlanInstitucionalCompleto)
 def obtener_plan_completo(
     plan_id: int,
+    profundidad: int = Query(2, ge=0, le=2, description="0: plan, 1: + componentes, 2: + actividades"),
+    campos: Optional[str] = Query(None, description="Campos de actividad separados por coma (proyección parcial)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     _feature: bool = Depends(require_feature_enabled('enable_planes_institucionales'))
 ):
-    """Obtener un plan con todos sus componentes y actividades anidados"""
-    plan = db.query(PlanInstitucional).options(
-        joinedload(PlanInstitucional.componentes).joinedload(ComponenteProceso.actividades)
-    ).filter(PlanInstitucional.id == plan_id).first()
+    """
+    Obtener un plan con todos sus componentes y actividades anidados.
+    Con `campos` la respuesta solo incluye esas columnas de cada actividad y no se valida
+    contra el schema completo.
+    """
+    campos_actividad = None
+    if campos:
+        campos_actividad = [c.strip() for c in campos.split(",") if c.strip()]
+        invalidos = [c for c in campos_actividad if c not in Actividad.__table__.c]
+        if invalidos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos de actividad inválidos: {', '.join(invalidos)}"
+            )
+
+    plan_row = consultar_plan_proyectado(db, plan_id)
     
-    if not plan:
+    if not plan_row:
         raise HTTPException(status_code=404, detail="Plan no encontrado")
     
-    if not tiene_permiso_plan(current_user, plan):
+    if not tiene_permiso_plan(current_user, plan_row):
         raise HTTPException(status_code=403, detail="No tienes acceso a este plan")
     
-    return plan
+    plan = cargar_arbol_plan(db, plan_row, profundidad=profundidad, campos_actividad=campos_actividad)
+    if campos_actividad:
+        return RespuestaJSON(plan)
+    # Se valida una vez y se serializa directo a bytes (sin jsonable_encoder ni json.dumps)
+    return respuesta_modelos(
+        plan_schemas.PlanInstitucionalCompleto.model_validate(plan), plan_schemas.PlanInstitucionalCompleto
+    )
 
 
 @router.post("/", response_model=plan_schemas.PlanInstitucional, status_code=status.HTTP_201_CREATED)
@@ -322,7 +530,7 @@ def eliminar_plan(
 @router.get("/{plan_id}/estadisticas", response_model=plan_schemas.EstadisticasPlan)
 def obtener_estadisticas_plan(
     plan_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     _feature: bool = Depends(require_feature_enabled('enable_planes_institucionales'))
 ):
@@ -335,25 +543,214 @@ def obtener_estadisticas_plan(
     if not tiene_permiso_plan(current_user, plan):
         raise HTTPException(status_code=403, detail="No tienes acceso a este plan")
     
-    # Obtener componentes y actividades
-    componentes = db.query(ComponenteProceso).filter(ComponenteProceso.plan_id == plan_id).all()
-    componente_ids = [c.id for c in componentes]
-    
-    actividades = db.query(Actividad).filter(Actividad.componente_id.in_(componente_ids)).all() if componente_ids else []
-    
-    # Calcular estadísticas simplificadas
-    actividades_con_avance = sum(1 for a in actividades if calcular_porcentaje_avance_actividad(db, a) >= 100)
-    componentes_con_avance = sum(1 for c in componentes if calcular_porcentaje_avance_componente(c, db) > 0)
+    # Conteos por componente en una sola consulta agrupada
+    avances = avance_por_componente(db, plan_id)
+    total_actividades = sum(total for total, _ in avances.values())
+    actividades_con_avance = sum(con_avance for _, con_avance in avances.values())
+    componentes_con_avance = sum(1 for _, con_avance in avances.values() if con_avance > 0)
 
     return plan_schemas.EstadisticasPlan(
-        total_componentes=len(componentes),
-        total_actividades=len(actividades),
+        total_componentes=len(avances),
+        total_actividades=total_actividades,
         actividades_con_avance=actividades_con_avance,
         componentes_con_avance=componentes_con_avance,
         porcentaje_avance_global=plan.porcentaje_avance
     )
 
 
+# ==================== ENDPOINT OPERACIONES EN LOTE ====================
+
+def _validar_datos_lote(schema, datos: dict, indice: int):
+    """Valida los datos de una operación con el schema correspondiente (422 con el índice si falla)"""
+    try:
+        return schema.model_validate(datos)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"indice": indice, "errores": jsonable_encoder(e.errors(include_url=False))}
+        )
+
+
+@router.post("/{plan_id}/lote", response_model=plan_schemas.LoteOperacionesResponse)
+def aplicar_lote_operaciones(
+    plan_id: int,
+    lote: plan_schemas.LoteOperacionesRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _feature: bool = Depends(require_feature_enabled('enable_planes_institucionales'))
+):
+    """
+    Aplica un lote de operaciones create/update/delete sobre componentes y actividades
+    de un plan en una sola transacción (solo admins).
+    Si alguna operación falla no se aplica ninguna. El avance se recalcula una sola vez al final.
+    """
+    if current_user.role not in [UserRole.ADMIN, UserRole.SUPERADMIN]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden editar planes"
+        )
+    
+    plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == plan_id).first()
+    
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan no encontrado")
+    
+    if not tiene_permiso_plan(current_user, plan):
+        raise HTTPException(status_code=403, detail="No tienes acceso a este plan")
+    
+    # Componentes y actividades del plan (para validar pertenencia sin consultar por operación)
+    componentes = {
+        c.id: c for c in db.query(ComponenteProceso).filter(ComponenteProceso.plan_id == plan_id).all()
+    }
+    ids_actividades = {
+        o.id for o in lote.operaciones if o.tipo == "actividad" and o.op != "create" and o.id is not None
+    }
+    actividades = {}
+    if ids_actividades:
+        actividades = {
+            a.id: a for a in db.query(Actividad).join(
+                ComponenteProceso, ComponenteProceso.id == Actividad.componente_id
+            ).filter(ComponenteProceso.plan_id == plan_id, Actividad.id.in_(ids_actividades)).all()
+        }
+    refs = {}
+    resultados = []
+    nuevas_actividades = []
+    
+    try:
+        for indice, operacion in enumerate(lote.operaciones):
+            if operacion.op in ("update", "delete") and operacion.id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Operación {indice}: se requiere id para {operacion.op}"
+                )
+            
+            if operacion.tipo == "componente":
+                if operacion.op == "create":
+                    datos = _validar_datos_lote(
+                        plan_schemas.ComponenteProcesoCreate, {**operacion.datos, "plan_id": plan_id}, indice
+                    )
+                    componente = ComponenteProceso(**datos.model_dump())
+                    db.add(componente)
+                    db.flush()
+                    componentes[componente.id] = componente
+                    if operacion.ref:
+                        refs[operacion.ref] = componente.id
+                    objetivo_id = componente.id
+                else:
+                    componente = componentes.get(operacion.id)
+                    if not componente:
+                        raise HTTPException(
+                            status_code=404,
+                            detail=f"Operación {indice}: componente {operacion.id} no encontrado en el plan"
+                        )
+                    if operacion.op == "update":
+                        datos = _validar_datos_lote(plan_schemas.ComponenteProcesoUpdate, operacion.datos, indice)
+                        for field, value in datos.model_dump(exclude_unset=True).items():
+                            setattr(componente, field, value)
+                    else:
+                        db.delete(componente)
+                        del componentes[operacion.id]
+                    objetivo_id = operacion.id
+            
+            else:
+                if operacion.op == "create":
+                    componente_id = refs.get(operacion.componente_ref) if operacion.componente_ref else operacion.componente_id
+                    if componente_id not in componentes:
+                        raise HTTPException(
+                            status_code=404,
+                            detail=f"Operación {indice}: componente de la actividad no encontrado en el plan"
+                        )
+                    datos = _validar_datos_lote(
+                        plan_schemas.ActividadCreate, {**operacion.datos, "componente_id": componente_id}, indice
+                    )
+                    actividad = Actividad(**datos.model_dump())
+                    actividad.responsable_secretaria_id = resolver_secretaria_id(db, plan.entity_id, actividad.responsable)
+                    db.add(actividad)
+                    db.flush()
+                    actividades[actividad.id] = actividad
+                    nuevas_actividades.append(actividad)
+                    objetivo_id = actividad.id
+                else:
+                    actividad = actividades.get(operacion.id)
+                    if not actividad:
+                        raise HTTPException(
+                            status_code=404,
+                            detail=f"Operación {indice}: actividad {operacion.id} no encontrada en el plan"
+                        )
+                    if operacion.op == "update":
+                        datos = _validar_datos_lote(plan_schemas.ActividadUpdate, operacion.datos, indice)
+                        update_data = datos.model_dump(exclude_unset=True)
+                        inicio = update_data.get('fecha_inicio_prevista', actividad.fecha_inicio_prevista)
+                        fin = update_data.get('fecha_fin_prevista', actividad.fecha_fin_prevista)
+                        if inicio is None or fin is None:
+                            raise HTTPException(
+                                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=f"Operación {indice}: las fechas previstas de inicio y fin no pueden ser nulas"
+                            )
+                        if inicio >= fin:
+                            raise HTTPException(
+                                status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Operación {indice}: la fecha de inicio debe ser anterior a la fecha de fin"
+                            )
+                        for field, value in update_data.items():
+                            setattr(actividad, field, value)
+                        if 'responsable' in update_data:
+                            actividad.responsable_secretaria_id = resolver_secretaria_id(
+                                db, plan.entity_id, actividad.responsable
+                            )
+                    else:
+                        db.delete(actividad)
+                        del actividades[operacion.id]
+                    objetivo_id = operacion.id
+            
+            resultados.append(plan_schemas.ResultadoOperacionLote(
+                indice=indice, op=operacion.op, tipo=operacion.tipo, id=objetivo_id, ref=operacion.ref
+            ))
+        
+        db.flush()
+        porcentaje = recalcular_avance_plan(db, plan)
+        
+        # Alertas agrupadas: una por destinatario con el número de actividades nuevas
+        if nuevas_actividades:
+            por_responsable = {}
+            for actividad in nuevas_actividades:
+                clave = clave_secretaria(actividad.responsable_secretaria_id, actividad.responsable)
+                por_responsable.setdefault(clave, []).append(actividad.id)
+            destinatarios = db.query(User).filter(
+                User.entity_id == plan.entity_id,
+                User.is_active == True,
+                User.role.in_([UserRole.ADMIN, UserRole.SECRETARIO])
+            ).all()
+            for usuario in destinatarios:
+                if usuario.role == UserRole.ADMIN:
+                    ids = [a.id for a in nuevas_actividades]
+                    title = "Nuevas actividades en Plan Institucional"
+                else:
+                    ids = por_responsable.get(clave_secretaria(usuario.secretaria_id, usuario.secretaria))
+                    title = "Nuevas actividades asignadas en Plan Institucional"
+                if not ids:
+                    continue
+                db.add(Alert(
+                    entity_id=plan.entity_id,
+                    recipient_user_id=usuario.id,
+                    type="PLAN_NEW_ACTIVITY",
+                    title=title,
+                    message=f"Se registraron {len(ids)} actividades nuevas en el plan '{plan.nombre}'",
+                    data=json.dumps({"plan_id": plan_id, "actividad_ids": ids}),
+                ))
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    return plan_schemas.LoteOperacionesResponse(
+        plan_id=plan_id,
+        resultados=resultados,
+        porcentaje_avance=porcentaje
+    )
+
+
 # ==================== ENDPOINTS COMPONENTES/PROCESOS ====================
 
 @router.get("/{plan_id}/componentes", response_model=List[plan_schemas.ComponenteProceso])
@@ -432,6 +829,9 @@ def crear_componente(
     
     nuevo_componente = ComponenteProceso(**componente_data.model_dump())
     db.add(nuevo_componente)
+    db.flush()
+    # Un componente más cambia el promedio del plan
+    recalcular_avance_plan(db, plan)
     db.commit()
     db.refresh(nuevo_componente)
     
@@ -478,7 +878,10 @@ def actualizar_componente(
             secretarios = db.query(User).filter(
                 User.role == UserRole.SECRETARIO,
                 User.entity_id == componente.plan.entity_id,
-                User.secretaria == new_secretaria
+                condicion_secretaria(
+                    User.secretaria_id, User.secretaria,
+                    resolver_secretaria_id(db, componente.plan.entity_id, new_secretaria), new_secretaria
+                )
             ).all()
             
             for secretario in secretarios:
@@ -497,7 +900,7 @@ def actualizar_componente(
         except Exception as e:
             db.rollback()
             # No interrumpir el flujo por alertas
-            print(f"Error creando alertas de asignación de componente: {e}")
+            logger.warning("Error creando alertas de asignación de componente: %s", e)
     
     # Actualizar avance del plan
     plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
@@ -530,7 +933,11 @@ def eliminar_componente(
     if not tiene_permiso_componente(current_user, componente, db):
         raise HTTPException(status_code=403, detail="No tienes acceso a este componente")
     
+    plan = componente.plan
     db.delete(componente)
+    db.flush()
+    if plan:
+        recalcular_avance_plan(db, plan)
     db.commit()
     
     return None
@@ -562,7 +969,10 @@ def listar_actividades(
     
     # Si es secretario, filtrar solo sus actividades
     if current_user.role == UserRole.SECRETARIO and current_user.secretaria:
-        query = query.filter(Actividad.responsable == current_user.secretaria)
+        query = query.filter(condicion_secretaria(
+            Actividad.responsable_secretaria_id, Actividad.responsable,
+            current_user.secretaria_id, current_user.secretaria
+        ))
     
     return query.order_by(Actividad.created_at).all()
 
@@ -575,7 +985,7 @@ def obtener_actividad(
     _feature: bool = Depends(require_feature_enabled('enable_planes_institucionales'))
 ):
     """Obtener una actividad específica"""
-    actividad = db.query(Actividad).filter(Actividad.id == actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, actividad_id)
     
     if not actividad:
         raise HTTPException(status_code=404, detail="Actividad no encontrada")
@@ -645,7 +1055,13 @@ def crear_actividad(
         )
     
     nueva_actividad = Actividad(**actividad_data.model_dump())
+    nueva_actividad.responsable_secretaria_id = resolver_secretaria_id(
+        db, componente.plan.entity_id, nueva_actividad.responsable
+    )
     db.add(nueva_actividad)
+    db.flush()
+    # Una actividad sin ejecuciones cambia el denominador del avance del componente y del plan
+    recalcular_avance_componente(db, componente_id)
     db.commit()
     db.refresh(nueva_actividad)
     
@@ -656,7 +1072,10 @@ def crear_actividad(
             secretarios = db.query(User).filter(
                 User.role == UserRole.SECRETARIO,
                 User.entity_id == componente.plan.entity_id,
-                User.secretaria == nueva_actividad.responsable,
+                condicion_secretaria(
+                    User.secretaria_id, User.secretaria,
+                    nueva_actividad.responsable_secretaria_id, nueva_actividad.responsable
+                ),
                 User.is_active == True
             ).all()
             
@@ -717,7 +1136,7 @@ def actualizar_actividad(
     Solo ADMIN y SUPERADMIN pueden editar actividades.
     Los SECRETARIOS no pueden editar actividades, solo registrar ejecuciones.
     """
-    actividad = db.query(Actividad).filter(Actividad.id == actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, actividad_id)
     
     if not actividad:
         raise HTTPException(status_code=404, detail="Actividad no encontrada")
@@ -737,19 +1156,17 @@ def actualizar_actividad(
     
     for field, value in update_data.items():
         setattr(actividad, field, value)
+    if 'responsable' in update_data:
+        actividad.responsable_secretaria_id = resolver_secretaria_id(
+            db, resolver_entidad_actividad(db, actividad), actividad.responsable
+        )
     
     db.commit()
     db.refresh(actividad)
     
     # Actualizar avance del componente y plan (sin presupuesto)
-    componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-    if componente:
-        componente.porcentaje_avance = calcular_porcentaje_avance_componente(componente, db)
-        db.commit()
-        plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-        if plan:
-            plan.porcentaje_avance = calcular_porcentaje_avance_plan(plan, db)
-            db.commit()
+    recalcular_avance_componente(db, actividad.componente_id)
+    db.commit()
     
     return actividad
 
@@ -771,7 +1188,7 @@ def eliminar_actividad(
             detail="Solo los administradores pueden eliminar actividades"
         )
     
-    actividad = db.query(Actividad).filter(Actividad.id == actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, actividad_id)
     
     if not actividad:
         raise HTTPException(status_code=404, detail="Actividad no encontrada")
@@ -779,7 +1196,10 @@ def eliminar_actividad(
     if not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tienes acceso a esta actividad")
     
+    componente_id = actividad.componente_id
     db.delete(actividad)
+    db.flush()
+    recalcular_avance_componente(db, componente_id)
     db.commit()
     
     return None
@@ -797,7 +1217,7 @@ def listar_ejecuciones(
     _feature: bool = Depends(require_feature_enabled('enable_planes_institucionales'))
 ):
     """Listar todas las ejecuciones de una actividad"""
-    actividad = db.query(Actividad).filter(Actividad.id == actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, actividad_id)
     
     if not actividad:
         raise HTTPException(status_code=404, detail="Actividad no encontrada")
@@ -830,7 +1250,7 @@ def obtener_ejecucion(
         raise HTTPException(status_code=404, detail="Ejecución no encontrada")
     
     # Verificar permisos a través de la actividad
-    actividad = db.query(Actividad).filter(Actividad.id == ejecucion.actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, ejecucion.actividad_id)
     if not actividad or not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tienes acceso a esta ejecución")
     
@@ -857,7 +1277,7 @@ def crear_ejecucion(
             detail="No tienes permisos para registrar ejecuciones"
         )
     
-    actividad = db.query(Actividad).filter(Actividad.id == actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, actividad_id)
     
     if not actividad:
         raise HTTPException(status_code=404, detail="Actividad no encontrada")
@@ -883,18 +1303,12 @@ def crear_ejecucion(
     )
     
     db.add(nueva_ejecucion)
+    db.flush()
+    
+    # Recalcular avances (solo cambia si es la primera ejecución de la actividad)
+    actualizar_avance_por_ejecuciones(db, actividad, agregada=True)
     db.commit()
     db.refresh(nueva_ejecucion)
-    
-    # Recalcular avances
-    componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-    if componente:
-        componente.porcentaje_avance = calcular_porcentaje_avance_componente(componente, db)
-        db.commit()
-        plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-        if plan:
-            plan.porcentaje_avance = calcular_porcentaje_avance_plan(plan, db)
-            db.commit()
     return nueva_ejecucion
 
 
@@ -913,7 +1327,7 @@ def actualizar_ejecucion(
         raise HTTPException(status_code=404, detail="Ejecución no encontrada")
     
     # Verificar permisos
-    actividad = db.query(Actividad).filter(Actividad.id == ejecucion.actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, ejecucion.actividad_id)
     if not actividad or not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tienes permiso para editar esta ejecución")
     
@@ -925,16 +1339,7 @@ def actualizar_ejecucion(
     db.commit()
     db.refresh(ejecucion)
     
-    # Recalcular avances
-    if actividad:
-        componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-        if componente:
-            componente.porcentaje_avance = calcular_porcentaje_avance_componente(componente, db)
-            db.commit()
-            plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-            if plan:
-                plan.porcentaje_avance = calcular_porcentaje_avance_plan(plan, db)
-                db.commit()
+    # Editar una ejecución no altera el avance (depende solo de si existen ejecuciones)
     return ejecucion
 
 
@@ -958,23 +1363,16 @@ def eliminar_ejecucion(
         raise HTTPException(status_code=404, detail="Ejecución no encontrada")
     
     # Verificar permisos
-    actividad = db.query(Actividad).filter(Actividad.id == ejecucion.actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, ejecucion.actividad_id)
     if not actividad or not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tienes acceso a esta ejecución")
     
     db.delete(ejecucion)
-    db.commit()
+    db.flush()
     
-    # Recalcular avances
-    if actividad:
-        componente = db.query(ComponenteProceso).filter(ComponenteProceso.id == actividad.componente_id).first()
-        if componente:
-            componente.porcentaje_avance = calcular_porcentaje_avance_componente(componente, db)
-            db.commit()
-            plan = db.query(PlanInstitucional).filter(PlanInstitucional.id == componente.plan_id).first()
-            if plan:
-                plan.porcentaje_avance = calcular_porcentaje_avance_plan(plan, db)
-                db.commit()
+    # Recalcular avances (solo cambia si era la última ejecución de la actividad)
+    actualizar_avance_por_ejecuciones(db, actividad, agregada=False)
+    db.commit()
     return None
 
 
@@ -997,7 +1395,7 @@ def crear_evidencia(
         raise HTTPException(status_code=404, detail="Ejecución de actividad no encontrada")
     
     # Verificar permisos a través de la actividad
-    actividad = db.query(Actividad).filter(Actividad.id == ejecucion.actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, ejecucion.actividad_id)
     if not actividad or not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tiene permisos para agregar evidencias a esta ejecución")
     
@@ -1048,7 +1446,7 @@ def listar_evidencias(
         raise HTTPException(status_code=404, detail="Ejecución de actividad no encontrada")
     
     # Verificar permisos
-    actividad = db.query(Actividad).filter(Actividad.id == ejecucion.actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, ejecucion.actividad_id)
     if not actividad or not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tiene permisos para ver las evidencias de esta ejecución")
     
@@ -1078,7 +1476,7 @@ def eliminar_evidencia(
     if not ejecucion:
         raise HTTPException(status_code=404, detail="Ejecución no encontrada")
     
-    actividad = db.query(Actividad).filter(Actividad.id == ejecucion.actividad_id).first()
+    actividad = cargar_actividad_con_entidad(db, ejecucion.actividad_id)
     if not actividad or not tiene_permiso_actividad(current_user, actividad, db):
         raise HTTPException(status_code=403, detail="No tiene permisos para eliminar esta evidencia")
     
@@ -1,18 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
 import json
-from sqlalchemy.orm import Session, joinedload
+import logging
+from sqlalchemy.orm import Session, aliased, joinedload
 from typing import List, Optional
 from datetime import datetime
-from app.config.database import get_db
+from app.config.database import get_db, get_read_db
 from app.models.pqrs import PQRS, EstadoPQRS
 from app.models.user import User, UserRole
 from app.schemas.pqrs import PQRSCreate, PQRSUpdate, PQRS as PQRSSchema, PQRSWithDetails, PQRSResponse
 from app.models.alert import Alert
 from app.utils.auth import get_current_active_user, require_admin
 from app.utils.helpers import generate_radicado
+from app.utils.respuestas import RespuestaJSON, SerializadorFilas, valor_enum
 
 router = APIRouter(prefix="/pqrs", tags=["PQRS"])
+logger = logging.getLogger(__name__)
+
+# Columnas de PQRSWithDetails salvo los usuarios anidados, que salen del join
+serializar_pqrs = SerializadorFilas(
+    [c for c in PQRSWithDetails.model_fields if c not in ("created_by", "assigned_to")],
+    {c: valor_enum for c in ("tipo_identificacion", "medio_respuesta", "tipo_solicitud", "estado")},
+)
 
 @router.post("/", response_model=PQRSSchema)
 async def create_pqrs(
@@ -48,7 +57,7 @@ async def create_pqrs(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error validando PQRS: {e}")
+        logger.exception("Error validando PQRS")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error validando datos: {str(e)}"
@@ -130,9 +139,7 @@ async def create_pqrs(
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error creando PQRS: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error creando PQRS")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creando PQRS: {str(e)}"
@@ -144,14 +151,21 @@ async def get_pqrs(
     limit: int = Query(100, ge=1, le=1000),
     estado: Optional[EstadoPQRS] = None,
     assigned_to_me: bool = False,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtener lista de PQRS"""
-    query = db.query(PQRS).options(
-        joinedload(PQRS.created_by),
-        joinedload(PQRS.assigned_to)
-    )
+    # Proyección de columnas + usuarios por join: sin objetos ORM ni revalidar cada fila
+    Creador, Asignado = aliased(User), aliased(User)
+    query = db.query(
+        *serializar_pqrs.columnas(PQRS),
+        Creador.id.label("creador_id"),
+        Creador.username.label("creador_username"),
+        Creador.full_name.label("creador_full_name"),
+        Asignado.id.label("asignado_id"),
+        Asignado.username.label("asignado_username"),
+        Asignado.full_name.label("asignado_full_name"),
+    ).outerjoin(Creador, PQRS.created_by_id == Creador.id).outerjoin(Asignado, PQRS.assigned_to_id == Asignado.id)
     
     # Filtrar según rol
     if current_user.role == UserRole.ADMIN:
@@ -178,27 +192,25 @@ async def get_pqrs(
     # Ordenar por fecha de creación (más recientes primero)
     query = query.order_by(PQRS.created_at.desc())
     
-    pqrs_list = query.offset(skip).limit(limit).all()
+    filas = query.offset(skip).limit(limit).all()
     
     # Convertir a formato con detalles
     result = []
-    for pqrs in pqrs_list:
-        pqrs_dict = {
-            **pqrs.__dict__,
-            "created_by": {
-                "id": pqrs.created_by.id,
-                "username": pqrs.created_by.username,
-                "full_name": pqrs.created_by.full_name
-            } if pqrs.created_by else None,
-            "assigned_to": {
-                "id": pqrs.assigned_to.id,
-                "username": pqrs.assigned_to.username,
-                "full_name": pqrs.assigned_to.full_name
-            } if pqrs.assigned_to else None
-        }
+    for fila in filas:
+        pqrs_dict = serializar_pqrs.fila(fila)
+        pqrs_dict["created_by"] = {
+            "id": fila.creador_id,
+            "username": fila.creador_username,
+            "full_name": fila.creador_full_name
+        } if fila.creador_id is not None else None
+        pqrs_dict["assigned_to"] = {
+            "id": fila.asignado_id,
+            "username": fila.asignado_username,
+            "full_name": fila.asignado_full_name
+        } if fila.asignado_id is not None else None
         result.append(pqrs_dict)
     
-    return result
+    return RespuestaJSON(result)
 
 @router.get("/{pqrs_id}", response_model=PQRSWithDetails)
 async def get_pqrs_by_id(
@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import or_, exists
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from typing import List, Optional, Dict, Any
 from app.config.database import get_db
 from app.models.user import User, UserRole, UserType
 from app.models.entity import Entity
-from app.schemas.user import UserCreate, UserUpdate, UserResponse, ChangePasswordRequest
+from app.models.secretaria import Secretaria
+from app.config.settings import settings
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, ChangePasswordRequest, BulkUserResult, BulkUserResponse
 from app.utils.auth import (
     get_password_hash, 
+    hash_passwords,
     get_current_user, 
     require_superadmin, 
     require_admin_or_superadmin,
     check_entity_access
 )
+from app.utils.secretarias import normalizar_nombre, resolver_secretaria_id
+import csv
+import io
+import json
+import re
 
 router = APIRouter()
 
@@ -26,31 +39,52 @@ async def list_secretarias(
     - SUPERADMIN: puede consultar por cualquier entidad si especifica entity_id; si no, retorna vacío.
     - ADMIN/SECRETARIO: retorna las secretarías dentro de su propia entidad.
     """
-    query = db.query(User.secretaria).filter(
-        User.secretaria.isnot(None),
-        User.secretaria != ""
-    )
-
     if current_user.role == UserRole.SUPERADMIN:
-        if entity_id:
-            query = query.filter(User.entity_id == entity_id)
-        else:
+        if not entity_id:
             # Sin entity_id explícito, no retornar global para evitar mezclar entre entidades
             return []
     else:
         # Admin/Secretario limitados a su entidad
         if not current_user.entity_id:
             return []
-        query = query.filter(User.entity_id == current_user.entity_id)
+        entity_id = current_user.entity_id
 
-    rows = query.distinct().all()
-    secretarias = sorted([r[0] for r in rows if r and r[0]], key=lambda s: s.lower())
+    # Secretarías de la entidad con al menos un usuario (join por FK indexada)
+    con_usuarios = exists().where(User.secretaria_id == Secretaria.id)
+    rows = db.query(Secretaria.nombre).filter(
+        Secretaria.entity_id == entity_id,
+        con_usuarios
+    ).all()
+    # Usuarios aún sin secretaria_id (registros previos a la migración)
+    legacy = db.query(User.secretaria).filter(
+        User.entity_id == entity_id,
+        User.secretaria_id.is_(None),
+        User.secretaria.isnot(None),
+        User.secretaria != ""
+    ).distinct().all()
+    nombres = {r[0] for r in rows + legacy if r and r[0]}
+    secretarias = sorted(nombres, key=lambda s: s.lower())
     return secretarias
 
+# Columnas de la vista compacta del listado (sin allowed_modules ni datos de ciudadano)
+COLUMNAS_COMPACTAS = (
+    User.id, User.username, User.full_name, User.email, User.role,
+    User.entity_id, User.secretaria, User.secretaria_id, User.is_active,
+)
+
+
 @router.get("/users/", response_model=List[UserResponse])
 async def get_users(
+    response: Response,
     role: Optional[str] = Query(None),
     entity_id: Optional[int] = Query(None),
+    secretaria: Optional[str] = Query(None),
+    secretaria_id: Optional[int] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    q: Optional[str] = Query(None, description="Búsqueda en username, nombre completo o email"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Tamaño de página; sin limit se retornan todos"),
+    cursor: Optional[int] = Query(None, description="Id del último usuario de la página anterior (X-Next-Cursor)"),
+    compact: bool = Query(False, description="Solo id, username, full_name, email, role, entity_id, secretaria, is_active"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -59,8 +93,11 @@ async def get_users(
     - Superadmin: puede ver todos los usuarios de todas las entidades
     - Admin: puede ver solo usuarios de su entidad
     - Secretarios: pueden ver solo otros secretarios de su entidad
+
+    Paginación por cursor (keyset sobre id): con `limit` la respuesta trae como mucho `limit`
+    usuarios ordenados por id y, si hay más, la cabecera `X-Next-Cursor` con el valor para `cursor`.
     """
-    query = db.query(User)
+    query = db.query(*COLUMNAS_COMPACTAS) if compact else db.query(User)
     
     # Superadmin puede ver todos los usuarios
     if current_user.role == UserRole.SUPERADMIN:
@@ -92,10 +129,231 @@ async def get_users(
             User.role == UserRole.SECRETARIO,
             User.entity_id == current_user.entity_id
         )
-    
-    users = query.all()
+
+    if secretaria_id:
+        query = query.filter(User.secretaria_id == secretaria_id)
+    elif secretaria:
+        query = query.filter(User.secretaria == secretaria)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if q and q.strip():
+        escapado = q.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        patron = f"%{escapado}%"
+        query = query.filter(or_(
+            User.username.ilike(patron, escape="\\"),
+            User.full_name.ilike(patron, escape="\\"),
+            User.email.ilike(patron, escape="\\")
+        ))
+
+    query = query.order_by(User.id)
+    if cursor is not None:
+        query = query.filter(User.id > cursor)
+    if limit is not None:
+        # Se pide una fila extra solo para saber si hay página siguiente
+        users = query.limit(limit + 1).all()
+        if len(users) > limit:
+            users = users[:limit]
+            response.headers["X-Next-Cursor"] = str(users[-1].id)
+    else:
+        users = query.all()
+
+    if compact:
+        return JSONResponse(
+            content=jsonable_encoder([dict(u._mapping) for u in users]),
+            headers={k: v for k, v in response.headers.items() if k.lower() == "x-next-cursor"}
+        )
     return users
 
+def modulos_habilitados(entity) -> List[str]:
+    """Módulos que la entidad tiene activos y que se pueden asignar a sus usuarios"""
+    valid_modules = []
+    if entity.enable_pqrs:
+        valid_modules.append("pqrs")
+    if entity.enable_planes_institucionales:
+        valid_modules.append("planes_institucionales")
+    if entity.enable_contratacion:
+        valid_modules.append("contratacion")
+    if getattr(entity, 'enable_pdm', False):
+        valid_modules.append("pdm")
+    return valid_modules
+
+
+def _filas_csv(contenido: bytes) -> List[Dict[str, Any]]:
+    """Filas de un CSV con encabezados; allowed_modules separados por ';' o '|'"""
+    texto = contenido.decode("utf-8-sig")
+    filas = []
+    for fila in csv.DictReader(io.StringIO(texto)):
+        limpia = {
+            (k or "").strip(): (v.strip() if isinstance(v, str) else v)
+            for k, v in fila.items() if k
+        }
+        limpia = {k: v for k, v in limpia.items() if v not in ("", None)}
+        if "allowed_modules" in limpia:
+            limpia["allowed_modules"] = [m.strip() for m in re.split(r"[;|]", limpia["allowed_modules"]) if m.strip()]
+        filas.append(limpia)
+    return filas
+
+
+def _filas_json(data: Any) -> List[Dict[str, Any]]:
+    if isinstance(data, dict):
+        data = data.get("users")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Se esperaba una lista de usuarios o {\"users\": [...]}")
+    return [fila if isinstance(fila, dict) else {} for fila in data]
+
+
+async def leer_filas_bulk(request: Request) -> List[Dict[str, Any]]:
+    """Lee las filas del cuerpo: JSON, CSV (text/csv) o un archivo .csv/.json en multipart (campo 'file')"""
+    content_type = request.headers.get("content-type", "").lower()
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            archivo = form.get("file")
+            if archivo is None or not hasattr(archivo, "read"):
+                raise HTTPException(status_code=400, detail="Falta el archivo en el campo 'file'")
+            contenido = await archivo.read()
+            if (archivo.filename or "").lower().endswith(".json"):
+                return _filas_json(json.loads(contenido))
+            return _filas_csv(contenido)
+        if "json" in content_type:
+            return _filas_json(await request.json())
+        return _filas_csv(await request.body())
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"No se pudo leer el archivo: {str(e)}")
+
+
+@router.post("/users/bulk/", response_model=BulkUserResponse)
+async def bulk_create_users(
+    request: Request,
+    entity_id: Optional[int] = Query(None, description="Entidad por defecto para filas sin entity_id (superadmin)"),
+    atomico: bool = Query(False, description="Si alguna fila tiene errores no se crea ninguna"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Alta masiva de usuarios desde JSON o CSV (mismas columnas que POST /users/).
+    Aplica las reglas de create_user por fila, valida unicidad con dos consultas para todo el lote,
+    hashea las contraseñas en paralelo y crea las filas válidas en una sola transacción.
+    """
+    if current_user.role not in [UserRole.SUPERADMIN, UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="No tienes permisos para crear usuarios")
+
+    filas = await leer_filas_bulk(request)
+    if not filas:
+        raise HTTPException(status_code=400, detail="No se recibieron usuarios")
+    if len(filas) > settings.bulk_users_max_rows:
+        raise HTTPException(status_code=400, detail=f"Máximo {settings.bulk_users_max_rows} usuarios por lote")
+
+    resultados: List[BulkUserResult] = []
+    candidatos: List[tuple] = []  # (resultado, UserCreate)
+
+    # 1. Validación de esquema y permisos por fila
+    for numero, fila in enumerate(filas, start=1):
+        resultado = BulkUserResult(fila=numero, username=fila.get("username"), estado="error")
+        resultados.append(resultado)
+        if current_user.role == UserRole.ADMIN:
+            fila["entity_id"] = current_user.entity_id
+        elif entity_id and not fila.get("entity_id"):
+            fila["entity_id"] = entity_id
+        try:
+            user_data = UserCreate(**fila)
+        except ValidationError as e:
+            resultado.errores = [
+                f"{'.'.join(str(p) for p in err['loc']) or 'fila'}: {err['msg']}" for err in e.errors()
+            ]
+            continue
+        if current_user.role == UserRole.ADMIN and user_data.role not in [UserRole.ADMIN, UserRole.SECRETARIO]:
+            resultado.errores.append("Solo puedes crear administradores o secretarios")
+            continue
+        candidatos.append((resultado, user_data))
+
+    # 2. Entidades, módulos y unicidad en bloque
+    entity_ids = {u.entity_id for _, u in candidatos if u.entity_id}
+    entidades = {e.id: e for e in db.query(Entity).filter(Entity.id.in_(entity_ids)).all()} if entity_ids else {}
+    usernames = {u.username for _, u in candidatos}
+    emails = {u.email for _, u in candidatos}
+    usernames_existentes = {r[0] for r in db.query(User.username).filter(User.username.in_(usernames)).all()} if usernames else set()
+    emails_existentes = {r[0] for r in db.query(User.email).filter(User.email.in_(emails)).all()} if emails else set()
+
+    validos: List[tuple] = []
+    vistos_username, vistos_email = set(), set()
+    for resultado, user_data in candidatos:
+        errores = resultado.errores
+        if user_data.entity_id:
+            entity = entidades.get(user_data.entity_id)
+            if not entity:
+                errores.append("La entidad especificada no existe")
+            elif not entity.is_active:
+                errores.append("La entidad está inactiva")
+            elif user_data.allowed_modules:
+                valid_modules = modulos_habilitados(entity)
+                errores.extend(
+                    f"El módulo '{m}' no está activo en esta entidad"
+                    for m in user_data.allowed_modules if m not in valid_modules
+                )
+        if user_data.username in usernames_existentes:
+            errores.append("El nombre de usuario ya existe")
+        elif user_data.username in vistos_username:
+            errores.append("Nombre de usuario repetido en el lote")
+        if user_data.email in emails_existentes:
+            errores.append("El email ya está en uso")
+        elif user_data.email in vistos_email:
+            errores.append("Email repetido en el lote")
+        vistos_username.add(user_data.username)
+        vistos_email.add(user_data.email)
+        if not errores:
+            validos.append((resultado, user_data))
+
+    hay_errores = len(validos) < len(resultados)
+    if atomico and hay_errores:
+        for resultado, _ in validos:
+            resultado.estado = "omitido"
+    elif validos:
+        # 3. Hash en paralelo y alta en una sola transacción
+        hashes = await hash_passwords([u.password for _, u in validos])
+        try:
+            nuevos = []
+            for (resultado, user_data), hashed_password in zip(validos, hashes):
+                secretaria_nombre = normalizar_nombre(user_data.secretaria)
+                db_user = User(
+                    username=user_data.username,
+                    email=user_data.email,
+                    full_name=user_data.full_name,
+                    hashed_password=hashed_password,
+                    role=user_data.role,
+                    entity_id=user_data.entity_id,
+                    user_type=user_data.user_type,
+                    allowed_modules=user_data.allowed_modules or [],
+                    secretaria=secretaria_nombre,
+                    secretaria_id=resolver_secretaria_id(db, user_data.entity_id, secretaria_nombre, crear=True),
+                    cedula=user_data.cedula,
+                    telefono=user_data.telefono,
+                    direccion=user_data.direccion,
+                    is_active=True
+                )
+                db.add(db_user)
+                nuevos.append((resultado, db_user))
+            db.flush()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="Conflicto de unicidad al crear el lote (otro proceso creó usuarios en paralelo); reintente"
+            )
+        for resultado, db_user in nuevos:
+            resultado.estado = "creado"
+            resultado.id = db_user.id
+
+    creados = sum(1 for r in resultados if r.estado == "creado")
+    return BulkUserResponse(
+        total=len(resultados),
+        creados=creados,
+        con_errores=sum(1 for r in resultados if r.estado == "error"),
+        resultados=resultados
+    )
+
+
 @router.get("/users/{user_id}/", response_model=UserResponse)
 async def get_user(
     user_id: int,
@@ -165,15 +423,7 @@ async def create_user(
         
         # Validar que los módulos asignados están activos en la entidad
         if user_data.allowed_modules:
-            valid_modules = []
-            if entity.enable_pqrs:
-                valid_modules.append("pqrs")
-            if entity.enable_planes_institucionales:
-                valid_modules.append("planes_institucionales")
-            if entity.enable_contratacion:
-                valid_modules.append("contratacion")
-            if getattr(entity, 'enable_pdm', False):
-                valid_modules.append("pdm")
+            valid_modules = modulos_habilitados(entity)
             
             # Verificar que todos los módulos solicitados están activos
             for module in user_data.allowed_modules:
@@ -209,22 +459,8 @@ async def create_user(
             normalized_user_type = ut_str
 
     # Si se proporciona una secretaría, asegurar que existe en la tabla secretarias (idempotente)
-    secretaria_nombre = (user_data.secretaria or '').strip() if user_data.secretaria else None
-    if secretaria_nombre and user_data.entity_id:
-        from app.models.secretaria import Secretaria
-        existing_secretaria = db.query(Secretaria).filter(
-            Secretaria.entity_id == user_data.entity_id,
-            Secretaria.nombre.ilike(secretaria_nombre)
-        ).first()
-        if not existing_secretaria:
-            # Crear automáticamente la secretaría
-            new_secretaria = Secretaria(
-                entity_id=user_data.entity_id,
-                nombre=secretaria_nombre,
-                is_active=True
-            )
-            db.add(new_secretaria)
-            db.flush()  # Asegurar que se crea antes del usuario
+    secretaria_nombre = normalizar_nombre(user_data.secretaria)
+    secretaria_id = resolver_secretaria_id(db, user_data.entity_id, secretaria_nombre, crear=True)
 
     # Crear el usuario
     db_user = User(
@@ -237,6 +473,7 @@ async def create_user(
         user_type=normalized_user_type,
         allowed_modules=user_data.allowed_modules or [],
         secretaria=secretaria_nombre,
+        secretaria_id=secretaria_id,
         is_active=True
     )
     
@@ -346,24 +583,11 @@ async def update_user(
             update_data["user_type"] = ut_str
 
     # Si se está actualizando la secretaría, asegurar que existe en la tabla secretarias (idempotente)
-    if "secretaria" in update_data:
-        secretaria_nombre = (update_data["secretaria"] or '').strip() if update_data["secretaria"] else None
-        if secretaria_nombre and user.entity_id:
-            from app.models.secretaria import Secretaria
-            existing_secretaria = db.query(Secretaria).filter(
-                Secretaria.entity_id == user.entity_id,
-                Secretaria.nombre.ilike(secretaria_nombre)
-            ).first()
-            if not existing_secretaria:
-                # Crear automáticamente la secretaría
-                new_secretaria = Secretaria(
-                    entity_id=user.entity_id,
-                    nombre=secretaria_nombre,
-                    is_active=True
-                )
-                db.add(new_secretaria)
-                db.flush()  # Asegurar que se crea antes de actualizar usuario
+    if "secretaria" in update_data or "entity_id" in update_data:
+        secretaria_nombre = normalizar_nombre(update_data.get("secretaria", user.secretaria))
+        entity_id = update_data.get("entity_id", user.entity_id)
         update_data["secretaria"] = secretaria_nombre
+        update_data["secretaria_id"] = resolver_secretaria_id(db, entity_id, secretaria_nombre, crear=True)
 
     # Aplicar las actualizaciones
     for field, value in update_data.items():
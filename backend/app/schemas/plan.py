@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Optional, List, Literal, Dict, Any
 from datetime import date, datetime
 from decimal import Decimal
 from app.models.plan import (
@@ -123,6 +123,7 @@ class Actividad(ActividadBase):
     """Schema de respuesta para actividad (simplificada)"""
     id: int
     componente_id: int
+    responsable_secretaria_id: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -198,6 +199,46 @@ class PlanInstitucionalCompleto(PlanInstitucional):
         from_attributes = True
 
 
+# ==================== SCHEMAS PARA OPERACIONES EN LOTE ====================
+
+class OperacionLote(BaseModel):
+    """
+    Operación individual dentro de un lote de cambios de un plan.
+    - create: `datos` según ComponenteProcesoCreate/ActividadCreate (sin plan_id/componente_id)
+    - update: `id` + `datos` según ComponenteProcesoUpdate/ActividadUpdate
+    - delete: `id`
+    Las actividades nuevas pueden apuntar a un componente creado en el mismo lote con `componente_ref`.
+    """
+    op: Literal["create", "update", "delete"]
+    tipo: Literal["componente", "actividad"]
+    id: Optional[int] = None
+    ref: Optional[str] = Field(None, max_length=100, description="Referencia temporal para componentes creados en el lote")
+    componente_id: Optional[int] = None
+    componente_ref: Optional[str] = Field(None, max_length=100)
+    datos: Dict[str, Any] = {}
+
+
+class LoteOperacionesRequest(BaseModel):
+    """Lote de operaciones aplicado en una sola transacción"""
+    operaciones: List[OperacionLote] = Field(..., min_length=1, max_length=500)
+
+
+class ResultadoOperacionLote(BaseModel):
+    """Resultado de una operación del lote"""
+    indice: int
+    op: str
+    tipo: str
+    id: int
+    ref: Optional[str] = None
+
+
+class LoteOperacionesResponse(BaseModel):
+    """Respuesta del lote: ids afectados y avance recalculado del plan"""
+    plan_id: int
+    resultados: List[ResultadoOperacionLote]
+    porcentaje_avance: Decimal
+
+
 # ==================== SCHEMAS PARA ESTADÍSTICAS Y REPORTES ====================
 
 class EstadisticasPlan(BaseModel):
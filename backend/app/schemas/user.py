@@ -44,6 +44,7 @@ class User(UserBase):
 
 class UserResponse(UserBase):
     id: int
+    secretaria_id: Optional[int] = None
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -51,6 +52,20 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# Alta masiva de usuarios
+class BulkUserResult(BaseModel):
+    fila: int  # 1 = primera fila de datos
+    username: Optional[str] = None
+    estado: str  # creado | error | omitido
+    id: Optional[int] = None
+    errores: List[str] = []
+
+class BulkUserResponse(BaseModel):
+    total: int
+    creados: int
+    con_errores: int
+    resultados: List[BulkUserResult]
+
 # Esquemas de autenticación
 class UserLogin(BaseModel):
     username: str
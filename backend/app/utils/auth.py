@@ -11,7 +11,14 @@ from app.models.user import User
 from app.schemas.user import TokenData
 from sqlalchemy.orm import Session
 from app.config.database import get_db
-from typing import Callable
+from typing import Callable, List
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
 
 # Configuración de encriptación
 pwd_context = CryptContext(
@@ -49,11 +56,47 @@ def get_password_hash(password: str) -> str:
     except Exception as e:
         # Log del error para debugging
         error_msg = f"Error hashing password: {str(e)}"
-        print(f"❌ {error_msg}")
-        print(f"   Password length: {len(password) if password else 0}")
-        print(f"   Password bytes: {len(password.encode('utf-8')) if password else 0}")
+        logger.error(error_msg, extra={
+            "password_length": len(password) if password else 0,
+            "password_bytes": len(password.encode('utf-8')) if password else 0,
+        })
         raise ValueError(error_msg)
 
+# Pool de procesos para hashear lotes de contraseñas (bcrypt es CPU-bound)
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        workers = settings.password_hash_workers or min(4, os.cpu_count() or 1)
+        _hash_pool = ProcessPoolExecutor(max_workers=workers)
+    return _hash_pool
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hashea varias contraseñas en paralelo fuera del event loop.
+    Usa el pool de procesos; si no se puede crear (entornos restringidos), cae a hilos.
+    """
+    global _hash_pool
+    loop = asyncio.get_running_loop()
+    pool = None
+    try:
+        pool = _get_hash_pool()
+        return list(await asyncio.gather(*(loop.run_in_executor(pool, get_password_hash, p) for p in passwords)))
+    except (BrokenProcessPool, OSError, NotImplementedError) as e:
+        if isinstance(e, BrokenProcessPool) and pool is not None and _hash_pool is pool:
+            # Un worker murió: el pool queda inservible; se descarta y el próximo lote crea uno nuevo
+            _hash_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Pool de procesos no disponible para hashing (%s); usando hilos", e)
+        return list(await asyncio.gather(*(loop.run_in_executor(None, get_password_hash, p) for p in passwords)))
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crear token JWT"""
     to_encode = data.copy()
@@ -157,8 +200,8 @@ def require_feature_enabled(feature_flag: str) -> Callable:
     def _checker(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
         if current_user.role.value == "superadmin":
             return True
-        from app.models.entity import Entity
-        entity = db.query(Entity).filter(Entity.id == current_user.entity_id).first()
+        from app.utils.entity_cache import entity_cache
+        entity = entity_cache.get_by_id(db, current_user.entity_id) if current_user.entity_id else None
         if not entity:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Entidad no encontrada para el usuario")
         if not getattr(entity, feature_flag, False):
@@ -0,0 +1,167 @@
+"""
+Cliente compartido para el API SODA de datos.gov.co (SECOP II).
+
+- Un solo httpx.AsyncClient por proceso (keep-alive y HTTP/2 si `h2` está instalado),
+  en lugar de abrir una conexión TLS nueva por request.
+- Caché en memoria LRU + TTL de respuestas, con clave en la consulta SoQL normalizada.
+- Coalescencia: consultas idénticas concurrentes comparten una sola llamada al upstream.
+  La llamada corre en su propia tarea: si se cancela el request que la inició, las demás
+  siguen esperándola (y el resultado igual queda en caché).
+
+Los resultados cacheados/compartidos son el mismo objeto para todos los llamadores:
+son de solo lectura, no se deben modificar.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config.settings import settings
+
+
+def normalizar_query(query: Optional[str]) -> str:
+    """
+    Normaliza una consulta SoQL para usarla como clave de caché:
+    colapsa espacios en blanco fuera de literales entre comillas simples.
+    """
+    if not query:
+        return ""
+    partes = []
+    en_literal = False
+    espacio_pendiente = False
+    for ch in query.strip():
+        if ch == "'":
+            en_literal = not en_literal
+        if not en_literal and ch.isspace():
+            espacio_pendiente = True
+            continue
+        if espacio_pendiente:
+            partes.append(" ")
+            espacio_pendiente = False
+        partes.append(ch)
+    return "".join(partes)
+
+
+class RespuestaCache:
+    """Caché LRU acotada con expiración por entrada (no es thread-safe; se usa desde el event loop)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expira, valor = item
+        if expira < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return valor
+
+    def set(self, key: str, valor: Any) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl_seconds, valor)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DatosGovClient:
+    """Cliente con pool de conexiones, caché y coalescencia de consultas a datos.gov.co"""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        cache_max_entries: int = 256,
+        cache_ttl_seconds: float = 300.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = RespuestaCache(cache_max_entries, cache_ttl_seconds)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._en_vuelo: Dict[str, "asyncio.Task"] = {}
+        self.upstream_calls = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=http2 and self._transport is None,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+            )
+        return self._client
+
+    async def _fetch(self, query: str):
+        params = {"$query": query} if query else None
+        self.upstream_calls += 1
+        response = await self._get_client().get(self.base_url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def _fetch_y_cachear(self, key: str):
+        data = await self._fetch(key)
+        self.cache.set(key, data)
+        return data
+
+    def _fin_en_vuelo(self, key: str, tarea: "asyncio.Task") -> None:
+        if self._en_vuelo.get(key) is tarea:
+            del self._en_vuelo[key]
+        # Evitar "Task exception was never retrieved" si nadie quedó esperando
+        if not tarea.cancelled():
+            tarea.exception()
+
+    async def consultar(self, query: Optional[str], usar_cache: bool = True):
+        """
+        Devuelve el JSON de la consulta, desde caché si está vigente (de solo lectura: el mismo
+        objeto se entrega a todos los llamadores).
+        Con usar_cache=False se va siempre al upstream (p. ej. la sincronización del espejo SECOP).
+        """
+        key = normalizar_query(query)
+        if not usar_cache:
+            return await self._fetch(key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        tarea = self._en_vuelo.get(key)
+        if tarea is None:
+            tarea = asyncio.create_task(self._fetch_y_cachear(key))
+            self._en_vuelo[key] = tarea
+            tarea.add_done_callback(lambda t, key=key: self._fin_en_vuelo(key, t))
+        # shield: cancelar a un llamador (p. ej. cliente desconectado) no cancela la consulta compartida
+        return await asyncio.shield(tarea)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+datos_gov_client = DatosGovClient(
+    base_url=settings.datos_gov_base_url,
+    timeout=settings.datos_gov_timeout_seconds,
+    cache_max_entries=settings.datos_gov_cache_max_entries,
+    cache_ttl_seconds=settings.datos_gov_cache_ttl_seconds,
+)
@@ -0,0 +1,113 @@
+"""
+Métricas del pool de conexiones a la BD.
+
+- QueuePoolMedido: QueuePool que mide cuánto espera cada checkout por una conexión libre,
+  cuenta los timeouts (sqlalchemy.exc.TimeoutError) y los checkouts servidos con overflow.
+- instrumentar_pool(): eventos connect/checkout/checkin para conexiones abiertas y en uso
+  (también con NullPool, donde cada checkout abre una conexión nueva).
+
+No importa app.config.database: lo usa al construir el engine.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Límites superiores (segundos) de los buckets del histograma de espera por conexión
+BUCKETS_ESPERA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.buckets: List[int] = [0] * (len(BUCKETS_ESPERA) + 1)
+
+    def observar_espera(self, segundos: float, overflow: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            self.buckets[bisect.bisect_left(BUCKETS_ESPERA, segundos)] += 1
+            if overflow:
+                self.overflow_checkouts += 1
+
+    def contar(self, campo: str) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def snapshot(self, pool: Any) -> Dict[str, Any]:
+        with self._lock:
+            datos: Dict[str, Any] = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connections_opened": self.connects,
+                "in_use": self.checkouts - self.checkins,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.espera_total, 6),
+                "wait_seconds_max": round(self.espera_maxima, 6),
+                "wait_seconds_avg": round(self.espera_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_histogram": {
+                    **{f"le_{limite}": n for limite, n in zip(BUCKETS_ESPERA, self.buckets)},
+                    "le_inf": self.buckets[-1],
+                },
+            }
+        if isinstance(pool, QueuePool):
+            datos.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "timeout_seconds": pool.timeout(),
+            })
+        return datos
+
+
+pool_metrics = PoolMetrics()
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que registra la espera de cada checkout en pool_metrics"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.contar("timeouts")
+            raise
+        pool_metrics.observar_espera(time.perf_counter() - inicio, overflow=self.checkedout() > self.size())
+        return conexion
+
+
+def instrumentar_pool(engine) -> None:
+    """Cuenta conexiones abiertas y checkins; con NullPool también los checkouts (sin espera)"""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        pool_metrics.contar("connects")
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        pool_metrics.contar("checkins")
+
+    if not isinstance(engine.pool, QueuePoolMedido):
+        @event.listens_for(engine, "checkout")
+        def _checkout(dbapi_connection, connection_record, connection_proxy):
+            pool_metrics.observar_espera(0.0, overflow=False)
@@ -0,0 +1,114 @@
+"""
+Caché en proceso de entidades por id y por slug (read-through).
+
+Las entidades cambian muy poco y se consultan en casi todos los requests (ventanilla pública,
+rutas /api/pdm/{slug}/..., flags de módulos). Se guardan copias desacopladas de la sesión
+(EntitySnapshot), nunca objetos ORM, para poder compartirlas entre requests.
+
+Invalidación por versión: create/update/toggle/delete llaman a entity_cache.invalidate(),
+que incrementa la versión y vacía la caché; una carga que empezó con una versión anterior no se
+guarda. El TTL acota el desfase entre workers, que no comparten memoria.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.entity import Entity
+
+
+class EntitySnapshot(SimpleNamespace):
+    """Copia de solo lectura de las columnas de una entidad (sirve con response_model/from_attributes)"""
+
+
+def snapshot_entity(entity: Entity) -> EntitySnapshot:
+    return EntitySnapshot(**{c.name: getattr(entity, c.name) for c in Entity.__table__.columns})
+
+
+def calcular_etag(datos: Any) -> str:
+    canonical = json.dumps(datos, sort_keys=True, default=str, ensure_ascii=False)
+    return '"' + hashlib.sha1(canonical.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_entidad(entity: EntitySnapshot) -> str:
+    return calcular_etag(vars(entity))
+
+
+class EntityCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._lock = threading.Lock()
+        self._por_id: Dict[int, Tuple[float, EntitySnapshot]] = {}
+        self._por_slug: Dict[str, Tuple[float, EntitySnapshot]] = {}
+        self._publicas: Optional[Tuple[float, List[EntitySnapshot], str]] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._por_id.clear()
+            self._por_slug.clear()
+            self._publicas = None
+
+    def _leer(self, tabla: Dict[Any, Tuple[float, EntitySnapshot]], clave: Any) -> Optional[EntitySnapshot]:
+        item = tabla.get(clave)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def _guardar(self, version: int, entity: EntitySnapshot) -> None:
+        with self._lock:
+            if self.ttl_seconds <= 0 or version != self.version:
+                return
+            expira = time.monotonic() + self.ttl_seconds
+            self._por_id[entity.id] = (expira, entity)
+            self._por_slug[entity.slug] = (expira, entity)
+
+    def get_by_id(self, db: Session, entity_id: int) -> Optional[EntitySnapshot]:
+        cached = self._leer(self._por_id, entity_id)
+        if cached is not None:
+            return cached
+        version = self.version
+        entity = db.query(Entity).filter(Entity.id == entity_id).first()
+        if entity is None:
+            return None
+        snapshot = snapshot_entity(entity)
+        self._guardar(version, snapshot)
+        return snapshot
+
+    def get_by_slug(self, db: Session, slug: str) -> Optional[EntitySnapshot]:
+        """Entidad por slug, activa o no (el llamador decide qué hacer con las inactivas)"""
+        cached = self._leer(self._por_slug, slug)
+        if cached is not None:
+            return cached
+        version = self.version
+        entity = db.query(Entity).filter(Entity.slug == slug).first()
+        if entity is None:
+            return None
+        snapshot = snapshot_entity(entity)
+        self._guardar(version, snapshot)
+        return snapshot
+
+    def get_public(self, db: Session) -> Tuple[List[EntitySnapshot], str]:
+        """Entidades activas y el ETag del listado"""
+        publicas = self._publicas
+        if publicas is not None and publicas[0] >= time.monotonic():
+            return publicas[1], publicas[2]
+        version = self.version
+        entidades = [snapshot_entity(e) for e in db.query(Entity).filter(Entity.is_active == True).all()]
+        etag = calcular_etag([vars(e) for e in entidades])
+        with self._lock:
+            if self.ttl_seconds > 0 and version == self.version:
+                self._publicas = (time.monotonic() + self.ttl_seconds, entidades, etag)
+        for entity in entidades:
+            self._guardar(version, entity)
+        return entidades, etag
+
+
+entity_cache = EntityCache(ttl_seconds=settings.entity_cache_ttl_seconds)
@@ -0,0 +1,203 @@
+"""
+Métricas HTTP y de BD por request en formato de texto de Prometheus (GET /metrics).
+
+- MetricsMiddleware (ASGI puro): histograma de latencia por método, plantilla de ruta
+  ("/api/pdm/{slug}/actividades", no la URL concreta) y status; requests en curso.
+- instrumentar_consultas(engine): eventos before/after_cursor_execute que acumulan en el
+  request actual (contextvar) cuántas consultas hizo y cuánto tardaron.
+- render_prometheus(): exposición de texto, incluye también las métricas del pool.
+
+Sin dependencias externas; los histogramas guardan conteos por bucket y solo se
+acumulan al exponerlos, así el costo por request es un bisect y unas sumas.
+"""
+
+import bisect
+import contextvars
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.utils.db_metrics import BUCKETS_ESPERA, pool_metrics
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BUCKETS_TIEMPO_BD = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+RUTA_SIN_MATCH = "__unmatched__"
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str], buckets: Sequence[float]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        # etiquetas -> [conteos por bucket (no acumulados) + "+Inf", suma, total]
+        self.series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observar(self, valores: Tuple[str, ...], valor: float) -> None:
+        serie = self.series.get(valores)
+        if serie is None:
+            serie = self.series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        serie[0][bisect.bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def render(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, (conteos, suma, total) in sorted(self.series.items()):
+            base = ",".join(f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, valores))
+            sep = "," if base else ""
+            acumulado = 0
+            for limite, n in zip(self.buckets, conteos):
+                acumulado += n
+                lineas.append(f'{self.nombre}_bucket{{{base}{sep}le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_bucket{{{base}{sep}le="+Inf"}} {total}')
+            lineas.append(f"{self.nombre}_sum{{{base}}} {suma}")
+            lineas.append(f"{self.nombre}_count{{{base}}} {total}")
+        return lineas
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+latencia_http = Histograma(
+    "http_request_duration_seconds", "Duración de los requests HTTP por ruta",
+    ("method", "route", "status"), BUCKETS_LATENCIA,
+)
+consultas_por_request = Histograma(
+    "db_queries_per_request", "Consultas SQL emitidas por request",
+    ("method", "route"), BUCKETS_CONSULTAS,
+)
+tiempo_bd_por_request = Histograma(
+    "db_time_per_request_seconds", "Tiempo total en consultas SQL por request",
+    ("method", "route"), BUCKETS_TIEMPO_BD,
+)
+_en_curso = 0
+
+
+class EstadisticasRequest:
+    __slots__ = ("consultas", "tiempo_bd")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+
+
+# Estadísticas de BD del request actual (se copia a los hilos de run_in_threadpool)
+_request_actual: contextvars.ContextVar[Optional[EstadisticasRequest]] = contextvars.ContextVar(
+    "metricas_request", default=None
+)
+
+
+def instrumentar_consultas(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get("metricas_inicio")
+        if not inicios:
+            return
+        duracion = time.perf_counter() - inicios.pop()
+        stats = _request_actual.get()
+        if stats is not None:
+            stats.consultas += 1
+            stats.tiempo_bd += duracion
+
+
+_plantillas: Dict[Any, str] = {}
+
+
+def plantilla_ruta(scope) -> str:
+    """Plantilla de la ruta que atendió el request ("/api/pdm/{slug}/actividades")"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return RUTA_SIN_MATCH
+    plantilla = _plantillas.get(endpoint)
+    if plantilla is None:
+        # El router deja el endpoint en el scope; su ruta da la plantilla con el prefijo completo
+        for ruta in scope["app"].routes:
+            if getattr(ruta, "endpoint", None) is endpoint:
+                plantilla = ruta.path
+                break
+        else:
+            plantilla = RUTA_SIN_MATCH
+        _plantillas[endpoint] = plantilla
+    return plantilla
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latencia, status y consultas SQL por plantilla de ruta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global _en_curso
+        status = [500]
+
+        async def send_con_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        stats = EstadisticasRequest()
+        token = _request_actual.set(stats)
+        _en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_con_status)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _en_curso -= 1
+            _request_actual.reset(token)
+            metodo = scope["method"]
+            ruta = plantilla_ruta(scope)
+            latencia_http.observar((metodo, ruta, str(status[0])), duracion)
+            consultas_por_request.observar((metodo, ruta), stats.consultas)
+            tiempo_bd_por_request.observar((metodo, ruta), stats.tiempo_bd)
+
+
+def _render_pool() -> List[str]:
+    from app.config.database import engine
+
+    datos = pool_metrics.snapshot(engine.pool)
+    lineas = []
+    for nombre, tipo, ayuda, valor in (
+        ("db_pool_in_use", "gauge", "Conexiones del pool en uso", datos["in_use"]),
+        ("db_pool_checkouts_total", "counter", "Checkouts del pool", datos["checkouts"]),
+        ("db_pool_overflow_checkouts_total", "counter", "Checkouts servidos con overflow", datos["overflow_checkouts"]),
+        ("db_pool_timeouts_total", "counter", "Timeouts esperando una conexión", datos["timeouts"]),
+        ("db_pool_connections_opened_total", "counter", "Conexiones abiertas", datos["connections_opened"]),
+    ):
+        lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}", f"{nombre} {valor}"]
+
+    lineas += ["# HELP db_pool_wait_seconds Espera por una conexión libre", "# TYPE db_pool_wait_seconds histogram"]
+    acumulado = 0
+    for limite, n in zip(BUCKETS_ESPERA, datos["wait_histogram"].values()):
+        acumulado += n
+        lineas.append(f'db_pool_wait_seconds_bucket{{le="{limite}"}} {acumulado}')
+    lineas.append(f'db_pool_wait_seconds_bucket{{le="+Inf"}} {datos["checkouts"]}')
+    lineas.append(f"db_pool_wait_seconds_sum {datos['wait_seconds_total']}")
+    lineas.append(f"db_pool_wait_seconds_count {datos['checkouts']}")
+    return lineas
+
+
+def render_prometheus() -> str:
+    lineas = [
+        "# HELP http_requests_in_progress Requests HTTP en curso",
+        "# TYPE http_requests_in_progress gauge",
+        f"http_requests_in_progress {_en_curso}",
+    ]
+    for histograma in (latencia_http, consultas_por_request, tiempo_bd_por_request):
+        lineas += histograma.render()
+    lineas += _render_pool()
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,161 @@
+"""
+Logging estructurado (JSON por línea) sin bloquear el event loop.
+
+- Los loggers de `app.*` escriben en una cola (QueueHandler); un hilo (QueueListener)
+  formatea y escribe en stdout. En el request solo se arma el registro y se encola.
+- request_id_var: id del request actual (header X-Request-ID o uno nuevo), lo pone
+  RequestContextMiddleware y se agrega a cada registro.
+- Log de acceso por request: siempre los errores (status >= 400) y los lentos;
+  los exitosos se muestrean con LOG_ACCESS_SAMPLE_RATE.
+
+LOG_FORMAT=text deja un formato legible para desarrollo local.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config.settings import settings
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+_REQUEST_ID_VALIDO = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+# Atributos propios de LogRecord; el resto viene de `extra=` y va como campo del JSON
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+access_logger = logging.getLogger("app.access")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_text:
+            datos["exc"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Copia el request id del contextvar al registro (en el hilo que loguea, no en el listener)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class QueueHandlerEstructurado(QueueHandler):
+    """Como QueueHandler, pero conserva los campos extra y deja el traceback en exc_text"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configurar_logging() -> None:
+    """Configura el logger `app` una sola vez por proceso"""
+    global _listener
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "text":
+        salida.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+    else:
+        salida.setFormatter(JsonFormatter())
+
+    cola: "queue.SimpleQueue" = queue.SimpleQueue()  # Sin límite: put nunca bloquea
+    handler = QueueHandlerEstructurado(cola)
+    handler.addFilter(RequestIdFilter())
+
+    raiz = logging.getLogger("app")
+    raiz.handlers = [handler]
+    raiz.setLevel(settings.log_level.upper())
+    raiz.propagate = False
+
+    _listener = QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestContextMiddleware:
+    """Middleware ASGI: request id (X-Request-ID) en contextvar y respuesta, y log de acceso muestreado"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        entrante = None
+        for nombre, valor in scope.get("headers", ()):
+            if nombre == b"x-request-id":
+                entrante = valor.decode("latin-1")
+                break
+        request_id = entrante if entrante and _REQUEST_ID_VALIDO.match(entrante) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = [500]
+
+        async def send_con_id(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_con_id)
+        finally:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            if (
+                status[0] >= 400
+                or duracion_ms >= settings.log_slow_request_ms
+                or random.random() < settings.log_access_sample_rate
+            ):
+                from app.utils.http_metrics import plantilla_ruta
+
+                nivel = logging.ERROR if status[0] >= 500 else logging.WARNING if status[0] >= 400 else logging.INFO
+                access_logger.log(nivel, "request", extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": plantilla_ruta(scope),
+                    "status": status[0],
+                    "duration_ms": round(duracion_ms, 2),
+                })
+            request_id_var.reset(token)
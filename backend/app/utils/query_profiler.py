@@ -0,0 +1,176 @@
+"""
+Detector de consultas lentas y patrones N+1 (opcional: QUERY_PROFILER_ENABLED=true,
+pensado para development/staging).
+
+- Cada consulta que supera `query_profiler_slow_ms` se registra con la ruta que la emitió.
+- Al terminar un request, cada sentencia normalizada que se ejecutó más de
+  `query_profiler_n_plus_one_threshold` veces se marca como posible N+1.
+- Un acumulado por sentencia (veces, tiempo total/máximo, rutas) alimenta el reporte
+  GET /api/metrics/queries, ordenado por tiempo total.
+"""
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+
+from app.config.settings import settings
+from app.utils.http_metrics import plantilla_ruta
+
+logger = logging.getLogger(__name__)
+
+_ESPACIOS = re.compile(r"\s+")
+_PARAM_NOMBRADO = re.compile(r"%\(\w+\)s")
+_LISTA_PARAMS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMEROS = re.compile(r"\b\d+\b")
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+
+# Tope de sentencias distintas en el acumulado (las nuevas se descartan al llenarse)
+MAX_SENTENCIAS = 500
+
+
+def normalizar_sentencia(sentencia: str) -> str:
+    """Quita literales y colapsa listas IN (?, ?, ...) para agrupar la misma consulta"""
+    sentencia = _PARAM_NOMBRADO.sub("?", sentencia)
+    sentencia = _CADENAS.sub("?", sentencia)
+    sentencia = _NUMEROS.sub("?", sentencia)
+    sentencia = _ESPACIOS.sub(" ", sentencia).strip()
+    return _LISTA_PARAMS.sub("(?)", sentencia)
+
+
+class PerfilRequest:
+    __slots__ = ("scope", "sentencias", "tiempos")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.sentencias: Counter = Counter()
+        self.tiempos: Dict[str, float] = {}
+
+    @property
+    def ruta(self) -> str:
+        return f"{self.scope['method']} {plantilla_ruta(self.scope)}"
+
+
+_perfil_actual: contextvars.ContextVar[Optional[PerfilRequest]] = contextvars.ContextVar(
+    "perfil_consultas", default=None
+)
+
+
+class ReporteConsultas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.sentencias: Dict[str, Dict[str, Any]] = {}
+            self.descartadas = 0
+            self.desde = time.time()
+
+    def registrar(self, sentencia: str, duracion: float, ruta: Optional[str]) -> None:
+        with self._lock:
+            item = self.sentencias.get(sentencia)
+            if item is None:
+                if len(self.sentencias) >= MAX_SENTENCIAS:
+                    self.descartadas += 1
+                    return
+                item = self.sentencias[sentencia] = {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0, "n_plus_one": 0, "routes": Counter(),
+                }
+            ms = duracion * 1000
+            item["count"] += 1
+            item["total_ms"] += ms
+            item["max_ms"] = max(item["max_ms"], ms)
+            if ms >= settings.query_profiler_slow_ms:
+                item["slow"] += 1
+            if ruta:
+                item["routes"][ruta] += 1
+
+    def marcar_n_plus_one(self, sentencia: str) -> None:
+        with self._lock:
+            item = self.sentencias.get(sentencia)
+            if item is not None:
+                item["n_plus_one"] += 1
+
+    def top(self, limite: int = 20, orden: str = "total_ms") -> Dict[str, Any]:
+        with self._lock:
+            filas = sorted(self.sentencias.items(), key=lambda kv: kv[1].get(orden, 0), reverse=True)[:limite]
+            return {
+                "since": self.desde,
+                "distinct_statements": len(self.sentencias),
+                "discarded_statements": self.descartadas,
+                "slow_ms": settings.query_profiler_slow_ms,
+                "n_plus_one_threshold": settings.query_profiler_n_plus_one_threshold,
+                "top": [
+                    {
+                        "statement": sentencia,
+                        "count": item["count"],
+                        "total_ms": round(item["total_ms"], 3),
+                        "avg_ms": round(item["total_ms"] / item["count"], 3),
+                        "max_ms": round(item["max_ms"], 3),
+                        "slow": item["slow"],
+                        "n_plus_one_requests": item["n_plus_one"],
+                        "routes": dict(item["routes"].most_common(5)),
+                    }
+                    for sentencia, item in filas
+                ],
+            }
+
+
+reporte_consultas = ReporteConsultas()
+
+
+def instrumentar_perfilador(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("perfil_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get("perfil_inicio")
+        if not inicios:
+            return
+        duracion = time.perf_counter() - inicios.pop()
+        sentencia = normalizar_sentencia(statement)
+        perfil = _perfil_actual.get()
+        ruta = perfil.ruta if perfil is not None else None
+        reporte_consultas.registrar(sentencia, duracion, ruta)
+        if perfil is not None:
+            perfil.sentencias[sentencia] += 1
+            perfil.tiempos[sentencia] = perfil.tiempos.get(sentencia, 0.0) + duracion
+        if duracion * 1000 >= settings.query_profiler_slow_ms:
+            logger.warning("Consulta lenta", extra={
+                "route": ruta, "duration_ms": round(duracion * 1000, 1), "statement": sentencia[:500],
+            })
+
+
+class QueryProfilerMiddleware:
+    """Middleware ASGI: agrupa las consultas de cada request y marca los posibles N+1"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        perfil = PerfilRequest(scope)
+        token = _perfil_actual.set(perfil)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _perfil_actual.reset(token)
+            umbral = settings.query_profiler_n_plus_one_threshold
+            for sentencia, veces in perfil.sentencias.items():
+                if veces > umbral:
+                    reporte_consultas.marcar_n_plus_one(sentencia)
+                    logger.warning("Posible N+1", extra={
+                        "route": perfil.ruta, "executions": veces,
+                        "total_ms": round(perfil.tiempos[sentencia] * 1000, 1), "statement": sentencia[:300],
+                    })
@@ -0,0 +1,93 @@
+"""
+Enrutamiento de lecturas a la réplica (READ_DATABASE_URL) según su retraso de replicación.
+
+El retraso se mide como mucho cada `read_replica_check_interval_seconds`; entre mediciones se
+usa el último valor. Si supera `read_replica_max_lag_seconds` o la réplica no responde, las
+lecturas van a la BD principal hasta la siguiente medición.
+
+- PostgreSQL: segundos desde la última transacción reproducida (0 si ya reprodujo todo lo
+  recibido o si el servidor no está en recuperación).
+- Otros motores: 0, salvo que `read_replica_lag_query` indique otra consulta. Con dos archivos
+  SQLite se puede probar el fallback con, p. ej., READ_REPLICA_LAG_QUERY="SELECT 999".
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.config import database
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+LAG_POSTGRES = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class EstadoReplica:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.medido_en: Optional[float] = None
+        self.retraso: Optional[float] = None
+        self.disponible = False
+        self.error: Optional[str] = None
+        self.lecturas_replica = 0
+        self.lecturas_principal = 0
+
+    def _medir(self) -> None:
+        consulta = settings.read_replica_lag_query
+        if not consulta:
+            consulta = LAG_POSTGRES if database.read_engine.dialect.name == "postgresql" else "SELECT 0"
+        try:
+            with database.read_engine.connect() as conn:
+                retraso = float(conn.execute(text(consulta)).scalar() or 0)
+            self.retraso = retraso
+            self.disponible = retraso <= settings.read_replica_max_lag_seconds
+            self.error = None
+        except Exception as e:
+            self.retraso = None
+            self.disponible = False
+            self.error = str(e)[:500]
+            logger.warning("Réplica de lectura no disponible, usando la principal: %s", e)
+        self.medido_en = time.monotonic()
+
+    def usar_replica(self) -> bool:
+        """True si la lectura actual debe ir a la réplica (y lo contabiliza)"""
+        if database.read_engine is None:
+            return False
+        vencido = self.medido_en is None or time.monotonic() - self.medido_en >= settings.read_replica_check_interval_seconds
+        # Un solo hilo mide; los demás siguen con el último resultado
+        if vencido and self._lock.acquire(blocking=self.medido_en is None):
+            try:
+                self._medir()
+            finally:
+                self._lock.release()
+        usar = self.disponible
+        if usar:
+            self.lecturas_replica += 1
+        else:
+            self.lecturas_principal += 1
+        return usar
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "configured": database.read_engine is not None,
+            "available": self.disponible,
+            "lag_seconds": self.retraso,
+            "max_lag_seconds": settings.read_replica_max_lag_seconds,
+            "checked_seconds_ago": round(time.monotonic() - self.medido_en, 3) if self.medido_en is not None else None,
+            "error": self.error,
+            "reads_replica": self.lecturas_replica,
+            "reads_primary": self.lecturas_principal,
+        }
+
+
+estado_replica = EstadoReplica()
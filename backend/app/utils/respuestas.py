@@ -0,0 +1,119 @@
+"""
+Respuestas JSON rápidas.
+
+- RespuestaJSON: clase de respuesta por defecto de la app. Serializa con orjson si está
+  instalado (ver requirements.txt) y, si no, con json de la stdlib; la salida es la misma
+  (compacta, UTF-8, fechas ISO 8601 como las emite Pydantic).
+- respuesta_modelos(valor, tipo): para handlers que ya tienen modelos Pydantic validados.
+  Los serializa directo a bytes con el serializador compilado de Pydantic, sin que FastAPI
+  los vuelva a validar ni pase por jsonable_encoder.
+- SerializadorFilas: arma los dicts de respuesta a partir de filas de SQLAlchemy (Row u
+  objetos ORM) con los campos de un schema y conversiones fijadas una sola vez por campo.
+  No valida: se usa con filas que vienen de la BD con los tipos del schema.
+
+Un endpoint que devuelve un Response no pasa por response_model; se deja declarado igual
+para la documentación OpenAPI.
+"""
+
+import enum
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Type
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: mismo formato con la stdlib, más lento
+    orjson = None
+
+
+def _a_json(obj: Any) -> Any:
+    """Tipos que ni orjson ni json serializan solos"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        # Como Pydantic con campos Decimal: texto, para que el mismo campo tenga el mismo tipo JSON
+        # con o sin response_model (p. ej. porcentaje_avance -> "50.00")
+        return str(obj)
+    if orjson is None:
+        if isinstance(obj, datetime):
+            texto = obj.isoformat()
+            return texto[:-6] + "Z" if texto.endswith("+00:00") else texto
+        if isinstance(obj, (date, time)):
+            return obj.isoformat()
+        if isinstance(obj, enum.Enum):
+            return obj.value
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+def dumps(contenido: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_a_json, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return json.dumps(
+        contenido, default=_a_json, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _adaptador(tipo: Any) -> TypeAdapter:
+    return TypeAdapter(tipo)
+
+
+def respuesta_modelos(valor: Any, tipo: Any, status_code: int = 200) -> Response:
+    """Respuesta con modelos ya validados (o listas/dicts de ellos) serializados por Pydantic en Rust"""
+    return Response(content=_adaptador(tipo).dump_json(valor), status_code=status_code, media_type="application/json")
+
+
+# ---------------------------------------------------------------------------
+# Conversiones para SerializadorFilas
+# ---------------------------------------------------------------------------
+
+def isoformat_o(defecto: Optional[str] = None) -> Callable[[Any], Any]:
+    """Fecha -> texto ISO; vacía -> defecto (como los `x.isoformat() if x else ''` de las rutas)"""
+    return lambda valor: valor.isoformat() if valor else defecto
+
+
+def valor_o(defecto: Any) -> Callable[[Any], Any]:
+    return lambda valor: defecto if valor is None else valor
+
+
+def valor_enum(valor: Any) -> Any:
+    return valor.value if isinstance(valor, enum.Enum) else valor
+
+
+class SerializadorFilas:
+    """Fila (atributos con los nombres de los campos) -> dict, con conversiones por campo"""
+
+    def __init__(self, campos: Sequence[str], conversiones: Optional[Dict[str, Callable[[Any], Any]]] = None):
+        self.campos = tuple(campos)
+        getter = attrgetter(*self.campos)
+        # attrgetter con un solo nombre no devuelve tupla
+        self._obtener = getter if len(self.campos) > 1 else (lambda fila: (getter(fila),))
+        self._conversiones = tuple((conversiones or {}).items())
+
+    @classmethod
+    def para_modelo(cls, modelo: Type[BaseModel], **conversiones: Callable[[Any], Any]) -> "SerializadorFilas":
+        return cls(list(modelo.model_fields), conversiones)
+
+    def columnas(self, modelo_orm: Any) -> list:
+        """Columnas del modelo ORM para proyectar la consulta: db.query(*serializador.columnas(Modelo))"""
+        return [getattr(modelo_orm, campo) for campo in self.campos]
+
+    def fila(self, fila: Any) -> Dict[str, Any]:
+        datos = dict(zip(self.campos, self._obtener(fila)))
+        for campo, convertir in self._conversiones:
+            datos[campo] = convertir(datos[campo])
+        return datos
+
+    def __call__(self, filas: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [self.fila(fila) for fila in filas]
@@ -0,0 +1,164 @@
+"""
+Gestión explícita del esquema base (antes se hacía al importar app.main en cada worker).
+
+- aplicar_esquema(): ENUM userrole en Postgres, Base.metadata.create_all y columnas de
+  compatibilidad; al final guarda la huella del esquema en la tabla schema_version.
+- esquema_al_dia(): una sola consulta que compara la huella guardada con la de los modelos.
+  Es lo único que paga cada worker al arrancar.
+
+La huella es un sha1 de tablas/columnas/tipos de Base.metadata: cambia sola al modificar
+los modelos, sin números de versión que mantener a mano.
+
+Uso (desde la carpeta backend, p. ej. en build.sh):
+    python -m app.utils.schema            # aplica el esquema si la huella no coincide
+    python -m app.utils.schema --force    # lo aplica siempre
+    python -m app.utils.schema --check    # solo verifica (código de salida 1 si está desactualizado)
+"""
+
+import argparse
+import hashlib
+import logging
+import sys
+from typing import Optional
+
+from sqlalchemy import inspect, text
+
+from app.config.database import Base, engine
+from app.models import user, pqrs, plan, entity, pdm, secretaria, alert, contratacion  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+_tabla_version = "schema_version"
+
+# Columnas agregadas después de la creación original de las tablas (nullable o con default)
+COLUMNAS_COMPATIBILIDAD = (
+    ("users", "is_active", "BOOLEAN NOT NULL DEFAULT 1"),
+    ("users", "secretaria_id", "INTEGER REFERENCES secretarias(id) ON DELETE SET NULL"),
+    ("actividades", "responsable_secretaria_id", "INTEGER REFERENCES secretarias(id) ON DELETE SET NULL"),
+    ("pdm_meta_assignments", "secretaria_id", "INTEGER REFERENCES secretarias(id) ON DELETE SET NULL"),
+)
+
+
+def huella_esquema() -> str:
+    """sha1 de las tablas y columnas declaradas en los modelos"""
+    partes = []
+    for tabla in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        columnas = ",".join(f"{c.name}:{c.type!r}:{int(bool(c.nullable))}" for c in tabla.columns)
+        partes.append(f"{tabla.name}({columnas})")
+    return hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()
+
+
+def version_guardada() -> Optional[str]:
+    """Huella registrada en la BD (None si nunca se aplicó el esquema)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text(f"SELECT version FROM {_tabla_version} WHERE id = 1")).scalar()
+    except Exception:
+        return None
+
+
+def esquema_al_dia() -> bool:
+    return version_guardada() == huella_esquema()
+
+
+def guardar_version(version: Optional[str] = None) -> None:
+    version = version or huella_esquema()
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_tabla_version} "
+            "(id INTEGER PRIMARY KEY, version VARCHAR(64) NOT NULL, applied_at TIMESTAMP)"
+        ))
+        conn.execute(text(f"DELETE FROM {_tabla_version}"))
+        conn.execute(
+            text(f"INSERT INTO {_tabla_version} (id, version, applied_at) VALUES (1, :version, CURRENT_TIMESTAMP)"),
+            {"version": version},
+        )
+
+
+def ensure_postgres_enums():
+    """Crea o actualiza el ENUM userrole en Postgres si es necesario."""
+    try:
+        if 'postgresql' not in str(engine.url):
+            return  # Solo para PostgreSQL
+
+        with engine.connect() as conn:
+            # Verificar si el tipo userrole existe
+            check_type = text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_type WHERE typname = 'userrole'
+                ) as exists;
+            """)
+            type_exists = conn.execute(check_type).scalar()
+
+            if not type_exists:
+                # Crear el ENUM con valores en MAYÚSCULAS (coinciden con Enum.name)
+                conn.execute(text(
+                    "CREATE TYPE userrole AS ENUM ('SUPERADMIN', 'ADMIN', 'SECRETARIO', 'CIUDADANO')"
+                ))
+                conn.commit()
+            else:
+                # Verificar que tenga todos los valores necesarios
+                check_values = text("""
+                    SELECT enumlabel FROM pg_enum
+                    WHERE enumtypid = (SELECT oid FROM pg_type WHERE typname = 'userrole')
+                    ORDER BY enumsortorder;
+                """)
+                existing_values = [row[0] for row in conn.execute(check_values).fetchall()]
+
+                # Agregar valores faltantes
+                required_values = ['SUPERADMIN', 'ADMIN', 'SECRETARIO', 'CIUDADANO']
+                for value in required_values:
+                    if value not in existing_values:
+                        try:
+                            conn.execute(text("COMMIT"))
+                            conn.execute(text(f"ALTER TYPE userrole ADD VALUE '{value}'"))
+                        except Exception:
+                            pass  # El valor ya existe o hay error
+    except Exception as e:
+        logger.warning("Error asegurando ENUMs: %s", e)
+
+
+def aplicar_esquema() -> str:
+    """Aplica el esquema base de forma idempotente y registra su huella. Retorna la huella."""
+    ensure_postgres_enums()
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    for tabla, columna, tipo in COLUMNAS_COMPATIBILIDAD:
+        if not inspector.has_table(tabla):
+            continue
+        if columna in [c.get("name") for c in inspector.get_columns(tabla)]:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}"))
+        except Exception as e:
+            logger.warning("No se pudo agregar %s.%s: %s", tabla, columna, e)
+
+    version = huella_esquema()
+    guardar_version(version)
+    return version
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Aplica o verifica el esquema base de la BD")
+    parser.add_argument("--check", action="store_true", help="solo verificar la huella del esquema")
+    parser.add_argument("--force", action="store_true", help="aplicar aunque la huella coincida")
+    args = parser.parse_args(argv)
+
+    esperada = huella_esquema()
+    guardada = version_guardada()
+    if args.check:
+        print(f"Esquema {'al día' if guardada == esperada else 'desactualizado'} (BD: {guardada}, modelos: {esperada})")
+        return 0 if guardada == esperada else 1
+    if guardada == esperada and not args.force:
+        print(f"✓ Esquema al día ({esperada})")
+        return 0
+
+    print("→ Aplicando esquema base...")
+    print(f"✓ Esquema aplicado ({aplicar_esquema()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Sincronización incremental del espejo local de contratos SECOP II (tabla secop_contratos).
+
+Por cada NIT de entidad activa se traen solo los registros con `ultima_actualizacion`
+posterior a la marca de agua guardada en secop_sync_estado. La primera carga de un NIT
+parte de `settings.secop_sync_desde` (fecha de firma).
+
+La capa de consulta es un DatosGovClient: para pruebas se puede pasar uno propio apuntando
+a un servidor de fixtures (base_url) o con un httpx.MockTransport (transport).
+"""
+
+import asyncio
+import logging
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.contratacion import SecopContrato, SecopSyncEstado
+from app.models.entity import Entity
+from app.utils.datos_gov import DatosGovClient, datos_gov_client
+
+logger = logging.getLogger(__name__)
+
+# Estados que el tablero considera "contratado/en ejecución" (ver isContratado en el frontend)
+ESTADOS_ACTIVOS = ("en ejecucion", "aprobado", "modificado", "celebrado", "activo")
+
+CAMPOS_TEXTO = (
+    "nombre_entidad", "proceso_de_compra", "referencia_del_contrato", "estado_contrato",
+    "tipo_de_contrato", "modalidad_de_contratacion", "objeto_del_contrato",
+    "documento_proveedor", "proveedor_adjudicado",
+)
+CAMPOS_FECHA = (
+    "fecha_de_firma", "fecha_de_inicio_del_contrato", "fecha_de_fin_del_contrato", "ultima_actualizacion",
+)
+CAMPOS_VALOR = ("valor_del_contrato", "valor_pagado")
+
+# Evita que la sincronización programada y una manual se pisen dentro del mismo proceso
+_sync_lock = asyncio.Lock()
+
+
+def normalizar_estado(estado: Optional[str]) -> Optional[str]:
+    """Minúsculas y sin tildes: 'En ejecución' -> 'en ejecucion'"""
+    if not estado:
+        return None
+    sin_tildes = unicodedata.normalize("NFD", str(estado).strip().lower())
+    return "".join(ch for ch in sin_tildes if unicodedata.category(ch) != "Mn")
+
+
+def _parse_fecha(valor: Any) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor).replace("Z", ""))
+    except ValueError:
+        return None
+
+
+def _parse_valor(valor: Any) -> Optional[float]:
+    if valor is None or valor == "":
+        return None
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fecha_soql(valor: datetime) -> str:
+    return valor.strftime("%Y-%m-%dT%H:%M:%S.000")
+
+
+def _literal_soql(valor: str) -> str:
+    return "'" + valor.replace("'", "''") + "'"
+
+
+def mapear_registro(registro: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convierte un registro del API SODA en columnas de SecopContrato (None si no tiene id)"""
+    id_contrato = registro.get("id_contrato") or registro.get("referencia_del_contrato")
+    nit = registro.get("nit_entidad")
+    if not id_contrato or not nit:
+        return None
+
+    valores: Dict[str, Any] = {"id_contrato": str(id_contrato)[:100], "nit_entidad": str(nit)}
+    for campo in CAMPOS_TEXTO:
+        valor = registro.get(campo)
+        valores[campo] = str(valor) if valor is not None else None
+    for campo in CAMPOS_FECHA:
+        valores[campo] = _parse_fecha(registro.get(campo))
+    for campo in CAMPOS_VALOR:
+        valores[campo] = _parse_valor(registro.get(campo))
+
+    url = registro.get("urlproceso")
+    if isinstance(url, dict):
+        url = url.get("url")
+    valores["urlproceso"] = str(url)[:500] if url else None
+    valores["estado_normalizado"] = normalizar_estado(valores["estado_contrato"])
+    valores["datos"] = registro
+    return valores
+
+
+def construir_query_sync(nit: str, watermark: Optional[datetime], limite: int, offset: int) -> str:
+    """SoQL de una página de la sincronización: cambios desde la marca de agua, ordenados por id"""
+    condiciones = [f"nit_entidad = {_literal_soql(nit)}"]
+    if watermark:
+        condiciones.append(f"ultima_actualizacion > '{_fecha_soql(watermark)}'")
+    else:
+        desde = datetime.fromisoformat(settings.secop_sync_desde)
+        condiciones.append(f"fecha_de_firma >= '{_fecha_soql(desde)}'")
+    return (
+        f"SELECT * WHERE {' AND '.join(condiciones)} "
+        f"ORDER BY id_contrato LIMIT {limite} OFFSET {offset}"
+    )
+
+
+def aplicar_pagina(db: Session, registros: List[Dict[str, Any]]) -> Optional[datetime]:
+    """
+    Inserta o actualiza una página de registros (un SELECT por página para los existentes).
+    Retorna la mayor ultima_actualizacion de la página y hace commit.
+    """
+    filas = [v for v in (mapear_registro(r) for r in registros) if v]
+    if not filas:
+        return None
+
+    ids = list({f["id_contrato"] for f in filas})
+    existentes = {
+        c.id_contrato: c
+        for c in db.query(SecopContrato).filter(SecopContrato.id_contrato.in_(ids)).all()
+    }
+    maxima: Optional[datetime] = None
+    for valores in filas:
+        contrato = existentes.get(valores["id_contrato"])
+        if contrato is None:
+            contrato = SecopContrato(id_contrato=valores["id_contrato"])
+            db.add(contrato)
+            existentes[contrato.id_contrato] = contrato
+        for campo, valor in valores.items():
+            setattr(contrato, campo, valor)
+        actualizado = valores["ultima_actualizacion"]
+        if actualizado and (maxima is None or actualizado > maxima):
+            maxima = actualizado
+    db.commit()
+    return maxima
+
+
+def _estado_nit(db: Session, nit: str) -> SecopSyncEstado:
+    estado = db.query(SecopSyncEstado).filter(SecopSyncEstado.nit == nit).first()
+    if estado is None:
+        estado = SecopSyncEstado(nit=nit, registros_ultima_ejecucion=0)
+        db.add(estado)
+        db.flush()
+    return estado
+
+
+def _marca_de_agua(db: Session, nit: str) -> Optional[datetime]:
+    return _estado_nit(db, nit).watermark
+
+
+def _registrar_resultado(
+    db: Session,
+    nit: str,
+    procesados: int,
+    watermark: Optional[datetime] = None,
+    error: Optional[Exception] = None,
+) -> None:
+    """Guarda el resultado de la sincronización del NIT (la marca de agua solo avanza si no hubo error)"""
+    if error is not None:
+        db.rollback()
+    estado = _estado_nit(db, nit)
+    estado.ultima_ejecucion = datetime.utcnow()
+    estado.registros_ultima_ejecucion = procesados
+    if error is not None:
+        estado.ultimo_estado = "error"
+        estado.ultimo_error = str(error)[:2000]
+    else:
+        estado.watermark = watermark
+        estado.ultimo_estado = "ok"
+        estado.ultimo_error = None
+    db.commit()
+
+
+async def sincronizar_nit(
+    db: Session,
+    nit: str,
+    client: Optional[DatosGovClient] = None,
+    page_size: Optional[int] = None,
+) -> int:
+    """
+    Trae los contratos modificados del NIT desde su marca de agua y los guarda en secop_contratos.
+    La marca de agua solo avanza si se recorren todas las páginas. Retorna los registros procesados.
+    Las operaciones de la sesión (síncronas) corren en el threadpool.
+    """
+    client = client or datos_gov_client
+    limite = page_size or settings.secop_sync_page_size
+    watermark = await run_in_threadpool(_marca_de_agua, db, nit)
+    nueva_marca = watermark
+    procesados = 0
+    offset = 0
+
+    try:
+        while True:
+            query = construir_query_sync(nit, watermark, limite, offset)
+            registros = await client.consultar(query, usar_cache=False)
+            if not registros:
+                break
+            maxima = await run_in_threadpool(aplicar_pagina, db, registros)
+            if maxima and (nueva_marca is None or maxima > nueva_marca):
+                nueva_marca = maxima
+            procesados += len(registros)
+            if len(registros) < limite:
+                break
+            offset += limite
+    except Exception as e:
+        await run_in_threadpool(_registrar_resultado, db, nit, procesados, error=e)
+        raise
+
+    await run_in_threadpool(_registrar_resultado, db, nit, procesados, watermark=nueva_marca)
+    return procesados
+
+
+def nits_entidades_activas(db: Session) -> List[str]:
+    filas = db.query(Entity.nit).filter(
+        Entity.is_active == True,
+        Entity.nit.isnot(None),
+        Entity.nit != "",
+    ).distinct().all()
+    return sorted({nit.strip() for (nit,) in filas if nit and nit.strip()})
+
+
+async def sincronizar_entidades(
+    db: Session,
+    nits: Optional[List[str]] = None,
+    client: Optional[DatosGovClient] = None,
+) -> Dict[str, Any]:
+    """Sincroniza los NIT indicados (por defecto, los de todas las entidades activas)"""
+    async with _sync_lock:
+        nits = nits if nits is not None else await run_in_threadpool(nits_entidades_activas, db)
+        resultado: Dict[str, Any] = {}
+        for nit in nits:
+            try:
+                resultado[nit] = {"estado": "ok", "registros": await sincronizar_nit(db, nit, client)}
+            except Exception as e:
+                logger.warning("Error sincronizando SECOP para NIT %s: %s", nit, e)
+                resultado[nit] = {"estado": "error", "detalle": str(e)}
+        return resultado
+
+
+async def ciclo_sincronizacion_programada() -> None:
+    """Tarea de fondo: sincroniza todas las entidades cada secop_sync_interval_minutes"""
+    intervalo = settings.secop_sync_interval_minutes * 60
+    while True:
+        db = SessionLocal()
+        try:
+            await sincronizar_entidades(db)
+        except Exception as e:
+            logger.exception("Error en la sincronización programada de SECOP")
+        finally:
+            db.close()
+        await asyncio.sleep(intervalo)
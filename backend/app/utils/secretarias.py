@@ -0,0 +1,83 @@
+"""
+Capa de compatibilidad entre los nombres de secretaría en texto (users.secretaria,
+actividades.responsable, pdm_meta_assignments.secretaria) y la FK a secretarias.id.
+
+El texto se conserva para los clientes existentes; cada escritura resuelve además el id
+(resolver_secretaria_id) y las consultas por secretaría comparan enteros indexados.
+La migración "secretaria_fk" completa los ids de los registros anteriores.
+"""
+
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.secretaria import Secretaria
+
+_SECRETARIA_ID_KEY = "secretaria_id_por_nombre"
+
+
+def normalizar_nombre(nombre: Optional[str]) -> Optional[str]:
+    nombre = (nombre or "").strip()
+    return nombre or None
+
+
+def resolver_secretaria_id(
+    db: Session,
+    entity_id: Optional[int],
+    nombre: Optional[str],
+    crear: bool = False,
+) -> Optional[int]:
+    """
+    Id de la secretaría de la entidad con ese nombre (sin distinguir mayúsculas).
+    Con crear=True la registra si no existe, como ya hacían create_user/update_user.
+    Memoizado por sesión en db.info.
+    """
+    nombre = normalizar_nombre(nombre)
+    if not nombre or not entity_id:
+        return None
+
+    cache = db.info.setdefault(_SECRETARIA_ID_KEY, {})
+    clave = (entity_id, nombre.lower())
+    if clave in cache and (cache[clave] is not None or not crear):
+        return cache[clave]
+
+    row = db.query(Secretaria.id).filter(
+        Secretaria.entity_id == entity_id,
+        func.lower(Secretaria.nombre) == nombre.lower()
+    ).first()
+    secretaria_id = row[0] if row else None
+    if secretaria_id is None and crear:
+        secretaria = Secretaria(entity_id=entity_id, nombre=nombre, is_active=True)
+        db.add(secretaria)
+        db.flush()
+        secretaria_id = secretaria.id
+
+    cache[clave] = secretaria_id
+    return secretaria_id
+
+
+def condicion_secretaria(columna_id: Any, columna_texto: Any, secretaria_id: Optional[int], nombre: Optional[str]):
+    """
+    Condición SQL "pertenece a esta secretaría": por id si se conoce,
+    por texto para registros que aún no tienen id (igual que misma_secretaria).
+    """
+    if secretaria_id:
+        if nombre is None:
+            return columna_id == secretaria_id
+        return or_(columna_id == secretaria_id, and_(columna_id.is_(None), columna_texto == nombre))
+    return columna_texto == nombre
+
+
+def misma_secretaria(
+    secretaria_id_a: Optional[int], nombre_a: Optional[str],
+    secretaria_id_b: Optional[int], nombre_b: Optional[str],
+) -> bool:
+    if secretaria_id_a and secretaria_id_b:
+        return secretaria_id_a == secretaria_id_b
+    return nombre_a is not None and nombre_a == nombre_b
+
+
+def clave_secretaria(secretaria_id: Optional[int], nombre: Optional[str]) -> Tuple[str, Any]:
+    """Clave para agrupar en memoria por secretaría (id si existe, texto si no)"""
+    return ("id", secretaria_id) if secretaria_id else ("nombre", nombre)
@@ -0,0 +1,100 @@
+"""
+Benchmark de arranque en frío: tiempo desde que se lanza el proceso uvicorn hasta la
+primera respuesta 200 de GET /health.
+
+Por defecto usa una base SQLite temporal con el esquema ya aplicado (caso normal de un
+worker nuevo tras el build). Con --sin-esquema cada arranque parte de una BD vacía y
+mide también la aplicación del esquema. Con --database-url se mide contra otra BD
+(p. ej. la de staging en Render, donde pesan los round-trips con SSL).
+
+Uso (desde la carpeta backend):
+    python -m benchmarks.arranque [--repeticiones 5] [--sin-esquema] [--database-url URL]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def esperar_respuesta(url: str, proceso: subprocess.Popen, timeout: float) -> None:
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"uvicorn terminó con código {proceso.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"Sin respuesta de {url} en {timeout}s")
+
+
+def medir_arranque(env: dict, timeout: float) -> float:
+    """Segundos desde Popen hasta el primer 200 de /health"""
+    puerto = puerto_libre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(puerto),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        esperar_respuesta(f"http://127.0.0.1:{puerto}/health", proceso, timeout)
+        return time.perf_counter() - inicio
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=10)
+
+
+def aplicar_esquema(env: dict) -> None:
+    subprocess.run([sys.executable, "-m", "app.utils.schema", "--force"], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--sin-esquema", action="store_true", help="cada arranque parte de una BD vacía")
+    parser.add_argument("--database-url", default=None, help="BD a usar (por defecto SQLite temporal)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    tiempos = []
+    for i in range(args.repeticiones):
+        env = dict(os.environ)
+        if args.database_url:
+            env["DATABASE_URL"] = args.database_url
+        else:
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_arranque_'), 'bench.db')}"
+        if not args.sin_esquema and (i == 0 or not args.database_url):
+            aplicar_esquema(env)
+        tiempos.append(medir_arranque(env, args.timeout))
+
+    print(f"Arranque hasta primera respuesta ({args.repeticiones} repeticiones, "
+          f"{'BD vacía' if args.sin_esquema else 'esquema aplicado'}):")
+    print(f"  min     {min(tiempos) * 1000:8.1f} ms")
+    print(f"  mediana {statistics.median(tiempos) * 1000:8.1f} ms")
+    print(f"  max     {max(tiempos) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+"""
+Prueba de carga reproducible de la API: siembra volúmenes realistas, levanta uvicorn y
+reproduce los recorridos principales con usuarios virtuales (asyncio + httpx).
+
+Volúmenes por defecto (--escala los multiplica, salvo entidades y usuarios):
+    50 entidades, 200.000 PQRS, 10.000 actividades PDM con ejecución y evidencia,
+    500 actividades de planes institucionales (5 planes x 10 componentes x 10 actividades)
+
+Recorridos (peso relativo entre paréntesis):
+    ciudadano_radicar (1)      POST /api/pqrs/ y consulta pública del radicado
+    ciudadano_consultar (3)    GET /api/pqrs/ propias y consulta pública por radicado
+    admin_bandeja (3)          bandeja de PQRS, filtro por estado, detalle y alertas
+    pdm_dashboard (2)          asignaciones, actividades por lote, evidencias y ejecuciones
+    planes_estadisticas (1)    listado de planes, estadísticas y plan completo
+
+El reporte JSON trae por endpoint (plantilla de ruta) los requests, errores, throughput y
+p50/p95/p99, junto con el commit, los volúmenes y la configuración de la corrida; con
+--comparar se imprime la diferencia de p95 y throughput contra un reporte anterior.
+
+La siembra se omite si la BD ya tiene los datos de benchmark, así que con
+--database-url sqlite:///bench_carga.db se siembra una vez y se reutiliza entre commits.
+
+El servidor usa el preset de pool "production" (--pool-preset): con los presets chicos y
+varios usuarios concurrentes, los endpoints `async def` que consultan la BD esperan una
+conexión libre dentro del event loop y los requests se encolan hasta el pool_timeout.
+
+Uso (desde la carpeta backend):
+    python -m benchmarks.carga [--escala 1.0] [--usuarios 10] [--duracion 60] [--calentamiento 5]
+                               [--database-url URL] [--salida reporte.json] [--comparar anterior.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+N_ENTIDADES = 50
+N_CIUDADANOS = 500
+N_PQRS = 200_000
+N_ACTIVIDADES_PDM = 10_000
+N_PLANES = 5
+N_COMPONENTES = 10
+N_ACTIVIDADES_PLAN = 10
+LOTE = 5000
+
+PESOS = {
+    "ciudadano_radicar": 1,
+    "ciudadano_consultar": 3,
+    "admin_bandeja": 3,
+    "pdm_dashboard": 2,
+    "planes_estadisticas": 1,
+}
+
+
+def _lotes(filas, tamano: int = LOTE):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def sembrar(escala: float, semilla: int) -> None:
+    """Inserta los datos de benchmark con inserts por lote (se omite si ya existen)"""
+    from app.config.database import SessionLocal
+    from app.models.entity import Entity
+    from app.models.pdm import PdmActividad, PdmActividadEjecucion, PdmActividadEvidencia, PdmMetaAssignment
+    from app.models.plan import Actividad, ComponenteProceso, PlanInstitucional
+    from app.models.pqrs import PQRS
+    from app.models.secretaria import Secretaria
+    from app.models.user import User, UserRole
+    from app.utils.auth import get_password_hash
+
+    rnd = random.Random(semilla)
+    db = SessionLocal()
+    try:
+        if db.query(Entity.id).filter(Entity.code == "BENCH-001").first():
+            print("Datos de benchmark ya sembrados; se reutilizan")
+            return
+
+        inicio = time.perf_counter()
+        hash_clave = get_password_hash("bench123")
+        ahora = datetime.utcnow()
+
+        db.execute(Entity.__table__.insert(), [
+            {"name": f"Entidad Benchmark {e:03d}", "code": f"BENCH-{e:03d}", "slug": f"bench-{e:03d}",
+             "is_active": True, "enable_pqrs": True, "enable_users_admin": True, "enable_reports_pdf": True,
+             "enable_ai_reports": True, "enable_planes_institucionales": True, "enable_contratacion": True,
+             "enable_pdm": True}
+            for e in range(1, N_ENTIDADES + 1)
+        ])
+        entidades = dict(db.query(Entity.code, Entity.id).filter(Entity.code.like("BENCH-%")).all())
+        entity_ids = [entidades[f"BENCH-{e:03d}"] for e in range(1, N_ENTIDADES + 1)]
+
+        db.execute(Secretaria.__table__.insert(), [
+            {"entity_id": entity_id, "nombre": f"Secretaría {s}", "is_active": True}
+            for entity_id in entity_ids for s in range(1, 6)
+        ])
+        db.execute(User.__table__.insert(), [
+            {"username": f"bench_admin_{i:03d}", "email": f"bench_admin_{i:03d}@benchmark.gov.co",
+             "full_name": f"Admin Benchmark {i:03d}", "hashed_password": hash_clave, "role": UserRole.ADMIN,
+             "entity_id": entity_id, "is_active": True}
+            for i, entity_id in enumerate(entity_ids, start=1)
+        ])
+        db.execute(User.__table__.insert(), [
+            {"username": f"bench_ciudadano_{c:04d}", "email": f"bench_ciudadano_{c:04d}@benchmark.gov.co",
+             "full_name": f"Ciudadano Benchmark {c:04d}", "hashed_password": hash_clave,
+             "role": UserRole.CIUDADANO, "cedula": f"{10_000_000 + c}", "is_active": True}
+            for c in range(1, N_CIUDADANOS + 1)
+        ])
+        admins = dict(db.query(User.entity_id, User.id).filter(User.username.like("bench_admin_%")).all())
+        ciudadanos = [r[0] for r in db.query(User.id).filter(User.username.like("bench_ciudadano_%")).all()]
+
+        # PQRS repartidas en los últimos dos años; las no pendientes asignadas al admin de la entidad
+        estados = ["pendiente", "en_proceso", "resuelto", "cerrado"]
+        tipos = ["peticion", "queja", "reclamo", "sugerencia"]
+
+        def filas_pqrs():
+            for i in range(int(N_PQRS * escala)):
+                entity_id = entity_ids[i % N_ENTIDADES]
+                estado = rnd.choices(estados, weights=(3, 3, 3, 1))[0]
+                creada = ahora - timedelta(minutes=rnd.randint(0, 2 * 365 * 24 * 60))
+                ciudadano = rnd.choice(ciudadanos)
+                yield {
+                    "numero_radicado": f"B{i:010d}", "tipo_identificacion": "personal", "medio_respuesta": "email",
+                    "nombre_ciudadano": f"Ciudadano {ciudadano}", "cedula_ciudadano": f"{10_000_000 + ciudadano}",
+                    "email_ciudadano": f"ciudadano{ciudadano}@benchmark.gov.co", "tipo_solicitud": rnd.choice(tipos),
+                    "asunto": f"Solicitud de benchmark {i}", "descripcion": "Descripción de la solicitud " * 8,
+                    "estado": estado, "fecha_solicitud": creada, "created_at": creada,
+                    "created_by_id": ciudadano, "entity_id": entity_id,
+                    "assigned_to_id": admins[entity_id] if estado != "pendiente" else None,
+                    "respuesta": "Respuesta de la entidad" if estado in ("resuelto", "cerrado") else None,
+                }
+
+        for lote in _lotes(filas_pqrs()):
+            db.execute(PQRS.__table__.insert(), lote)
+
+        # PDM: 20 indicadores por entidad, actividades repartidas; cada una con una ejecución y una evidencia
+        n_pdm = int(N_ACTIVIDADES_PDM * escala)
+        db.execute(PdmMetaAssignment.__table__.insert(), [
+            {"entity_id": entity_id, "codigo_indicador_producto": f"IND-{k:03d}", "secretaria": f"Secretaría {k % 5 + 1}",
+             "created_at": ahora, "updated_at": ahora}
+            for entity_id in entity_ids for k in range(20)
+        ])
+        for lote in _lotes(range(n_pdm)):
+            db.execute(PdmActividad.__table__.insert(), [
+                {"entity_id": entity_ids[i % N_ENTIDADES], "codigo_indicador_producto": f"IND-{(i // N_ENTIDADES) % 20:03d}",
+                 "nombre": f"Actividad PDM {i}", "descripcion": "Actividad sintética de benchmark",
+                 "responsable": f"Secretaría {i % 5 + 1}", "anio": 2025, "meta_ejecutar": 100.0,
+                 "valor_ejecutado": float(i % 100), "estado": "en_progreso", "created_at": ahora, "updated_at": ahora}
+                for i in lote
+            ])
+        actividades_pdm = db.query(PdmActividad.id, PdmActividad.entity_id).filter(
+            PdmActividad.entity_id.in_(entity_ids)
+        ).all()
+        for lote in _lotes(actividades_pdm):
+            db.execute(PdmActividadEjecucion.__table__.insert(), [
+                {"actividad_id": actividad_id, "entity_id": entity_id, "valor_ejecutado_incremento": 1.0,
+                 "descripcion": "Ejecución de benchmark", "registrado_por": "bench", "created_at": ahora,
+                 "updated_at": ahora}
+                for actividad_id, entity_id in lote
+            ])
+        ejecuciones = db.query(PdmActividadEjecucion.id, PdmActividadEjecucion.entity_id).filter(
+            PdmActividadEjecucion.entity_id.in_(entity_ids)
+        ).all()
+        imagen = bytes(rnd.getrandbits(8) for _ in range(2048))
+        for lote in _lotes(ejecuciones, 1000):
+            db.execute(PdmActividadEvidencia.__table__.insert(), [
+                {"ejecucion_id": ejecucion_id, "entity_id": entity_id, "nombre_imagen": "evidencia.jpg",
+                 "mime_type": "image/jpeg", "tamano": len(imagen), "contenido": imagen, "created_at": ahora,
+                 "updated_at": ahora}
+                for ejecucion_id, entity_id in lote
+            ])
+
+        # Planes institucionales en las primeras entidades
+        n_actividades_plan = max(1, int(N_ACTIVIDADES_PLAN * escala))
+        for p in range(N_PLANES):
+            plan = PlanInstitucional(
+                anio=2025, nombre=f"Plan de benchmark {p + 1}", descripcion="Plan sintético de benchmark",
+                fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+                responsable_elaboracion="Oficina de Planeación", entity_id=entity_ids[p],
+            )
+            db.add(plan)
+            db.flush()
+            for c in range(N_COMPONENTES):
+                componente = ComponenteProceso(nombre=f"Componente {c + 1}", plan_id=plan.id)
+                db.add(componente)
+                db.flush()
+                db.execute(Actividad.__table__.insert(), [
+                    {"objetivo_especifico": f"Objetivo {c + 1}.{a + 1}", "fecha_inicio_prevista": date(2025, 1, 1),
+                     "fecha_fin_prevista": date(2025, 6, 30), "responsable": f"Secretaría {a % 5 + 1}",
+                     "componente_id": componente.id, "created_at": ahora}
+                    for a in range(n_actividades_plan)
+                ])
+
+        db.commit()
+        print(f"Siembra completa en {time.perf_counter() - inicio:.1f} s")
+    finally:
+        db.close()
+
+
+def cargar_catalogo(semilla: int) -> Dict[str, Any]:
+    """Ids, slugs y tokens que usan los recorridos (se leen de la BD sembrada)"""
+    from app.config.database import SessionLocal
+    from app.models.entity import Entity
+    from app.models.pdm import PdmActividad
+    from app.models.plan import PlanInstitucional
+    from app.models.pqrs import PQRS
+    from app.models.user import User
+    from app.utils.auth import create_access_token
+
+    rnd = random.Random(semilla)
+    db = SessionLocal()
+    try:
+        def token(username: str) -> str:
+            return create_access_token({"sub": username}, expires_delta=timedelta(hours=12))
+
+        entidades = {}
+        for entity_id, slug in db.query(Entity.id, Entity.slug).filter(Entity.code.like("BENCH-%")).all():
+            admin = db.query(User.username).filter(User.entity_id == entity_id, User.username.like("bench_admin_%")).scalar()
+            pqrs_ids = [r[0] for r in db.query(PQRS.id).filter(PQRS.entity_id == entity_id).limit(200).all()]
+            actividades = [r[0] for r in db.query(PdmActividad.id).filter(PdmActividad.entity_id == entity_id).limit(50).all()]
+            planes = [r[0] for r in db.query(PlanInstitucional.id).filter(PlanInstitucional.entity_id == entity_id).all()]
+            entidades[entity_id] = {
+                "slug": slug, "token": token(admin), "pqrs_ids": pqrs_ids,
+                "actividades_pdm": actividades, "planes": planes,
+                "codigos": [f"IND-{k:03d}" for k in range(20)],
+            }
+
+        ciudadanos = [r[0] for r in db.query(User.username).filter(User.username.like("bench_ciudadano_%")).all()]
+        radicados = [r[0] for r in db.query(PQRS.numero_radicado).filter(PQRS.numero_radicado.like("B%")).limit(5000).all()]
+        return {
+            "entidades": entidades,
+            "con_planes": [e for e, datos in entidades.items() if datos["planes"]],
+            "ciudadanos": [token(u) for u in rnd.sample(ciudadanos, min(100, len(ciudadanos)))],
+            "radicados": radicados,
+        }
+    finally:
+        db.close()
+
+
+def volumenes() -> Dict[str, int]:
+    from sqlalchemy import func
+
+    from app.config.database import SessionLocal
+    from app.models.entity import Entity
+    from app.models.pdm import PdmActividad, PdmActividadEvidencia
+    from app.models.plan import Actividad
+    from app.models.pqrs import PQRS
+
+    db = SessionLocal()
+    try:
+        return {
+            "entidades": db.query(func.count(Entity.id)).scalar(),
+            "pqrs": db.query(func.count(PQRS.id)).scalar(),
+            "actividades_pdm": db.query(func.count(PdmActividad.id)).scalar(),
+            "evidencias_pdm": db.query(func.count(PdmActividadEvidencia.id)).scalar(),
+            "actividades_planes": db.query(func.count(Actividad.id)).scalar(),
+        }
+    finally:
+        db.close()
+
+
+class Registro:
+    """Latencias por endpoint (plantilla de ruta); solo cuenta lo ocurrido después del calentamiento"""
+
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.errores: Dict[str, int] = defaultdict(int)
+        self.status: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.midiendo = False
+
+    def anotar(self, endpoint: str, segundos: float, status: int) -> None:
+        if not self.midiendo:
+            return
+        self.latencias[endpoint].append(segundos)
+        self.status[endpoint][status] += 1
+        if status >= 400:
+            self.errores[endpoint] += 1
+
+
+async def _pedir(cliente, registro: Registro, metodo: str, endpoint: str, url: str, token: Optional[str] = None, **kwargs):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    inicio = time.perf_counter()
+    try:
+        resp = await cliente.request(metodo, url, headers=headers, **kwargs)
+        status = resp.status_code
+    except Exception:
+        resp, status = None, 599
+    registro.anotar(f"{metodo} {endpoint}", time.perf_counter() - inicio, status)
+    return resp
+
+
+async def ciudadano_radicar(cliente, registro, catalogo, rnd):
+    entity_id = rnd.choice(list(catalogo["entidades"]))
+    resp = await _pedir(cliente, registro, "POST", "/api/pqrs/", "/api/pqrs/", rnd.choice(catalogo["ciudadanos"]), json={
+        "tipo_solicitud": rnd.choice(["peticion", "queja", "reclamo", "sugerencia"]),
+        "asunto": "Solicitud de prueba de carga", "descripcion": "Descripción de la solicitud " * 8,
+        "entity_id": entity_id,
+    })
+    if resp is not None and resp.status_code == 200:
+        radicado = resp.json()["numero_radicado"]
+        await _pedir(cliente, registro, "GET", "/api/pqrs/public/consultar/{numero_radicado}",
+                     f"/api/pqrs/public/consultar/{radicado}")
+
+
+async def ciudadano_consultar(cliente, registro, catalogo, rnd):
+    await _pedir(cliente, registro, "GET", "/api/pqrs/", "/api/pqrs/", rnd.choice(catalogo["ciudadanos"]),
+                 params={"limit": 20})
+    await _pedir(cliente, registro, "GET", "/api/pqrs/public/consultar/{numero_radicado}",
+                 f"/api/pqrs/public/consultar/{rnd.choice(catalogo['radicados'])}")
+
+
+async def admin_bandeja(cliente, registro, catalogo, rnd):
+    entidad = catalogo["entidades"][rnd.choice(list(catalogo["entidades"]))]
+    token = entidad["token"]
+    await _pedir(cliente, registro, "GET", "/api/pqrs/", "/api/pqrs/", token, params={"limit": 50})
+    await _pedir(cliente, registro, "GET", "/api/pqrs/?estado", "/api/pqrs/", token,
+                 params={"limit": 50, "estado": rnd.choice(["pendiente", "en_proceso", "resuelto"])})
+    if entidad["pqrs_ids"]:
+        await _pedir(cliente, registro, "GET", "/api/pqrs/{pqrs_id}", f"/api/pqrs/{rnd.choice(entidad['pqrs_ids'])}", token)
+    await _pedir(cliente, registro, "GET", "/api/alerts/", "/api/alerts/", token)
+
+
+async def pdm_dashboard(cliente, registro, catalogo, rnd):
+    entidad = catalogo["entidades"][rnd.choice(list(catalogo["entidades"]))]
+    token, slug = entidad["token"], entidad["slug"]
+    await _pedir(cliente, registro, "GET", "/api/pdm/{slug}/assignments", f"/api/pdm/{slug}/assignments", token)
+    await _pedir(cliente, registro, "POST", "/api/pdm/{slug}/actividades/bulk", f"/api/pdm/{slug}/actividades/bulk",
+                 token, json={"codigos": entidad["codigos"]})
+    if entidad["actividades_pdm"]:
+        actividad = rnd.choice(entidad["actividades_pdm"])
+        await _pedir(cliente, registro, "GET", "/api/pdm/{slug}/actividades/{actividad_id}/evidencias",
+                     f"/api/pdm/{slug}/actividades/{actividad}/evidencias", token)
+        await _pedir(cliente, registro, "GET", "/api/pdm/{slug}/actividades/{actividad_id}/ejecuciones",
+                     f"/api/pdm/{slug}/actividades/{actividad}/ejecuciones", token)
+
+
+async def planes_estadisticas(cliente, registro, catalogo, rnd):
+    if not catalogo["con_planes"]:
+        return
+    entidad = catalogo["entidades"][rnd.choice(catalogo["con_planes"])]
+    token = entidad["token"]
+    plan_id = rnd.choice(entidad["planes"])
+    await _pedir(cliente, registro, "GET", "/api/planes/", "/api/planes/", token)
+    await _pedir(cliente, registro, "GET", "/api/planes/{plan_id}/estadisticas", f"/api/planes/{plan_id}/estadisticas", token)
+    await _pedir(cliente, registro, "GET", "/api/planes/{plan_id}/completo", f"/api/planes/{plan_id}/completo", token)
+
+
+RECORRIDOS = {
+    "ciudadano_radicar": ciudadano_radicar,
+    "ciudadano_consultar": ciudadano_consultar,
+    "admin_bandeja": admin_bandeja,
+    "pdm_dashboard": pdm_dashboard,
+    "planes_estadisticas": planes_estadisticas,
+}
+
+
+async def usuario_virtual(n: int, base_url: str, catalogo, registro: Registro, fin: float, semilla: int,
+                          timeout: float) -> None:
+    import httpx
+
+    rnd = random.Random(semilla + n)
+    nombres = list(PESOS)
+    pesos = [PESOS[nombre] for nombre in nombres]
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as cliente:
+        while time.perf_counter() < fin:
+            await RECORRIDOS[rnd.choices(nombres, weights=pesos)[0]](cliente, registro, catalogo, rnd)
+
+
+async def ejecutar_carga(base_url: str, catalogo, usuarios: int, duracion: float, calentamiento: float,
+                         semilla: int, timeout: float) -> Registro:
+    registro = Registro()
+    fin = time.perf_counter() + calentamiento + duracion
+
+    async def empezar_medicion():
+        await asyncio.sleep(calentamiento)
+        registro.midiendo = True
+
+    await asyncio.gather(
+        empezar_medicion(),
+        *(usuario_virtual(n, base_url, catalogo, registro, fin, semilla, timeout) for n in range(usuarios)),
+    )
+    return registro
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano (valores ya ordenados)"""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[indice]
+
+
+def resumir(latencias: List[float], errores: int, duracion: float) -> Dict[str, Any]:
+    ordenadas = sorted(latencias)
+    return {
+        "requests": len(ordenadas),
+        "errors": errores,
+        "throughput_rps": round(len(ordenadas) / duracion, 2),
+        "mean_ms": round(sum(ordenadas) / len(ordenadas) * 1000, 2) if ordenadas else 0.0,
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 2),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 2),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 2),
+        "max_ms": round(ordenadas[-1] * 1000, 2) if ordenadas else 0.0,
+    }
+
+
+def commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual: Dict[str, Any], ruta_anterior: str) -> None:
+    with open(ruta_anterior, encoding="utf-8") as f:
+        anterior = json.load(f)
+    print(f"\nComparación contra {ruta_anterior} (commit {anterior.get('commit')}):")
+    print(f"  {'endpoint':60} {'p95 antes':>10} {'p95 ahora':>10} {'Δ p95':>8} {'Δ rps':>8}")
+    for endpoint, datos in actual["endpoints"].items():
+        previo = anterior.get("endpoints", {}).get(endpoint)
+        if not previo:
+            continue
+        delta_p95 = (datos["p95_ms"] - previo["p95_ms"]) / previo["p95_ms"] * 100 if previo["p95_ms"] else 0.0
+        delta_rps = (datos["throughput_rps"] - previo["throughput_rps"]) / previo["throughput_rps"] * 100 \
+            if previo["throughput_rps"] else 0.0
+        print(f"  {endpoint:60} {previo['p95_ms']:10.1f} {datos['p95_ms']:10.1f} {delta_p95:+7.1f}% {delta_rps:+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplica los volúmenes de PQRS, PDM y planes")
+    parser.add_argument("--usuarios", type=int, default=10, help="usuarios virtuales concurrentes")
+    parser.add_argument("--duracion", type=float, default=60.0, help="segundos de medición")
+    parser.add_argument("--calentamiento", type=float, default=5.0, help="segundos iniciales que no se miden")
+    parser.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    parser.add_argument("--pool-preset", default="production", help="DB_POOL_PRESET del servidor")
+    parser.add_argument("--timeout", type=float, default=30.0, help="timeout por request (s)")
+    parser.add_argument("--database-url", default=None, help="BD a usar (por defecto SQLite temporal)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default="reporte_carga.json")
+    parser.add_argument("--comparar", default=None, help="reporte JSON anterior para comparar")
+    args = parser.parse_args()
+
+    # La configuración de BD se lee al importar app.config.database
+    os.environ["DATABASE_URL"] = args.database_url or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_carga_'), 'bench.db')}"
+    os.environ["DB_POOL_PRESET"] = args.pool_preset
+    os.environ.setdefault("LOG_ACCESS_SAMPLE_RATE", "0")
+
+    from app.utils.schema import aplicar_esquema, esquema_al_dia
+    from benchmarks.arranque import esperar_respuesta, puerto_libre
+
+    if not esquema_al_dia():
+        aplicar_esquema()
+    sembrar(args.escala, args.semilla)
+    catalogo = cargar_catalogo(args.semilla)
+    datos_sembrados = volumenes()
+
+    puerto = puerto_libre()
+    env = dict(os.environ, SCHEMA_AUTO_APPLY="false")
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(puerto),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{puerto}"
+        esperar_respuesta(f"{base_url}/health", proceso, timeout=60)
+        print(f"Carga: {args.usuarios} usuarios, {args.calentamiento:.0f} s de calentamiento + {args.duracion:.0f} s")
+        registro = asyncio.run(ejecutar_carga(base_url, catalogo, args.usuarios, args.duracion,
+                                              args.calentamiento, args.semilla, args.timeout))
+    finally:
+        proceso.terminate()
+        proceso.wait(timeout=10)
+
+    endpoints = {
+        endpoint: {**resumir(latencias, registro.errores[endpoint], args.duracion),
+                   "status": dict(sorted(registro.status[endpoint].items()))}
+        for endpoint, latencias in sorted(registro.latencias.items())
+    }
+    todas = [s for latencias in registro.latencias.values() for s in latencias]
+    reporte = {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "volumenes": datos_sembrados,
+        "config": {"escala": args.escala, "usuarios": args.usuarios, "duracion": args.duracion,
+                   "calentamiento": args.calentamiento, "workers": args.workers, "pool_preset": args.pool_preset,
+                   "semilla": args.semilla,
+                   "pesos": PESOS},
+        "total": resumir(todas, sum(registro.errores.values()), args.duracion),
+        "endpoints": endpoints,
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+    print(f"\n  {'endpoint':60} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, datos in endpoints.items():
+        print(f"  {endpoint:60} {datos['requests']:7} {datos['errors']:5} {datos['throughput_rps']:8.1f} "
+              f"{datos['p50_ms']:8.1f} {datos['p95_ms']:8.1f} {datos['p99_ms']:8.1f}")
+    total = reporte["total"]
+    print(f"  {'TOTAL':60} {total['requests']:7} {total['errors']:5} {total['throughput_rps']:8.1f} "
+          f"{total['p50_ms']:8.1f} {total['p95_ms']:8.1f} {total['p99_ms']:8.1f}")
+    print(f"\nReporte: {args.salida}")
+    if args.comparar:
+        comparar(reporte, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark de GET /api/planes/{id}/completo: joinedload + PlanInstitucionalCompleto
+vs. el cargador por niveles (cargar_arbol_plan).
+
+Crea un plan con 50 componentes x 40 actividades en una base SQLite temporal y
+reporta filas traídas de la BD, consultas emitidas y tiempo de carga/serialización.
+
+Uso (desde la carpeta backend):
+    python -m benchmarks.plan_completo [--componentes 50] [--actividades 40] [--repeticiones 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+# La configuración de BD se lee al importar app.config.database: apuntar a un archivo temporal
+_tmp_dir = tempfile.mkdtemp(prefix="bench_plan_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.config.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import entity as _entity, user as _user, pqrs as _pqrs, pdm as _pdm, secretaria as _secretaria, alert as _alert  # noqa: E402,F401
+from app.models.entity import Entity  # noqa: E402
+from app.models.plan import PlanInstitucional, ComponenteProceso, Actividad  # noqa: E402
+from app.routes.planes import consultar_plan_proyectado, cargar_arbol_plan  # noqa: E402
+from app.schemas import plan as plan_schemas  # noqa: E402
+
+
+def sembrar(n_componentes: int, n_actividades: int) -> int:
+    """Crea la entidad y el plan de prueba; retorna el id del plan"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Entidad Benchmark", code="BENCH", slug="bench")
+        db.add(entity)
+        db.flush()
+        plan = PlanInstitucional(
+            anio=2025,
+            nombre="Plan de benchmark",
+            descripcion="Plan sintético para medir la carga del árbol completo",
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 12, 31),
+            responsable_elaboracion="Oficina de Planeación",
+            entity_id=entity.id,
+        )
+        db.add(plan)
+        db.flush()
+        for c in range(n_componentes):
+            componente = ComponenteProceso(nombre=f"Componente {c + 1}", plan_id=plan.id)
+            db.add(componente)
+            db.flush()
+            db.bulk_save_objects([
+                Actividad(
+                    objetivo_especifico=f"Objetivo específico {c + 1}.{a + 1}",
+                    fecha_inicio_prevista=date(2025, 1, 1),
+                    fecha_fin_prevista=date(2025, 6, 30),
+                    responsable=f"Secretaría {a % 8}",
+                    componente_id=componente.id,
+                )
+                for a in range(n_actividades)
+            ])
+        db.commit()
+        return plan.id
+    finally:
+        db.close()
+
+
+class ContadorFilas:
+    """Cuenta sentencias y filas devueltas por la BD durante un bloque"""
+
+    def __init__(self):
+        self.sentencias = []
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._before)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._before)
+
+    @property
+    def filas(self) -> int:
+        # sqlite3 no expone rowcount para SELECT: se recuenta cada sentencia aparte
+        total = 0
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for statement, parameters in self.sentencias:
+                if statement.lstrip().upper().startswith("SELECT"):
+                    cursor.execute(f"SELECT COUNT(*) FROM ({statement})", parameters)
+                    total += cursor.fetchone()[0]
+        finally:
+            raw.close()
+        return total
+
+
+def estrategia_joinedload(db, plan_id):
+    plan = db.query(PlanInstitucional).options(
+        joinedload(PlanInstitucional.componentes).joinedload(ComponenteProceso.actividades)
+    ).filter(PlanInstitucional.id == plan_id).first()
+    t0 = time.perf_counter()
+    data = plan_schemas.PlanInstitucionalCompleto.model_validate(plan).model_dump_json()
+    return data, time.perf_counter() - t0
+
+
+def estrategia_arbol(db, plan_id):
+    plan_row = consultar_plan_proyectado(db, plan_id)
+    arbol = cargar_arbol_plan(db, plan_row)
+    t0 = time.perf_counter()
+    data = plan_schemas.PlanInstitucionalCompleto.model_validate(arbol).model_dump_json()
+    return data, time.perf_counter() - t0
+
+
+def medir(nombre, estrategia, plan_id, repeticiones):
+    total, serializacion = [], []
+    contador = None
+    for i in range(repeticiones):
+        db = SessionLocal()
+        try:
+            if i == 0:
+                with ContadorFilas() as contador:
+                    t0 = time.perf_counter()
+                    data, t_ser = estrategia(db, plan_id)
+            else:
+                t0 = time.perf_counter()
+                data, t_ser = estrategia(db, plan_id)
+            total.append(time.perf_counter() - t0)
+            serializacion.append(t_ser)
+        finally:
+            db.close()
+    total.sort()
+    serializacion.sort()
+    mediana = lambda xs: xs[len(xs) // 2] * 1000  # noqa: E731
+    print(
+        f"{nombre:<12} sentencias={len(contador.sentencias):<3} filas={contador.filas:<6} "
+        f"total_ms={mediana(total):8.2f} serializacion_ms={mediana(serializacion):8.2f} bytes={len(data)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--componentes", type=int, default=50)
+    parser.add_argument("--actividades", type=int, default=40)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    plan_id = sembrar(args.componentes, args.actividades)
+    print(f"Plan {plan_id}: {args.componentes} componentes x {args.actividades} actividades "
+          f"({args.repeticiones} repeticiones, mediana)")
+    medir("joinedload", estrategia_joinedload, plan_id, args.repeticiones)
+    medir("arbol", estrategia_arbol, plan_id, args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
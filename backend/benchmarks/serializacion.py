@@ -0,0 +1,415 @@
+"""
+Micro-benchmarks de las rutas calientes de serialización e hidratación ORM, sobre datos
+sintéticos en una base SQLite temporal.
+
+Grupos de casos:
+    hidratacion    objetos ORM (con joinedload) vs. tuplas de columnas vs. mappings de Core
+    validacion     from_attributes vs. dict vs. construcción directa de los schemas de respuesta
+                   (PQRSWithDetails, ActividadResponse, EjecucionResponse, PlanInstitucionalCompleto)
+    respuesta      cuerpo de la respuesta: ruta por defecto de FastAPI (validar + serializar +
+                   json.dumps) vs. ORJSONResponse (si orjson está instalado) vs. TypeAdapter.dump_json
+
+Cada caso se repite con timeit y se reporta el mejor tiempo y la mediana por llamada y por
+elemento. Con --salida se guarda un JSON con el commit; con --comparar se compara contra un
+reporte anterior y el proceso termina con código 1 si alguna mediana empeora más que --umbral
+(por defecto 10 %), para usarlo como control de regresiones.
+
+Uso (desde la carpeta backend):
+    python -m benchmarks.serializacion [--filas 1000] [--repeticiones 7] [--grupo hidratacion]
+                                       [--salida serializacion.json] [--comparar anterior.json]
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+# La configuración de BD se lee al importar app.config.database: apuntar a un archivo temporal
+_tmp_dir = tempfile.mkdtemp(prefix="bench_serializacion_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import aliased, joinedload  # noqa: E402
+
+from app.config.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import alert as _alert, secretaria as _secretaria  # noqa: E402,F401
+from app.models.entity import Entity  # noqa: E402
+from app.models.pdm import PdmActividad, PdmActividadEjecucion, PdmActividadEvidencia  # noqa: E402
+from app.models.plan import Actividad, ComponenteProceso, PlanInstitucional  # noqa: E402
+from app.models.pqrs import PQRS  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.routes.planes import cargar_arbol_plan, consultar_plan_proyectado  # noqa: E402
+from app.schemas import plan as plan_schemas  # noqa: E402
+from app.schemas.pdm import ActividadResponse, EjecucionResponse, EvidenciaImagenResponse  # noqa: E402
+from app.schemas.pqrs import PQRS as PQRSSchema, PQRSWithDetails  # noqa: E402
+from benchmarks.carga import commit_actual  # noqa: E402
+
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+except ImportError:  # orjson es opcional
+    ORJSONResponse = None
+
+
+def sembrar(n_filas: int) -> int:
+    """Entidad, usuarios, n_filas PQRS y actividades PDM (con ejecución y evidencia) y un plan; retorna el id del plan"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Entidad Benchmark", code="BENCH", slug="bench")
+        db.add(entity)
+        db.flush()
+        admin = User(username="admin_bench", email="admin@benchmark.gov.co", full_name="Admin Benchmark",
+                     hashed_password="x", role=UserRole.ADMIN, entity_id=entity.id)
+        ciudadano = User(username="ciudadano_bench", email="ciudadano@benchmark.gov.co",
+                         full_name="Ciudadano Benchmark", hashed_password="x", role=UserRole.CIUDADANO)
+        db.add_all([admin, ciudadano])
+        db.flush()
+
+        ahora = datetime.utcnow()
+        db.execute(PQRS.__table__.insert(), [
+            {"numero_radicado": f"B{i:010d}", "tipo_identificacion": "personal", "medio_respuesta": "email",
+             "nombre_ciudadano": "Ciudadano Benchmark", "cedula_ciudadano": "10000001",
+             "email_ciudadano": "ciudadano@benchmark.gov.co", "tipo_solicitud": "peticion",
+             "asunto": f"Solicitud {i}", "descripcion": "Descripción de la solicitud " * 8,
+             "estado": "en_proceso" if i % 2 else "pendiente", "fecha_solicitud": ahora - timedelta(hours=i),
+             "created_at": ahora - timedelta(hours=i), "created_by_id": ciudadano.id,
+             "assigned_to_id": admin.id if i % 2 else None, "entity_id": entity.id}
+            for i in range(n_filas)
+        ])
+        db.execute(PdmActividad.__table__.insert(), [
+            {"entity_id": entity.id, "codigo_indicador_producto": f"IND-{i % 20:03d}", "nombre": f"Actividad {i}",
+             "descripcion": "Actividad sintética", "responsable": "Secretaría de Planeación",
+             "fecha_inicio": ahora, "fecha_fin": ahora + timedelta(days=90), "anio": 2025,
+             "meta_ejecutar": 100.0, "valor_ejecutado": float(i % 100), "estado": "en_progreso",
+             "created_at": ahora, "updated_at": ahora}
+            for i in range(n_filas)
+        ])
+        actividades = [r[0] for r in db.query(PdmActividad.id).all()]
+        db.execute(PdmActividadEjecucion.__table__.insert(), [
+            {"actividad_id": actividad_id, "entity_id": entity.id, "valor_ejecutado_incremento": 1.0,
+             "descripcion": "Ejecución de benchmark", "registrado_por": "bench", "created_at": ahora,
+             "updated_at": ahora}
+            for actividad_id in actividades
+        ])
+        imagen = os.urandom(2048)
+        db.execute(PdmActividadEvidencia.__table__.insert(), [
+            {"ejecucion_id": ejecucion_id, "entity_id": entity.id, "nombre_imagen": "evidencia.jpg",
+             "mime_type": "image/jpeg", "tamano": len(imagen), "contenido": imagen, "created_at": ahora,
+             "updated_at": ahora}
+            for (ejecucion_id,) in db.query(PdmActividadEjecucion.id).all()
+        ])
+
+        plan = PlanInstitucional(
+            anio=2025, nombre="Plan de benchmark", descripcion="Plan sintético para micro-benchmarks",
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+            responsable_elaboracion="Oficina de Planeación", entity_id=entity.id,
+        )
+        db.add(plan)
+        db.flush()
+        for c in range(20):
+            componente = ComponenteProceso(nombre=f"Componente {c + 1}", plan_id=plan.id)
+            db.add(componente)
+            db.flush()
+            db.execute(Actividad.__table__.insert(), [
+                {"objetivo_especifico": f"Objetivo {c + 1}.{a + 1}", "fecha_inicio_prevista": date(2025, 1, 1),
+                 "fecha_fin_prevista": date(2025, 6, 30), "responsable": "Secretaría de Planeación",
+                 "componente_id": componente.id, "created_at": ahora}
+                for a in range(25)
+            ])
+        db.commit()
+        return plan.id
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Hidratación: cada llamada abre una sesión nueva (sin identity map caliente)
+# ---------------------------------------------------------------------------
+
+Creador = aliased(User)
+Asignado = aliased(User)
+
+
+def pqrs_orm(limite: int):
+    with SessionLocal() as db:
+        return db.query(PQRS).options(joinedload(PQRS.created_by), joinedload(PQRS.assigned_to)) \
+            .order_by(PQRS.created_at.desc()).limit(limite).all()
+
+
+def pqrs_filas(limite: int):
+    with SessionLocal() as db:
+        return db.query(
+            *PQRS.__table__.columns,
+            Creador.username.label("creador_username"), Creador.full_name.label("creador_nombre"),
+            Asignado.username.label("asignado_username"), Asignado.full_name.label("asignado_nombre"),
+        ).join(Creador, PQRS.created_by_id == Creador.id) \
+            .outerjoin(Asignado, PQRS.assigned_to_id == Asignado.id) \
+            .order_by(PQRS.created_at.desc()).limit(limite).all()
+
+
+def pqrs_mappings(limite: int):
+    with SessionLocal() as db:
+        return db.execute(select(PQRS.__table__).order_by(PQRS.created_at.desc()).limit(limite)).mappings().all()
+
+
+def actividades_orm(limite: int):
+    with SessionLocal() as db:
+        return db.query(PdmActividad).order_by(PdmActividad.created_at.desc()).limit(limite).all()
+
+
+def actividades_filas(limite: int):
+    with SessionLocal() as db:
+        return db.query(*PdmActividad.__table__.columns).order_by(PdmActividad.created_at.desc()).limit(limite).all()
+
+
+def ejecuciones_orm(limite: int):
+    with SessionLocal() as db:
+        ejecuciones = db.query(PdmActividadEjecucion).limit(limite).all()
+        evidencias = db.query(PdmActividadEvidencia).filter(
+            PdmActividadEvidencia.ejecucion_id.in_([e.id for e in ejecuciones])
+        ).all()
+        return ejecuciones, evidencias
+
+
+def plan_joinedload(plan_id: int):
+    with SessionLocal() as db:
+        return db.query(PlanInstitucional).options(
+            joinedload(PlanInstitucional.componentes).joinedload(ComponenteProceso.actividades)
+        ).filter(PlanInstitucional.id == plan_id).first()
+
+
+def plan_arbol(plan_id: int):
+    with SessionLocal() as db:
+        return cargar_arbol_plan(db, consultar_plan_proyectado(db, plan_id))
+
+
+# ---------------------------------------------------------------------------
+# Construcción de respuestas (como en las rutas)
+# ---------------------------------------------------------------------------
+
+def _usuario(u) -> Optional[dict]:
+    return {"id": u.id, "username": u.username, "full_name": u.full_name} if u else None
+
+
+def pqrs_dicts_ruta(objetos) -> List[dict]:
+    """Lo que arma GET /api/pqrs/ a partir de los objetos ORM"""
+    return [{**p.__dict__, "created_by": _usuario(p.created_by), "assigned_to": _usuario(p.assigned_to)} for p in objetos]
+
+
+def pqrs_dicts_filas(filas) -> List[dict]:
+    columnas = [c.name for c in PQRS.__table__.columns]
+    resultado = []
+    for f in filas:
+        datos = {c: getattr(f, c) for c in columnas}
+        datos["created_by"] = {"id": f.created_by_id, "username": f.creador_username, "full_name": f.creador_nombre}
+        datos["assigned_to"] = {"id": f.assigned_to_id, "username": f.asignado_username,
+                                "full_name": f.asignado_nombre} if f.assigned_to_id else None
+        resultado.append(datos)
+    return resultado
+
+
+def actividad_kwargs(row) -> ActividadResponse:
+    """Construcción campo a campo, como GET /api/pdm/{slug}/actividades"""
+    return ActividadResponse(
+        id=row.id, entity_id=row.entity_id, codigo_indicador_producto=row.codigo_indicador_producto,
+        nombre=row.nombre, descripcion=row.descripcion, responsable=row.responsable,
+        fecha_inicio=row.fecha_inicio.isoformat() if row.fecha_inicio else None,
+        fecha_fin=row.fecha_fin.isoformat() if row.fecha_fin else None,
+        estado=row.estado, anio=row.anio if row.anio is not None else 0,
+        meta_ejecutar=row.meta_ejecutar or 0.0, valor_ejecutado=row.valor_ejecutado or 0.0,
+        created_at=row.created_at.isoformat() if row.created_at else '',
+        updated_at=row.updated_at.isoformat() if row.updated_at else '',
+    )
+
+
+def actividad_dict(row) -> dict:
+    return {
+        "id": row.id, "entity_id": row.entity_id, "codigo_indicador_producto": row.codigo_indicador_producto,
+        "nombre": row.nombre, "descripcion": row.descripcion, "responsable": row.responsable,
+        "fecha_inicio": row.fecha_inicio.isoformat() if row.fecha_inicio else None,
+        "fecha_fin": row.fecha_fin.isoformat() if row.fecha_fin else None,
+        "estado": row.estado, "anio": row.anio if row.anio is not None else 0,
+        "meta_ejecutar": row.meta_ejecutar or 0.0, "valor_ejecutado": row.valor_ejecutado or 0.0,
+        "created_at": row.created_at.isoformat() if row.created_at else '',
+        "updated_at": row.updated_at.isoformat() if row.updated_at else '',
+    }
+
+
+def ejecuciones_respuesta(ejecuciones, evidencias) -> List[EjecucionResponse]:
+    por_ejecucion: Dict[int, list] = {}
+    for ev in evidencias:
+        por_ejecucion.setdefault(ev.ejecucion_id, []).append(ev)
+    return [
+        EjecucionResponse(
+            id=e.id, actividad_id=e.actividad_id, entity_id=e.entity_id,
+            valor_ejecutado_incremento=e.valor_ejecutado_incremento, descripcion=e.descripcion,
+            url_evidencia=e.url_evidencia, registrado_por=e.registrado_por,
+            imagenes=[
+                EvidenciaImagenResponse(
+                    id=ev.id, nombre_imagen=ev.nombre_imagen, mime_type=ev.mime_type, tamano=ev.tamano,
+                    contenido_base64=base64.b64encode(ev.contenido).decode("utf-8"),
+                    created_at=ev.created_at.isoformat() if ev.created_at else '',
+                )
+                for ev in por_ejecucion.get(e.id, [])
+            ],
+            created_at=e.created_at.isoformat() if e.created_at else '',
+            updated_at=e.updated_at.isoformat() if e.updated_at else '',
+        )
+        for e in ejecuciones
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+def medir(funcion: Callable[[], Any], repeticiones: int) -> Dict[str, float]:
+    timer = timeit.Timer(funcion)
+    numero, _ = timer.autorange()
+    tiempos = [t / numero for t in timer.repeat(repeat=repeticiones, number=numero)]
+    return {"min_ms": min(tiempos) * 1000, "mediana_ms": statistics.median(tiempos) * 1000, "llamadas": numero}
+
+
+def casos(plan_id: int, filas: int) -> Dict[str, Dict[str, Callable[[], Any]]]:
+    """grupo -> nombre -> (función, elementos que procesa cada llamada)"""
+    objetos_pqrs = pqrs_orm(filas)
+    filas_pqrs = pqrs_filas(filas)
+    dicts_pqrs = pqrs_dicts_ruta(objetos_pqrs)
+    objetos_actividad = actividades_orm(filas)
+    filas_actividad = actividades_filas(filas)
+    dicts_actividad = [actividad_dict(r) for r in filas_actividad]
+    ejecuciones, evidencias = ejecuciones_orm(filas)
+    plan = plan_joinedload(plan_id)
+    arbol = plan_arbol(plan_id)
+    n_actividades_plan = sum(len(c["actividades"]) for c in arbol["componentes"])
+
+    lista_pqrs = TypeAdapter(List[PQRSWithDetails])
+    campo_pqrs = create_response_field(name="response", type_=List[PQRSWithDetails])
+    modelos_pqrs = [PQRSWithDetails.model_validate(d) for d in dicts_pqrs]
+
+    def respuesta_fastapi(response_class):
+        # Lo que hace FastAPI con response_model: validar, serializar a tipos JSON y renderizar
+        def _f():
+            valor, errores = campo_pqrs.validate(dicts_pqrs, {}, loc=("response",))
+            return response_class(campo_pqrs.serialize(valor, mode="json")).body
+        return _f
+
+    grupos = {
+        "hidratacion": {
+            "pqrs_orm_joinedload": (lambda: pqrs_orm(filas), filas),
+            "pqrs_filas_columnas": (lambda: pqrs_filas(filas), filas),
+            "pqrs_core_mappings": (lambda: pqrs_mappings(filas), filas),
+            "actividades_orm": (lambda: actividades_orm(filas), filas),
+            "actividades_filas_columnas": (lambda: actividades_filas(filas), filas),
+            "plan_joinedload": (lambda: plan_joinedload(plan_id), n_actividades_plan),
+            "plan_arbol_por_niveles": (lambda: plan_arbol(plan_id), n_actividades_plan),
+        },
+        "validacion": {
+            "pqrs_from_attributes": (lambda: [PQRSSchema.model_validate(o) for o in objetos_pqrs], filas),
+            "pqrs_detalles_dict_ruta": (
+                lambda: [PQRSWithDetails.model_validate(d) for d in pqrs_dicts_ruta(objetos_pqrs)], filas),
+            "pqrs_detalles_dict_filas": (
+                lambda: [PQRSWithDetails.model_validate(d) for d in pqrs_dicts_filas(filas_pqrs)], filas),
+            "pqrs_detalles_model_construct": (
+                lambda: [PQRSWithDetails.model_construct(**d) for d in dicts_pqrs], filas),
+            "actividad_kwargs_orm": (lambda: [actividad_kwargs(r) for r in objetos_actividad], filas),
+            "actividad_kwargs_filas": (lambda: [actividad_kwargs(r) for r in filas_actividad], filas),
+            "actividad_model_validate_dict": (
+                lambda: [ActividadResponse.model_validate(d) for d in dicts_actividad], filas),
+            "ejecucion_con_imagenes": (lambda: ejecuciones_respuesta(ejecuciones, evidencias), filas),
+            "plan_completo_from_attributes": (
+                lambda: plan_schemas.PlanInstitucionalCompleto.model_validate(plan), n_actividades_plan),
+            "plan_completo_desde_arbol": (
+                lambda: plan_schemas.PlanInstitucionalCompleto.model_validate(arbol), n_actividades_plan),
+        },
+        "respuesta": {
+            "fastapi_jsonresponse": (respuesta_fastapi(JSONResponse), filas),
+            "jsonable_encoder_json_dumps": (
+                lambda: json.dumps(jsonable_encoder(modelos_pqrs), ensure_ascii=False).encode("utf-8"), filas),
+            "typeadapter_dump_json": (lambda: lista_pqrs.dump_json(modelos_pqrs), filas),
+            "model_dump_json_por_modelo": (
+                lambda: b"[" + b",".join(m.model_dump_json().encode("utf-8") for m in modelos_pqrs) + b"]", filas),
+        },
+    }
+    if ORJSONResponse is not None:
+        grupos["respuesta"]["fastapi_orjsonresponse"] = (respuesta_fastapi(ORJSONResponse), filas)
+    return grupos
+
+
+def comparar(resultados: Dict[str, Any], ruta_anterior: str, umbral: float) -> bool:
+    """Imprime la variación de la mediana por caso; True si alguno empeoró más que el umbral"""
+    with open(ruta_anterior, encoding="utf-8") as f:
+        anterior = json.load(f)
+    print(f"\nComparación contra {ruta_anterior} (commit {anterior.get('commit')}), umbral {umbral:.0f} %:")
+    regresion = False
+    for grupo, casos_grupo in resultados["grupos"].items():
+        for nombre, datos in casos_grupo.items():
+            previo = anterior.get("grupos", {}).get(grupo, {}).get(nombre)
+            if not previo or not previo["mediana_ms"]:
+                continue
+            delta = (datos["mediana_ms"] - previo["mediana_ms"]) / previo["mediana_ms"] * 100
+            marca = ""
+            if delta > umbral:
+                marca, regresion = "  << regresión", True
+            print(f"  {grupo + '.' + nombre:50} {previo['mediana_ms']:10.3f} -> {datos['mediana_ms']:10.3f} ms "
+                  f"{delta:+7.1f}%{marca}")
+    return regresion
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1000, help="PQRS/actividades por llamada")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    parser.add_argument("--grupo", choices=["hidratacion", "validacion", "respuesta"], default=None)
+    parser.add_argument("--salida", default=None, help="guardar los resultados en JSON")
+    parser.add_argument("--comparar", default=None, help="reporte JSON anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=10.0, help="% de empeoramiento que cuenta como regresión")
+    args = parser.parse_args()
+
+    plan_id = sembrar(args.filas)
+    grupos = casos(plan_id, args.filas)
+    if args.grupo:
+        grupos = {args.grupo: grupos[args.grupo]}
+    if ORJSONResponse is None:
+        print("orjson no está instalado: se omite fastapi_orjsonresponse")
+
+    resultados: Dict[str, Any] = {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "filas": args.filas,
+        "grupos": {},
+    }
+    print(f"{args.filas} filas, {args.repeticiones} repeticiones")
+    for grupo, casos_grupo in grupos.items():
+        print(f"\n[{grupo}]\n  {'caso':40} {'min ms':>10} {'mediana ms':>11} {'µs/elem':>9}")
+        for nombre, (funcion, elementos) in casos_grupo.items():
+            datos = medir(funcion, args.repeticiones)
+            datos["us_por_elemento"] = datos["mediana_ms"] * 1000 / max(elementos, 1)
+            datos["elementos"] = elementos
+            resultados["grupos"].setdefault(grupo, {})[nombre] = {k: round(v, 4) if isinstance(v, float) else v
+                                                                 for k, v in datos.items()}
+            print(f"  {nombre:40} {datos['min_ms']:10.3f} {datos['mediana_ms']:11.3f} "
+                  f"{datos['us_por_elemento']:9.2f}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados: {args.salida}")
+    if args.comparar and comparar(resultados, args.comparar, args.umbral):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,5 +10,8 @@ python -m pip install -r requirements.txt
 echo "→ Validando conexión a base de datos..."
 python -c "from app.config.database import engine; engine.connect(); print('✓ Conexión exitosa')"
 
+echo "→ Aplicando esquema base (solo si cambió)..."
+python -m app.utils.schema
+
 echo "→ Build completado exitosamente!"
 echo "→ Ejecuta las migraciones con: POST /api/migrations/run"
@@ -0,0 +1,105 @@
+"""
+Fixtures de pruebas: SQLite temporal con el esquema de los modelos, cliente HTTP
+de la app y datos mínimos (entidad, admin, plan con un componente).
+"""
+
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import date
+
+# La BD y la configuración deben quedar fijadas antes de importar la app
+_bd = tempfile.NamedTemporaryFile(prefix="pqrs_test_", suffix=".db", delete=False)
+_bd.close()
+os.environ["DATABASE_URL"] = f"sqlite:///{_bd.name}"
+os.environ.setdefault("LOG_ACCESS_SAMPLE_RATE", "0")
+os.environ.setdefault("SECOP_SYNC_INTERVAL_MINUTES", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.config.database import SessionLocal, engine
+from app.main import app
+from app.models.entity import Entity
+from app.models.plan import ComponenteProceso, PlanInstitucional
+from app.models.user import User, UserRole
+from app.utils.auth import create_access_token
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:  # El startup aplica el esquema en la BD temporal
+        yield c
+    engine.dispose()
+    os.unlink(_bd.name)
+
+
+@pytest.fixture
+def db(client):
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture
+def headers_de():
+    """headers_de(username) -> header Authorization con un token válido del usuario"""
+    return lambda username: {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+@pytest.fixture
+def entidad(db):
+    sufijo = uuid.uuid4().hex[:8]
+    entidad = Entity(name=f"Entidad {sufijo}", code=f"T-{sufijo}", slug=f"t-{sufijo}")
+    db.add(entidad)
+    db.commit()
+    return entidad
+
+
+@pytest.fixture
+def admin(db, entidad):
+    usuario = User(
+        username=f"admin_{entidad.slug}", email=f"admin.{entidad.slug}@prueba.gov.co", full_name="Admin Prueba",
+        hashed_password="x", role=UserRole.ADMIN, entity_id=entidad.id,
+    )
+    db.add(usuario)
+    db.commit()
+    return usuario
+
+
+@pytest.fixture
+def plan(db, entidad):
+    plan = PlanInstitucional(
+        anio=2025, nombre="Plan de prueba", descripcion="Plan institucional de prueba",
+        fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 12, 31),
+        responsable_elaboracion="Oficina de Planeación", entity_id=entidad.id,
+    )
+    db.add(plan)
+    db.flush()
+    db.add(ComponenteProceso(nombre="Componente de prueba", plan_id=plan.id))
+    db.commit()
+    return plan
+
+
+@pytest.fixture
+def contar_sentencias():
+    """Uso: `with contar_sentencias() as sentencias: ...` -> lista de SQL ejecutado en el bloque"""
+
+    @contextmanager
+    def contar():
+        sentencias = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            yield sentencias
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+    return contar
@@ -0,0 +1,57 @@
+import pytest
+
+from app.models.entity import Entity
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def superadmin(db):
+    usuario = db.query(User).filter(User.username == "superadmin_pruebas").first()
+    if usuario is None:
+        usuario = User(
+            username="superadmin_pruebas", email="superadmin@prueba.gov.co", full_name="Superadmin Prueba",
+            hashed_password="x", role=UserRole.SUPERADMIN,
+        )
+        db.add(usuario)
+        db.commit()
+    return usuario
+
+
+@pytest.fixture
+def entidades_con_usuarios(db):
+    entidades = []
+    for i, (admins, secretarios) in enumerate([(1, 2), (2, 0), (0, 0)]):
+        entidad = Entity(name=f"Conteo {i}", code=f"CONTEO-{i}", slug=f"conteo-{i}")
+        db.add(entidad)
+        db.flush()
+        for j in range(admins + secretarios):
+            db.add(User(
+                username=f"conteo_{i}_{j}", email=f"conteo.{i}.{j}@prueba.gov.co", full_name="Usuario Conteo",
+                hashed_password="x", entity_id=entidad.id,
+                role=UserRole.ADMIN if j < admins else UserRole.SECRETARIO,
+            ))
+        entidades.append((entidad, admins, admins + secretarios))
+    db.commit()
+    yield entidades
+    for entidad, _, _ in entidades:
+        db.query(User).filter(User.entity_id == entidad.id).delete()
+        db.delete(entidad)
+    db.commit()
+
+
+def test_listado_de_entidades_cuenta_usuarios_en_una_consulta(
+    client, headers_de, contar_sentencias, superadmin, entidades_con_usuarios
+):
+    headers = headers_de(superadmin.username)
+    with contar_sentencias() as sentencias:
+        respuesta = client.get("/api/entities/", headers=headers)
+
+    assert respuesta.status_code == 200
+    # Una sola consulta agrupada, sin importar el número de entidades (antes: 2 COUNT por entidad)
+    conteos = [s for s in sentencias if "count(" in s.lower()]
+    assert len(conteos) == 1, conteos
+
+    por_id = {e["id"]: e for e in respuesta.json()}
+    for entidad, admins, usuarios in entidades_con_usuarios:
+        assert por_id[entidad.id]["admin_count"] == admins
+        assert por_id[entidad.id]["user_count"] == usuarios
@@ -0,0 +1,10 @@
+def test_plan_completo_serializa_decimales_igual_con_y_sin_campos(client, headers_de, admin, plan):
+    url = f"/api/planes/{plan.id}/completo"
+    completo = client.get(url, headers=headers_de(admin.username)).json()
+    proyectado = client.get(url, params={"campos": "responsable"}, headers=headers_de(admin.username)).json()
+
+    assert isinstance(completo["porcentaje_avance"], str)
+    assert proyectado["porcentaje_avance"] == completo["porcentaje_avance"]
+    assert (
+        proyectado["componentes"][0]["porcentaje_avance"] == completo["componentes"][0]["porcentaje_avance"]
+    )
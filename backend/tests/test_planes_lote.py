@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+
+from app.models.plan import Actividad
+
+
+@pytest.fixture
+def actividad(db, plan):
+    actividad = Actividad(
+        componente_id=plan.componentes[0].id, responsable="Secretaría de Hacienda",
+        fecha_inicio_prevista=date(2025, 2, 1), fecha_fin_prevista=date(2025, 3, 1),
+    )
+    db.add(actividad)
+    db.commit()
+    return actividad
+
+
+@pytest.mark.parametrize("campo", ["fecha_inicio_prevista", "fecha_fin_prevista"])
+def test_lote_rechaza_fecha_nula_en_update(client, db, headers_de, admin, plan, actividad, campo):
+    respuesta = client.post(
+        f"/api/planes/{plan.id}/lote",
+        headers=headers_de(admin.username),
+        json={"operaciones": [{"op": "update", "tipo": "actividad", "id": actividad.id, "datos": {campo: None}}]},
+    )
+
+    assert respuesta.status_code == 422
+    assert "Operación 0" in respuesta.json()["detail"]
+    db.refresh(actividad)
+    assert actividad.fecha_inicio_prevista == date(2025, 2, 1)
+    assert actividad.fecha_fin_prevista == date(2025, 3, 1)
+
+
+def test_lote_rechaza_fechas_invertidas(client, headers_de, admin, plan, actividad):
+    respuesta = client.post(
+        f"/api/planes/{plan.id}/lote",
+        headers=headers_de(admin.username),
+        json={"operaciones": [{
+            "op": "update", "tipo": "actividad", "id": actividad.id,
+            "datos": {"fecha_inicio_prevista": "2025-04-01"},
+        }]},
+    )
+
+    assert respuesta.status_code == 400
@@ -0,0 +1,53 @@
+"""La cadena de permisos actividad → componente → plan debe resolverse con una sola consulta por request"""
+
+import re
+from datetime import date
+
+import pytest
+
+from app.models.plan import Actividad
+from app.routes.planes import puede_editar_actividad, puede_registrar_ejecucion, tiene_permiso_actividad
+
+# \b evita contar columnas como entities.enable_planes_institucionales
+TABLAS_CADENA = re.compile(r"\b(componentes_procesos|planes_institucionales)\b")
+
+
+def _consultas_cadena(sentencias):
+    return [s for s in sentencias if TABLAS_CADENA.search(s)]
+
+
+@pytest.fixture
+def actividad(db, plan):
+    actividad = Actividad(
+        componente_id=plan.componentes[0].id, responsable="Secretaría de Hacienda",
+        fecha_inicio_prevista=date(2025, 2, 1), fecha_fin_prevista=date(2025, 3, 1),
+    )
+    db.add(actividad)
+    db.commit()
+    return actividad
+
+
+def test_obtener_actividad_resuelve_permisos_con_una_consulta(
+    client, headers_de, contar_sentencias, admin, actividad
+):
+    headers = headers_de(admin.username)
+    with contar_sentencias() as sentencias:
+        respuesta = client.get(f"/api/planes/actividades/{actividad.id}", headers=headers)
+
+    assert respuesta.status_code == 200
+    consultas = _consultas_cadena(sentencias)
+    assert len(consultas) == 1, consultas
+    assert "JOIN" in consultas[0]
+
+
+def test_validaciones_de_permiso_comparten_la_entidad_memoizada(db, contar_sentencias, admin, actividad):
+    db.expire_all()
+    cargada = db.get(Actividad, actividad.id)
+    with contar_sentencias() as sentencias:
+        assert tiene_permiso_actividad(admin, cargada, db)
+        assert puede_editar_actividad(admin, cargada, db)
+        assert puede_registrar_ejecucion(admin, cargada, db)
+
+    consultas = _consultas_cadena(sentencias)
+    assert len(consultas) == 1, consultas
+    assert "JOIN" in consultas[0]
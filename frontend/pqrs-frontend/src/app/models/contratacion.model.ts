@@ -86,3 +86,16 @@ export interface KPIsContratacion {
     sumaAdjudicado: number; // COP
     promedioPrecioBase: number; // COP
 }
+
+export interface AgregadosContratacion {
+    nit: string;
+    periodo: { desde?: string | null; hasta?: string | null };
+    fuente: 'espejo' | 'upstream';
+    kpis: KPIsContratacion;
+    distribuciones: {
+        estados: Record<string, number>;
+        modalidades: Record<string, number>;
+        tiposContrato: Record<string, number>;
+    };
+    top_proveedores: Array<{ nombre: string; valor: number; contratos: number }>;
+}
@@ -144,6 +144,31 @@ export interface PlanInstitucionalCompleto extends PlanInstitucional {
     componentes: ComponenteConActividades[];
 }
 
+// Operaciones en lote (POST /planes/{id}/lote)
+export interface OperacionLote {
+    op: 'create' | 'update' | 'delete';
+    tipo: 'componente' | 'actividad';
+    id?: number;
+    ref?: string;
+    componente_id?: number;
+    componente_ref?: string;
+    datos?: { [key: string]: any };
+}
+
+export interface ResultadoOperacionLote {
+    indice: number;
+    op: string;
+    tipo: string;
+    id: number;
+    ref?: string | null;
+}
+
+export interface LoteOperacionesResponse {
+    plan_id: number;
+    resultados: ResultadoOperacionLote[];
+    porcentaje_avance: number;
+}
+
 export interface EstadisticasPlan {
     total_componentes: number;
     total_actividades: number;
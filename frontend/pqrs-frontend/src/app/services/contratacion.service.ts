@@ -1,13 +1,14 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable, map, of } from 'rxjs';
-import { ProcesoContratacion, FiltroContratacion } from '../models/contratacion.model';
+import { ProcesoContratacion, FiltroContratacion, AgregadosContratacion } from '../models/contratacion.model';
 import { environment } from '../../environments/environment';
 
 @Injectable({ providedIn: 'root' })
 export class ContratacionService {
     // Usar proxy del backend para evitar CORS
     private baseUrl = `${environment.apiUrl}/contratacion/proxy`;
+    private agregadosUrl = `${environment.apiUrl}/contratacion/agregados`;
     private cache = new Map<string, { ts: number; data: ProcesoContratacion[] }>();
     private TTL_MS = 5 * 60 * 1000; // 5 minutos
 
@@ -122,4 +123,15 @@ export class ContratacionService {
             })
         );
     }
+
+    /**
+     * KPIs, distribuciones y top proveedores agregados en el backend
+     * (espejo local o SoQL agrupado), sin descargar los contratos.
+     */
+    fetchAgregados(filtro: FiltroContratacion): Observable<AgregadosContratacion> {
+        let params = new HttpParams().set('nit', filtro.entidad?.trim() || '800019277');
+        if (filtro.fechaDesde) params = params.set('desde', filtro.fechaDesde);
+        if (filtro.fechaHasta) params = params.set('hasta', filtro.fechaHasta);
+        return this.http.get<AgregadosContratacion>(this.agregadosUrl, { params });
+    }
 }
@@ -19,7 +19,9 @@ import {
     ActividadEjecucionUpdate,
     EstadoPlan,
     EstadoComponente,
-    EstadisticasPlan
+    EstadisticasPlan,
+    OperacionLote,
+    LoteOperacionesResponse
 } from '../models/plan-v2.model';
 
 @Injectable({ providedIn: 'root' })
@@ -61,6 +63,10 @@ export class PlanV2Service {
         return this.http.get<EstadisticasPlan>(`${this.baseUrl}/${id}/estadisticas`);
     }
 
+    aplicarLote(planId: number, operaciones: OperacionLote[]): Observable<LoteOperacionesResponse> {
+        return this.http.post<LoteOperacionesResponse>(`${this.baseUrl}/${planId}/lote`, { operaciones });
+    }
+
     // ============== COMPONENTES ==============
     listarComponentes(planId: number, estado?: EstadoComponente): Observable<ComponenteProceso[]> {
         let params = new HttpParams();